@@ -0,0 +1,267 @@
+"""
+Arena: matches between search configurations played in worker processes, with Elo estimates and early stopping
+
+Usage: python -m arena
+"""
+
+import itertools
+import logging
+import multiprocessing
+
+import numpy as np
+
+from mcts import MonteCarloTreeSearch
+from utils.elo import elo_interval, sprt, sprt_llr
+from utils.scoring import thompson_array
+
+from games.tictactoe import Game
+
+
+class Engine:
+    """
+    Configuration of a player: arguments of MonteCarloTreeSearch (scoring_func, c_, solver, evaluator...) and search
+    budget of each move
+    """
+
+    def __init__(self, name, max_iterations=200, max_runtime=np.inf, n_simulations=1, **search_kwargs):
+        self.name = name
+        self.max_iterations = max_iterations
+        self.max_runtime = max_runtime
+        self.n_simulations = n_simulations
+        self.search_kwargs = search_kwargs
+
+    def new_tree(self, game):
+        """
+        Search tree of the engine
+
+        :param game: game at the root
+        :return: MonteCarloTreeSearch
+        """
+        return MonteCarloTreeSearch(game=game.copy(), **self.search_kwargs)
+
+    def play(self, tree):
+        """
+        Search the root of a tree and choose a move
+
+        :param tree: MonteCarloTreeSearch of the engine
+        :return: (move, SearchStats of the search)
+        """
+        stats = tree.search(max_iterations=self.max_iterations, max_runtime=self.max_runtime,
+                            n_simulations=self.n_simulations)
+        return tree.recommended_play(), stats
+
+    def __repr__(self):
+        return 'Engine({})'.format(self.name)
+
+
+def arena_game(game_class, game_kwargs, engines, opening_moves, seed):
+    """
+    Play a game between two engines, each one keeping its tree from one move to the next
+    The game starts with opening_moves random moves so that games differ.
+
+    :param game_class: class of the game
+    :param game_kwargs: arguments of the game class
+    :param engines: engines of the first and the second player
+    :param opening_moves: number of random moves played first
+    :param seed: random seed of the game
+    :return: dict of the index of the winning engine (None for a draw) and of the think time, playouts and moves of
+    each engine
+    """
+    np.random.seed(seed)
+    game = game_class(**game_kwargs)
+    for _ in range(opening_moves):
+        if game.legal_plays():
+            game.play()
+    trees = [engine.new_tree(game) for engine in engines]
+    think_times, playouts, n_moves = [0., 0.], [0, 0], [0, 0]
+    while game.legal_plays():
+        player = game.player_index
+        move, stats = engines[player].play(trees[player])
+        if move is None:
+            # the search did not expand the root (no time left): a random move is played
+            legal_plays = game.legal_plays()
+            move = legal_plays[np.random.randint(len(legal_plays))]
+        think_times[player] += stats.elapsed
+        playouts[player] += stats.playouts
+        n_moves[player] += 1
+        game.play(move)
+        for tree in trees:
+            tree.advance(move)
+    winner = game.winner()
+    return {'winner': None if winner is None else game.players.index(winner), 'think_times': think_times,
+            'playouts': playouts, 'moves': n_moves}
+
+
+def arena_worker(arguments):
+    """
+    Play an arena game in a worker process
+
+    :param arguments: (game number, arguments of arena_game)
+    :return: (game number, result of arena_game)
+    """
+    number, game_arguments = arguments
+    return number, arena_game(*game_arguments)
+
+
+class MatchResult:
+    """
+    Results of a match for the first engine (wins, draws, losses), think time and playouts of both engines
+    """
+
+    def __init__(self, engines):
+        self.names = [engine.name for engine in engines]
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.think_times = [0., 0.]
+        self.playouts = [0, 0]
+        self.moves = [0, 0]
+        self.decision = None   # decision of the SPRT ('H0' or 'H1') if it stopped the match
+
+    @property
+    def n_games(self):
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.n_games if self.n_games else 0.5
+
+    def add(self, result, first_engine):
+        """
+        Count the result of a game
+
+        :param result: result of arena_game
+        :param first_engine: index of the engine which played first
+        :return: nothing
+        """
+        if result['winner'] is None:
+            self.draws += 1
+        elif (result['winner'] + first_engine) % 2 == 0:
+            self.wins += 1
+        else:
+            self.losses += 1
+        for player in range(2):
+            engine = (player + first_engine) % 2
+            self.think_times[engine] += result['think_times'][player]
+            self.playouts[engine] += result['playouts'][player]
+            self.moves[engine] += result['moves'][player]
+
+    def elo(self):
+        """
+        Elo difference of the first engine and its 95% confidence interval
+
+        :return: (Elo difference, lower bound, upper bound)
+        """
+        return elo_interval(self.wins, self.draws, self.losses)
+
+    def as_dict(self):
+        """
+        All results as builtin types (to be logged or dumped as JSON)
+
+        :return: dict
+        """
+        elo, lower, upper = self.elo()
+        return {'engines': list(self.names),
+                'games': self.n_games,
+                'wins': self.wins,
+                'draws': self.draws,
+                'losses': self.losses,
+                'score': self.score,
+                'elo': elo,
+                'elo_interval': [lower, upper],
+                'sprt': self.decision,
+                'think_time_per_move': [time / moves if moves else 0.
+                                        for time, moves in zip(self.think_times, self.moves)],
+                'playouts_per_move': [playouts / moves if moves else 0.
+                                      for playouts, moves in zip(self.playouts, self.moves)]}
+
+    def __str__(self):
+        results = self.as_dict()
+        return '{} vs {}: +{} ={} -{} in {} games, Elo {:+.0f} [{:+.0f}, {:+.0f}]{} | {:.1f} / {:.1f} ms and ' \
+               '{:.0f} / {:.0f} playouts per move'.format(
+                   self.names[0], self.names[1], self.wins, self.draws, self.losses, self.n_games, results['elo'],
+                   results['elo_interval'][0], results['elo_interval'][1],
+                   ', SPRT {}'.format(self.decision) if self.decision else '',
+                   *[time * 1000 for time in results['think_time_per_move']], *results['playouts_per_move'])
+
+    def __repr__(self):
+        return 'MatchResult(%s)' % self.as_dict()
+
+
+def match(game_class, engine_a, engine_b, n_games, game_kwargs=None, n_workers=2, opening_moves=2, sprt_elos=None,
+          alpha=0.05, beta=0.05, min_games=10, seed=0):
+    """
+    Play a match between two engines in a process pool, alternating colours
+    Games are played in pairs with the same opening and random seed, each engine playing first once. With sprt_elos
+    (elo0, elo1), the match stops as soon as a sequential probability ratio test accepts that the Elo difference of
+    engine_a is elo0 ('H0') or elo1 ('H1'), the games still being played are then dropped. The test only starts after
+    min_games games since it estimates the variance of the results from the games played.
+
+    :param game_class: class of the game
+    :param engine_a: first Engine
+    :param engine_b: second Engine
+    :param n_games: max number of games
+    :param game_kwargs: arguments of the game class
+    :param n_workers: number of worker processes (games are played in this process if 1)
+    :param opening_moves: number of random moves at the beginning of each game
+    :param sprt_elos: (elo0, elo1) hypotheses of the SPRT, None to play all the games
+    :param alpha: probability of the SPRT to accept elo1 when elo0 is true
+    :param beta: probability of the SPRT to accept elo0 when elo1 is true
+    :param min_games: number of games played before the SPRT can stop the match
+    :param seed: random seed of the match
+    :return: MatchResult
+    """
+    game_kwargs = dict(game_kwargs or {})
+    engines = (engine_a, engine_b)
+    seeds = np.random.RandomState(seed).randint(2 ** 31 - 1, size=(n_games + 1) // 2)
+    # engine_a plays first in even games, each pair of games sharing the same seed
+    tasks = [(number, (game_class, game_kwargs, (engines[number % 2], engines[1 - number % 2]), opening_moves,
+                       int(seeds[number // 2])))
+             for number in range(n_games)]
+    result = MatchResult(engines)
+    pool = multiprocessing.Pool(n_workers) if n_workers > 1 else None
+    try:
+        games = pool.imap_unordered(arena_worker, tasks) if pool is not None else map(arena_worker, tasks)
+        for number, game_result in games:
+            result.add(game_result, first_engine=number % 2)
+            if sprt_elos is not None and result.n_games >= min_games:
+                result.decision = sprt(result.wins, result.draws, result.losses, *sprt_elos, alpha=alpha, beta=beta)
+                if result.decision is not None:
+                    logging.info('[Arena] SPRT accepted %s after %s games (LLR %.2f)', result.decision,
+                                 result.n_games, sprt_llr(result.wins, result.draws, result.losses, *sprt_elos))
+                    break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    logging.info('[Arena] %s', result)
+    return result
+
+
+def tournament(game_class, engines, n_games, **match_kwargs):
+    """
+    Round robin between several engines: a match between every pair of engines
+
+    :param game_class: class of the game
+    :param engines: list of Engine
+    :param n_games: max number of games per match
+    :param match_kwargs: other arguments of match
+    :return: list of MatchResult
+    """
+    return [match(game_class, engine_a, engine_b, n_games, **match_kwargs)
+            for engine_a, engine_b in itertools.combinations(engines, 2)]
+
+
+def main():
+    """
+    Compare exploration constants and Thompson sampling on TicTacToe
+    """
+    logging.basicConfig(level=logging.INFO)
+    engines = [Engine('ucb1 c=0.5', max_iterations=100), Engine('ucb1 c=1.4', max_iterations=100, c_=1.4),
+               Engine('thompson', max_iterations=100, scoring_func=thompson_array)]
+    for result in tournament(Game, engines, n_games=40, n_workers=multiprocessing.cpu_count(), sprt_elos=(0, 100)):
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Strength of search configurations against the default one (UCB1, c_=0.5): Connect4 matches stopped by a SPRT
+
+Usage: python -m benchmarks.arena
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from arena import Engine, match
+from games import connect4
+from utils.scoring import thompson_array
+
+N_ITERATIONS = 100
+THINK_TIME = 0.02   # seconds per move of the matches at equal time
+
+
+def main():
+    """
+    Print the results of matches against the default configuration at equal iterations and at equal think time
+    """
+    challengers = [('ucb1 c=0.25', {'c_': 0.25}), ('ucb1 c=1.0', {'c_': 1.0}), ('ucb1 c=1.4', {'c_': 1.4}),
+                   ('thompson', {'scoring_func': thompson_array})]
+    matches = [(Engine(name, max_iterations=N_ITERATIONS, **kwargs), Engine('ucb1 c=0.5', max_iterations=N_ITERATIONS))
+               for name, kwargs in challengers]
+    matches.append((Engine('ucb1 c=0.5 x2 iterations', max_iterations=2 * N_ITERATIONS),
+                    Engine('ucb1 c=0.5', max_iterations=N_ITERATIONS)))
+    matches += [(Engine(name + ' {:.0f} ms'.format(THINK_TIME * 1000), max_iterations=np.inf, max_runtime=THINK_TIME,
+                        **kwargs),
+                 Engine('ucb1 c=0.5 {:.0f} ms'.format(THINK_TIME * 1000), max_iterations=np.inf,
+                        max_runtime=THINK_TIME))
+                for name, kwargs in challengers[1:]]
+    for engine_a, engine_b in matches:
+        result = match(connect4.Game, engine_a, engine_b, n_games=200, n_workers=multiprocessing.cpu_count(),
+                       sprt_elos=(-50, 50), min_games=20)
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Memory used by a game after a full random game and size of the binary game records
+
+Usage: python -m benchmarks.game_records
+"""
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from games import connect4, tictactoe
+from utils import records
+
+
+def game_bytes(game_class, n_games=200, seed=0, **kwargs):
+    """
+    Memory held by games played until the end from their starting position
+
+    :param game_class: class of the games
+    :param n_games: number of games
+    :param seed: random seed
+    :param kwargs: arguments of the game class
+    :return: (mean number of moves, bytes per game)
+    """
+    np.random.seed(seed)
+    tracemalloc.start()
+    games = []
+    for _ in range(n_games):
+        game = game_class(**kwargs)
+        while game.legal_plays():
+            game.play()
+        games.append(game)
+    total_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.mean([game.n_moves for game in games])), total_bytes / n_games
+
+
+def records_size(game_class, n_games=10000, seed=0, **kwargs):
+    """
+    Save and load random games with utils.records
+
+    :param game_class: class of the games
+    :param n_games: number of games
+    :param seed: random seed
+    :param kwargs: arguments of the game class
+    :return: (bytes per game in the file, games loaded and replayed per second)
+    """
+    np.random.seed(seed)
+    games = []
+    for _ in range(n_games):
+        game = game_class(**kwargs)
+        while game.legal_plays():
+            game.play()
+        games.append(game)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'games.rec')
+        records.save_games(path, games)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        records.load_games(path, game_class, **kwargs)
+        runtime = time.perf_counter() - start
+    return size / n_games, n_games / runtime
+
+
+def main():
+    """
+    Print the memory of finished games and the size of their records
+    """
+    for name, game_class in [('tictactoe', tictactoe.Game), ('connect4', connect4.Game)]:
+        n_moves, n_bytes = game_bytes(game_class)
+        file_bytes, load_speed = records_size(game_class)
+        print('{:<10} {:>4.1f} moves/game | {:>6.0f} bytes/game in memory | {:>4.1f} bytes/game in records file | '
+              '{:>6.0f} games loaded/s'.format(name, n_moves, n_bytes, file_bytes, load_speed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Gomoku search with candidate moves around the stones compared with the search over every empty cell
+
+Usage: python -m benchmarks.gomoku
+"""
+
+import time
+
+import numpy as np
+
+from benchmarks.tactics import playouts_to_correct_move
+from games import gomoku, tictactoe
+from mcts import MonteCarloTreeSearch
+
+# (name, moves played from the starting position, correct moves of the player to move)
+PUZZLES = [('win with an open four', [(7, 4), (0, 0), (7, 5), (0, 2), (7, 6), (0, 4), (7, 7), (14, 14)],
+            [(7, 3), (7, 8)]),
+           ('block a four', [(7, 3), (7, 4), (0, 14), (7, 5), (14, 0), (7, 6), (14, 14), (7, 7)], [(7, 8)])]
+# (name, game factory)
+SETTINGS = [('all empty cells', lambda: tictactoe.Game(board_size=15, n_in_a_row=5)),
+            ('candidates, radius 1', lambda: gomoku.Game(radius=1)),
+            ('candidates, radius 2', lambda: gomoku.Game(radius=2))]
+
+
+def iterations_per_second(game, n_iterations, seed=0):
+    """
+    Search a position with one sequential rollout per iteration
+
+    :param game: game at the root of the tree
+    :param n_iterations: number of search iterations
+    :param seed: random seed
+    :return: iterations per second
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game)
+    starting_time = time.perf_counter()
+    tree.search(max_iterations=n_iterations, max_runtime=np.inf)
+    return n_iterations / (time.perf_counter() - starting_time)
+
+
+def main():
+    """
+    Print search throughput from the starting position and playouts needed to solve each puzzle for each setting
+    """
+    for setting, new_game in SETTINGS:
+        results = []
+        for _, moves, correct_moves in PUZZLES:
+            playouts = []
+            for seed in range(5):
+                game = new_game()
+                for move in moves:
+                    game.play(move)
+                playouts.append(playouts_to_correct_move(game, correct_moves, n_iterations=3000, checkpoint=50,
+                                                         seed=seed))
+            results.append(np.mean(playouts))
+        print('{:<22} | {:>5.0f} iterations/s | correct move found for good after {} playouts'.format(
+            setting, iterations_per_second(new_game(), n_iterations=1000),
+            ' / '.join('{:.0f}'.format(result) for result in results)))
+
+
+if __name__ == '__main__':
+    main()
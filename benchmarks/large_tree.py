@@ -0,0 +1,49 @@
+"""
+Search throughput and memory while a Connect4 tree grows to a large number of nodes
+
+Usage: python -m benchmarks.large_tree [n_iterations]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from games import connect4
+from mcts import MonteCarloTreeSearch
+from utils.stats import peak_rss
+
+
+def grow(n_iterations, n_segments=5, seed=0):
+    """
+    Search the starting Connect4 position and time each segment of iterations
+
+    :param n_iterations: number of search iterations (one node is created by each of them)
+    :param n_segments: number of timed segments
+    :param seed: random seed
+    :return: list of (number of nodes, iterations per second of the segment, peak resident memory in bytes)
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=connect4.Game(), solver=False, capacity=2 * n_iterations)
+    results = []
+    for _ in range(n_segments):
+        stats = tree.search(max_iterations=n_iterations // n_segments, max_runtime=np.inf)
+        results.append((tree.n_nodes(), stats.iterations / stats.elapsed, peak_rss()))
+    return results
+
+
+def main():
+    """
+    Print throughput and memory along the growth of the tree
+    """
+    n_iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    starting_rss = peak_rss()
+    starting_time = time.time()
+    for n_nodes, iterations_per_second, rss in grow(n_iterations):
+        print('{:>8} nodes | {:>6.0f} iterations/s | peak RSS {:>6.0f} MB ({:>5.0f} bytes/node)'.format(
+            n_nodes, iterations_per_second, rss / 2 ** 20, (rss - starting_rss) / n_nodes))
+    print('total time: {:.0f} s'.format(time.time() - starting_time))
+
+
+if __name__ == '__main__':
+    main()
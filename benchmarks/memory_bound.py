@@ -0,0 +1,47 @@
+"""
+Long Connect4 searches with a bounded number of tree slots: nodes kept, peak resident memory and recommended move
+compared with unbounded searches
+
+Usage: python -m benchmarks.memory_bound
+"""
+
+import numpy as np
+
+from games import connect4
+from mcts import MonteCarloTreeSearch
+
+
+def long_search(max_nodes, n_iterations, seed):
+    """
+    Search the starting Connect4 position
+
+    :param max_nodes: max number of slots of the tree (0 for an unbounded tree)
+    :param n_iterations: number of search iterations
+    :param seed: random seed
+    :return: (recommended move, SearchStats)
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=connect4.Game(), solver=False, max_nodes=max_nodes)
+    stats = tree.search(max_iterations=n_iterations, max_runtime=np.inf)
+    return tree.recommended_play(), stats
+
+
+def main():
+    """
+    Print the results of long searches for several budgets
+    Budgets go increasing since the peak resident memory of a process never decreases
+    """
+    seeds = range(5)
+    results = {max_nodes: [long_search(max_nodes, 20000, seed) for seed in seeds]
+               for max_nodes in (1000, 5000, 20000, 0)}
+    references = [move for move, _ in results[0]]
+    for max_nodes, budget_results in results.items():
+        agreement = np.mean([move == reference for (move, _), reference in zip(budget_results, references)])
+        print('max_nodes: {:<6} | peak {:>6.0f} nodes | {:>6.0f} pruned | peak RSS {:>4.0f} MB | {:>4.0%} same move as '
+              'unbounded'.format(max_nodes or 'none', np.mean([stats.peak_nodes for _, stats in budget_results]),
+                                 np.mean([stats.pruned_nodes for _, stats in budget_results]),
+                                 budget_results[-1][1].peak_rss / 2 ** 20, agreement))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+PUCT search throughput with leaves evaluated one by one or in batches by the NumPy MLP evaluator
+
+Usage: python -m benchmarks.puct
+"""
+
+import time
+
+import numpy as np
+
+from games import connect4
+from mcts import MonteCarloTreeSearch
+from utils.evaluators import MLPEvaluator
+
+
+class TimedEvaluator:
+    """
+    Evaluator measuring the time spent in the evaluator it wraps
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.encode_time = 0.
+        self.evaluate_time = 0.
+        self.n_calls = 0
+
+    def encode(self, game):
+        """
+        Input of a position, timed
+
+        :param game: game at the position
+        :return: input array
+        """
+        starting_time = time.perf_counter()
+        inputs = self.evaluator.encode(game)
+        self.encode_time += time.perf_counter() - starting_time
+        return inputs
+
+    def evaluate(self, inputs):
+        """
+        Priors and values of a batch of positions, timed
+
+        :param inputs: stacked input arrays
+        :return: (priors, values)
+        """
+        starting_time = time.perf_counter()
+        result = self.evaluator.evaluate(inputs)
+        self.evaluate_time += time.perf_counter() - starting_time
+        self.n_calls += 1
+        return result
+
+
+def puct_throughput(batch_size, n_hidden, n_iterations, seed=0):
+    """
+    Search the Connect4 starting position with the MLP evaluator
+
+    :param batch_size: max number of leaves evaluated at once
+    :param n_hidden: size of the hidden layer of the evaluator
+    :param n_iterations: number of leaves evaluated
+    :param seed: random seed of the evaluator weights
+    :return: (iterations per second, encode and evaluate microseconds per leaf, number of evaluate calls)
+    """
+    game = connect4.Game()
+    evaluator = TimedEvaluator(MLPEvaluator(game, n_hidden=n_hidden, seed=seed))
+    tree = MonteCarloTreeSearch(game=game, evaluator=evaluator, batch_size=batch_size)
+    stats = tree.search(max_iterations=n_iterations, max_runtime=np.inf)
+    return (stats.iterations / stats.elapsed, evaluator.encode_time / stats.iterations * 1e6,
+            evaluator.evaluate_time / stats.iterations * 1e6, evaluator.n_calls)
+
+
+def main():
+    """
+    Print PUCT throughput for several batch sizes and hidden layer sizes
+    """
+    for n_hidden in (64, 512):
+        for batch_size in (1, 8, 64):
+            iterations, encode_time, evaluate_time, n_calls = puct_throughput(batch_size, n_hidden, n_iterations=5000)
+            print('hidden {:>4} | batch {:>3} | {:>6.0f} iterations/s | encode {:>5.1f} us/leaf | '
+                  'evaluate {:>5.1f} us/leaf in {:>5} calls'.format(
+                      n_hidden, batch_size, iterations, encode_time, evaluate_time, n_calls))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Playouts needed to find the correct move of the tactical puzzles of benchmarks.tactics with and without RAVE
+
+Usage: python -m benchmarks.rave
+"""
+
+import numpy as np
+
+from benchmarks.tactics import PUZZLES, playouts_to_correct_move, puzzle_position
+
+
+def main():
+    """
+    Print the mean playouts needed to find the correct move of each puzzle for several RAVE equivalence parameters
+    """
+    n_seeds = 10
+    for game_name in PUZZLES:
+        for rave_equivalence in (0, 30, 300, 3000):
+            playouts = [np.mean([playouts_to_correct_move(puzzle_position(game_name, moves), correct_moves,
+                                                          n_iterations=3000, checkpoint=10, seed=seed,
+                                                          rave_equivalence=rave_equivalence)
+                                 for seed in range(n_seeds)])
+                        for _, moves, correct_moves in PUZZLES[game_name]]
+            print('{:<10} RAVE equivalence: {:<5} | correct move found for good after {} playouts'.format(
+                game_name, rave_equivalence, ' / '.join('{:>5.0f}'.format(value) for value in playouts)))
+
+
+if __name__ == '__main__':
+    main()
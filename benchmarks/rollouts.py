@@ -0,0 +1,71 @@
+"""
+Random rollouts per second, played one at a time or in lockstep batches
+
+Usage: python -m benchmarks.rollouts
+"""
+
+import time
+
+import numpy as np
+
+from games import connect4, oware, tictactoe
+from utils.rollouts import random_rollouts
+
+
+def sequential_rollouts_per_second(game, n_games=500, return_moves=False):
+    """
+    Play random games one after the other with Game.play and undo them
+
+    :param game: starting position
+    :param n_games: number of games
+    :param return_moves: whether to also return the mean number of moves of the games
+    :return: games per second (and mean number of moves per game if return_moves is True)
+    """
+    total_moves = 0
+    starting_time = time.time()
+    for _ in range(n_games):
+        n_moves = 0
+        while game.legal_plays():
+            game.play()
+            n_moves += 1
+        for _ in range(n_moves):
+            game.undo()
+        total_moves += n_moves
+    rollouts_per_second = n_games / (time.time() - starting_time)
+    if return_moves:
+        return rollouts_per_second, total_moves / n_games
+    return rollouts_per_second
+
+
+def batched_rollouts_per_second(game, batch_size=4096):
+    """
+    Play random games in lockstep with utils.rollouts
+
+    :param game: starting position
+    :param batch_size: number of games
+    :return: games per second
+    """
+    board, to_move, winner = game.rollout_position()
+    starting_time = time.time()
+    random_rollouts(np.repeat(board[None], batch_size, axis=0), np.full(batch_size, to_move),
+                    n_in_a_row=game.n_in_a_row, gravity=game.gravity, winners=np.full(batch_size, winner))
+    return batch_size / (time.time() - starting_time)
+
+
+def main():
+    """
+    Print rollouts throughput for TicTacToe, Connect4 and Oware (which has no batched rollouts)
+    """
+    np.random.seed(0)
+    for name, game in [('tictactoe', tictactoe.Game(save_history=False)),
+                       ('connect4', connect4.Game(save_history=False)),
+                       ('oware', oware.Game(save_history=False))]:
+        rollouts_per_second, n_moves = sequential_rollouts_per_second(game, return_moves=True)
+        batched = '{:>8.0f} rollouts/s'.format(batched_rollouts_per_second(game)) \
+            if hasattr(game, 'rollout_position') else '     n/a'
+        print('{:<10} sequential: {:>8.0f} rollouts/s ({:>5.1f} moves/rollout, {:>7.0f} moves/s) | batched: {}'.format(
+            name, rollouts_per_second, n_moves, rollouts_per_second * n_moves, batched))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Playouts per second of root parallel searches with an increasing number of worker processes
+
+Usage: python -m benchmarks.root_parallel [max number of workers]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from games import connect4
+from mcts import MonteCarloTreeSearch
+
+
+def playouts_per_second(n_workers, max_runtime=3., seed=0):
+    """
+    Run a Connect4 search with a given number of workers
+
+    :param n_workers: number of worker processes
+    :param max_runtime: search time in seconds
+    :param seed: random seed
+    :return: playouts per second (wall clock, process startup included)
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=connect4.Game())
+    starting_time = time.time()
+    tree.search(max_iterations=np.inf, max_runtime=max_runtime, n_workers=n_workers)
+    return tree.root.n_plays / (time.time() - starting_time)
+
+
+def main():
+    """
+    Print playouts per second from 1 to N workers
+    """
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    reference = None
+    for n_workers in sorted({1, 2, 4, 8, 16, 32, max_workers}):
+        if n_workers > max_workers:
+            continue
+        throughput = playouts_per_second(n_workers)
+        reference = reference or throughput
+        print('{:>3} workers | {:>8.0f} playouts/s | x{:.2f}'.format(n_workers, throughput, throughput / reference))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Cost of scoring the children of a node during a descent of the tree
+
+Usage: python -m benchmarks.scoring
+"""
+
+import timeit
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+from utils.scoring import thompson, thompson_array, ucb1, ucb1_array
+
+
+def scoring_cost(n_children, n_repeats=2000):
+    """
+    Time to score a vector of siblings with scalar calls and with a single array call
+
+    :param n_children: number of siblings
+    :param n_repeats: number of timed calls
+    :return: dict of microseconds per sibling vector
+    """
+    plays = np.random.randint(1, 1000, size=n_children)
+    wins = (plays * np.random.rand(n_children)).astype(int)
+    ties = np.zeros(n_children, dtype=int)
+    total_plays = int(plays.sum())
+    timings = {
+        'ucb1 loop': lambda: [ucb1(p, w, t, total_plays, c_=0.5) for p, w, t in zip(plays, wins, ties)],
+        'ucb1 array': lambda: ucb1_array(plays, wins, ties, total_plays, c_=0.5),
+        'thompson loop': lambda: [thompson(p, w, t) for p, w, t in zip(plays, wins, ties)],
+        'thompson array': lambda: thompson_array(plays, wins, ties),
+    }
+    return {name: timeit.timeit(func, number=n_repeats) / n_repeats * 1e6 for name, func in timings.items()}
+
+
+def descent_cost(game, n_iterations=3000, n_selections=2000):
+    """
+    Time of a full select() descent on a tree grown with n_iterations
+
+    :param game: game at the root of the tree
+    :param n_iterations: number of search iterations used to grow the tree
+    :param n_selections: number of timed selections
+    :return: (microseconds per descent, microseconds per tree level)
+    """
+    tree = MonteCarloTreeSearch(game=game)
+    for _ in range(n_iterations):
+        node = tree.expand(parent=tree.select())
+        n_wins, n_ties = tree.simulate(node=node, n_simulations=1)
+        tree.backpropagate(node=node, n_plays=1, n_wins=n_wins, n_ties=n_ties)
+    depth = 0
+    timer = timeit.default_timer()
+    for _ in range(n_selections):
+        depth += len(tree.nodes.ancestors(tree.select()))
+    elapsed = timeit.default_timer() - timer
+    return elapsed / n_selections * 1e6, elapsed / max(depth, 1) * 1e6
+
+
+def main():
+    """
+    Print scoring costs
+    """
+    np.random.seed(0)
+    for n_children in (7, 9, 225):
+        costs = ', '.join('{}: {:.1f} us'.format(name, cost) for name, cost in scoring_cost(n_children).items())
+        print('{:>3} children | {}'.format(n_children, costs))
+    for name, game in [('tictactoe', tictactoe.Game()), ('connect4', connect4.Game())]:
+        per_descent, per_level = descent_cost(game)
+        print('{:<10} select: {:.1f} us per descent, {:.1f} us per level'.format(name, per_descent, per_level))
+
+
+if __name__ == '__main__':
+    main()
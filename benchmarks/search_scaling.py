@@ -0,0 +1,55 @@
+"""
+Time per search iteration as the tree grows, with and without rendering the whole tree at each iteration
+
+Usage: python -m benchmarks.search_scaling [number of iterations]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from games import connect4
+from mcts import MonteCarloTreeSearch
+
+
+def iteration_times(n_iterations, block, render_tree, seed=0):
+    """
+    Run a Connect4 search and time each block of iterations
+
+    :param n_iterations: number of iterations of the search
+    :param block: number of iterations per timed block
+    :param render_tree: whether the whole tree is rendered to a string at each iteration (former search behaviour)
+    :param seed: random seed
+    :return: list of mean time per iteration of each block, in microseconds
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=connect4.Game())
+    times = [time.perf_counter()]
+
+    def on_stats(stats):
+        if render_tree:
+            tree.show_tree(return_string=True)
+        if stats.iterations % block == 0:
+            times.append(time.perf_counter())
+
+    tree.search(max_iterations=n_iterations, max_runtime=np.inf, stats_callback=on_stats,
+                stats_interval=1 if render_tree else block)
+    return [(end - start) / block * 1e6 for start, end in zip(times, times[1:])]
+
+
+def main():
+    """
+    Print the time per iteration of successive blocks of iterations
+    """
+    n_iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    block = n_iterations // 8
+    rendered = iteration_times(n_iterations // 4, block // 4, render_tree=True)
+    print('rendering the tree at each iteration (blocks of {} iterations):'.format(block // 4))
+    print(' '.join('{:>8.0f}us'.format(t) for t in rendered))
+    print('search (blocks of {} iterations):'.format(block))
+    print(' '.join('{:>8.0f}us'.format(t) for t in iteration_times(n_iterations, block, render_tree=False)))
+
+
+if __name__ == '__main__':
+    main()
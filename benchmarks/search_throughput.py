@@ -0,0 +1,61 @@
+"""
+Number of search iterations per second
+
+Usage: python -m benchmarks.search_throughput
+"""
+
+import time
+
+import numpy as np
+
+from games import connect4, oware, tictactoe
+from mcts import MonteCarloTreeSearch
+
+
+def iterations_per_second(game, max_runtime=3., seed=0):
+    """
+    Run select/expand/simulate/backpropagate iterations for a given time
+
+    :param game: game at the root of the tree
+    :param max_runtime: duration in seconds
+    :param seed: random seed
+    :return: iterations per second
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game)
+    n_iterations, starting_time = 0, time.time()
+    while time.time() - starting_time < max_runtime:
+        node = tree.expand(parent=tree.select())
+        n_wins, n_ties = tree.simulate(node=node, n_simulations=1)
+        tree.backpropagate(node=node, n_plays=1, n_wins=n_wins, n_ties=n_ties)
+        n_iterations += 1
+    return n_iterations / (time.time() - starting_time)
+
+
+def search_iterations_per_second(game, max_runtime=3., seed=0):
+    """
+    Run MonteCarloTreeSearch.search for a given time
+
+    :param game: game at the root of the tree
+    :param max_runtime: duration in seconds
+    :param seed: random seed
+    :return: iterations per second
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game)
+    starting_time = time.time()
+    tree.search(max_iterations=np.inf, max_runtime=max_runtime)
+    return tree.root.n_plays / (time.time() - starting_time)
+
+
+def main():
+    """
+    Print search throughput for TicTacToe, Connect4 and Oware
+    """
+    for name, game in [('tictactoe', tictactoe.Game()), ('connect4', connect4.Game()), ('oware', oware.Game())]:
+        print('{:<10} {:>7.0f} iterations/s | search(): {:>7.0f} iterations/s'.format(
+            name, iterations_per_second(game), search_iterations_per_second(game)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Self-play positions written per second by worker processes and training batches read from the memory-mapped dataset
+
+Usage: python -m benchmarks.selfplay
+"""
+
+import multiprocessing
+import tempfile
+import time
+
+import numpy as np
+
+from games import connect4, tictactoe
+from selfplay import self_play
+from utils.evaluators import MLPEvaluator
+from utils.shards import ShardReader
+
+
+def batches_per_second(directory, batch_size=256, n_batches=200, seed=0):
+    """
+    Random training batches read from a self-play dataset
+
+    :param directory: dataset directory
+    :param batch_size: number of positions per batch
+    :param n_batches: number of batches
+    :param seed: random seed
+    :return: batches per second
+    """
+    reader = ShardReader(directory)
+    random_state = np.random.RandomState(seed)
+    starting_time = time.perf_counter()
+    for _ in range(n_batches):
+        reader.sample(batch_size, random_state)
+    return n_batches / (time.perf_counter() - starting_time)
+
+
+def main():
+    """
+    Print self-play throughput for several numbers of workers
+    """
+    settings = [('tictactoe, rollouts', tictactoe.Game, None, 200, 100),
+                ('connect4, rollouts', connect4.Game, None, 100, 10),
+                ('connect4, PUCT MLP', connect4.Game, MLPEvaluator(connect4.Game()), 100, 10)]
+    n_cpus = multiprocessing.cpu_count()
+    print('{} CPUs'.format(n_cpus))
+    for name, game_class, evaluator, max_iterations, n_games in settings:
+        for n_workers in sorted({1, 2, 4, n_cpus}):
+            with tempfile.TemporaryDirectory() as directory:
+                report = self_play(directory, game_class, n_games=n_games, max_iterations=max_iterations,
+                                   evaluator=evaluator, n_workers=n_workers, shard_size=1000)
+                batches = batches_per_second(directory)
+            print('{:<20} | {} workers | {:>6.1f} positions/s | {:>5.2f} games/s | {:>5.0f} batches of 256/s'.format(
+                name, n_workers, report['positions_per_second'], report['games_per_second'], batches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Latency of move recommendations: a new process per move (like launch_game.py) against the server keeping a tree per
+session, with many concurrent sessions
+
+Usage: python -m benchmarks.server
+"""
+
+import asyncio
+import multiprocessing
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from games import connect4
+from server import RecommendationServer, RecommendationClient
+
+TIME_BUDGET = 0.05   # seconds of search per recommendation
+COLD_SCRIPT = """
+import numpy as np
+from games import connect4
+from mcts import MonteCarloTreeSearch
+game = connect4.Game()
+for move in {moves}:
+    game.play(move)
+tree = MonteCarloTreeSearch(game=game)
+tree.search(max_iterations=np.inf, max_runtime={time_budget})
+print(tree.recommended_play())
+"""
+
+
+def cold_move_times(n_moves=10, seed=0):
+    """
+    Time to get a recommendation from a new Python process replaying the game, for the moves of games against random
+    moves
+
+    :param n_moves: number of recommended moves
+    :param seed: random seed of the game
+    :return: array of seconds per move
+    """
+    np.random.seed(seed)
+    game = connect4.Game()
+    times = []
+    for _ in range(n_moves):
+        script = COLD_SCRIPT.format(moves=[int(move) for move in game.record()], time_budget=TIME_BUDGET)
+        starting_time = time.perf_counter()
+        move = int(subprocess.run([sys.executable, '-c', script], capture_output=True, check=True).stdout)
+        times.append(time.perf_counter() - starting_time)
+        game.play(move)
+        if game.legal_plays():
+            game.play()
+        if not game.legal_plays():
+            game = connect4.Game()
+    return np.array(times)
+
+
+async def play_session(port, n_moves, seed):
+    """
+    Play a Connect4 game against random moves, asking the server for a recommendation before each move
+
+    :param port: server port
+    :param n_moves: max number of recommended moves
+    :param seed: random seed of the opponent
+    :return: list of the iterations of the searches
+    """
+    random_state = np.random.RandomState(seed)
+    client = RecommendationClient()
+    await client.connect(port=port)
+    _, result = await client.request('POST', '/sessions', {'game': 'connect4'})
+    session = '/sessions/{}'.format(result['session'])
+    game = connect4.Game()
+    iterations = []
+    for _ in range(n_moves):
+        _, result = await client.request('POST', session + '/recommend', {'time_budget': TIME_BUDGET})
+        iterations.append(result['iterations'])
+        for move in (result['move'], None):
+            if not game.legal_plays():
+                break
+            move = move if move is not None else game.legal_plays()[random_state.randint(len(game.legal_plays()))]
+            game.play(move)
+            await client.request('POST', session + '/moves', {'move': move})
+        if not game.legal_plays():
+            break
+    await client.request('DELETE', session)
+    await client.close()
+    return iterations
+
+
+async def server_latencies(n_sessions, n_moves=10):
+    """
+    Play concurrent sessions against a server
+
+    :param n_sessions: number of concurrent sessions
+    :param n_moves: max number of recommended moves per session
+    :return: (server stats, requests per second, mean iterations per recommendation)
+    """
+    server = RecommendationServer(n_workers=multiprocessing.cpu_count())
+    port = await server.start(port=0)
+    starting_time = time.perf_counter()
+    iterations = await asyncio.gather(*[play_session(port, n_moves, seed) for seed in range(n_sessions)])
+    elapsed = time.perf_counter() - starting_time
+    stats = server.stats()
+    await server.stop()
+    n_requests = sum(latency['requests'] for latency in stats['latency_ms'].values())
+    return stats, n_requests / elapsed, float(np.mean(np.concatenate(iterations)))
+
+
+def main():
+    """
+    Print the latency of recommendations without and with the server
+    """
+    times = cold_move_times() * 1000
+    print('new process per move | p50 {:>6.1f} ms | p99 {:>6.1f} ms'.format(np.percentile(times, 50),
+                                                                          np.percentile(times, 99)))
+    for n_sessions in (1, 10, 100, 300):
+        stats, requests_per_second, iterations = asyncio.run(server_latencies(n_sessions))
+        latencies = stats['latency_ms']
+        print('server, {:>3} sessions | recommend p50 {:>6.1f} ms p99 {:>6.1f} ms | moves p50 {:>5.1f} ms p99 {:>6.1f} '
+              'ms | {:>5.0f} requests/s | {:>5.0f} iterations/recommendation'.format(
+                  n_sessions, latencies['recommend']['p50'], latencies['recommend']['p99'],
+                  latencies['moves']['p50'], latencies['moves']['p99'], requests_per_second, iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Playouts needed to find the best move of endgame positions with and without MCTS-Solver
+
+Usage: python -m benchmarks.solver
+"""
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+from utils.tree import UNPROVEN
+
+
+def endgame_positions(game_class, n_positions, n_empty, seed=0):
+    """
+    Positions reached by random games when only a few cells are still empty (finished games are skipped)
+
+    :param game_class: class of the game
+    :param n_positions: number of positions
+    :param n_empty: number of empty cells of the positions
+    :param seed: random seed
+    :return: list of games
+    """
+    np.random.seed(seed)
+    positions = []
+    while len(positions) < n_positions:
+        game = game_class()
+        for _ in range(game.state.size - n_empty):
+            if not game.legal_plays():
+                break
+            game.play()
+        if game.legal_plays():
+            positions.append(game.copy())
+    return positions
+
+
+def negamax(game):
+    """
+    Exact value of a position for the player to move
+
+    :param game: game (played and undone in place)
+    :return: 1 for a win, 0 for a draw and -1 for a loss
+    """
+    plays = game.legal_plays()
+    if not plays:
+        return -1 if game.winner() is not None else 0   # only the player who just moved can have won
+    best = -1
+    for move in plays:
+        game.play(move)
+        best = max(best, -negamax(game))
+        game.undo()
+        if best == 1:
+            break
+    return best
+
+
+def best_moves(game):
+    """
+    Moves keeping the exact value of a position
+
+    :param game: game (played and undone in place)
+    :return: list of moves
+    """
+    values = {}
+    for move in game.legal_plays():
+        game.play(move)
+        values[move] = -negamax(game)
+        game.undo()
+    best = max(values.values())
+    return [move for move, value in values.items() if value == best]
+
+
+def playouts_to_best_move(game, solver, n_iterations, checkpoint, seed):
+    """
+    Search a position until the recommended move is one of its best moves for good
+
+    :param game: game at the root of the tree
+    :param solver: whether to back up proofs
+    :param n_iterations: max number of search iterations
+    :param checkpoint: number of iterations between two recommendations
+    :param seed: random seed
+    :return: (playouts after which the recommendation stays a best move (n_iterations if it never does), whether
+    the root was solved)
+    """
+    optimal = best_moves(game)
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game, solver=solver)
+    checks = []
+    while tree.root.n_plays < n_iterations:
+        tree.search(max_iterations=checkpoint, max_runtime=np.inf)
+        checks.append((int(tree.root.n_plays), tree.recommended_play() in optimal))
+        if tree.root.proven != UNPROVEN:
+            break
+    playouts = n_iterations
+    for n_plays, correct in reversed(checks):
+        if not correct:
+            break
+        playouts = n_plays
+    return playouts, tree.root.proven != UNPROVEN
+
+
+def main():
+    """
+    Print the playouts needed to find the best move of endgame positions with and without solver
+    """
+    for name, game_class, n_empty in [('tictactoe', tictactoe.Game, 6), ('connect4', connect4.Game, 10)]:
+        positions = endgame_positions(game_class, n_positions=20, n_empty=n_empty)
+        for solver in (False, True):
+            results = np.array([playouts_to_best_move(game, solver, n_iterations=3000, checkpoint=10, seed=seed)
+                                for seed, game in enumerate(positions)])
+            print('{:<10} solver: {:<3} | best move found for good after {:>6.0f} playouts | {:>3.0%} roots '
+                  'solved'.format(name, 'yes' if solver else 'no', *results.mean(axis=0)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Seeded benchmark suite: throughput, memory and strength of the search on TicTacToe and Connect4
+
+Usage:
+    python -m benchmarks.suite run [--output results.json] [--quick]
+    python -m benchmarks.suite compare baseline.json results.json [--tolerance 0.15]
+
+compare exits with status 1 if a metric got worse than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import rollouts, search_throughput, tactics, transpositions, tree_memory
+from games import connect4, tictactoe
+
+GAMES = (('tictactoe', tictactoe.Game), ('connect4', connect4.Game))
+SEED = 0
+
+
+def best_of(function, n_repeats=3):
+    """
+    Best value of a throughput measure over several runs, each run being seeded the same way
+
+    :param function: function without arguments returning a throughput
+    :param n_repeats: number of runs
+    :return: highest value
+    """
+    values = []
+    for _ in range(n_repeats):
+        np.random.seed(SEED)
+        values.append(function())
+    return max(values)
+
+
+def game_method_time(game_class, method, n_games):
+    """
+    Mean time of a Game method along random games
+
+    :param game_class: class of the game
+    :param method: 'play' (a random move followed by undo) or 'legal_plays'
+    :param n_games: number of random games
+    :return: microseconds per call
+    """
+    game = game_class(save_history=False)
+    n_calls, elapsed = 0, 0.
+    for _ in range(n_games):
+        n_moves = 0
+        while game.legal_plays():
+            starting_time = time.perf_counter()
+            if method == 'play':
+                game.play()
+                game.undo()
+            else:
+                game.legal_plays()
+            elapsed += time.perf_counter() - starting_time
+            n_calls += 1
+            game.play()
+            n_moves += 1
+        for _ in range(n_moves):
+            game.undo()
+    return elapsed / n_calls * 1e6
+
+
+def stable_recommendation(game_class, n_iterations, n_seeds):
+    """
+    Mean number of playouts after which the recommended move does not change anymore
+
+    :param game_class: class of the game
+    :param n_iterations: number of search iterations
+    :param n_seeds: number of seeded searches
+    :return: playouts
+    """
+    return float(np.mean([transpositions.run(game_class(), 0, n_iterations, checkpoint=50, seed=seed)[1]
+                          for seed in range(n_seeds)]))
+
+
+def run_suite(quick=False):
+    """
+    Run all benchmarks
+
+    :param quick: whether to use smaller budgets (noisier results)
+    :return: dict of metrics, each one being a dict with its value, unit and whether higher is better
+    """
+    scale = 0.25 if quick else 1.
+    metrics = {}
+
+    def add(name, value, unit, higher_is_better):
+        metrics[name] = {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+        print('{:<40} {:>12.2f} {}'.format(name, value, unit), file=sys.stderr)
+
+    for name, game_class in GAMES:
+        add(name + '.play_undo', best_of(lambda: game_method_time(game_class, 'play', int(200 * scale))), 'us', False)
+        add(name + '.legal_plays', best_of(lambda: game_method_time(game_class, 'legal_plays', int(200 * scale))),
+            'us', False)
+        game = game_class(save_history=False)
+        add(name + '.sequential_rollouts', best_of(lambda: rollouts.sequential_rollouts_per_second(
+            game, n_games=int(1000 * scale))), 'rollouts/s', True)
+        add(name + '.batched_rollouts', best_of(lambda: rollouts.batched_rollouts_per_second(game)),
+            'rollouts/s', True)
+        add(name + '.search_iterations', best_of(lambda: search_throughput.search_iterations_per_second(
+            game_class(), max_runtime=2. * scale, seed=SEED)), 'iterations/s', True)
+        n_nodes, total, arrays = tree_memory.bytes_per_node(game_class(), n_iterations=int(2000 * scale), seed=SEED)
+        add(name + '.bytes_per_node', total, 'bytes', False)
+        add(name + '.array_bytes_per_node', arrays, 'bytes', False)
+        add(name + '.stable_recommendation', stable_recommendation(game_class, int(2000 * scale), n_seeds=5),
+            'playouts', False)
+        add(name + '.tactics', np.mean(list(tactics.mean_playouts(name, n_iterations=int(3000 * scale),
+                                                                  n_seeds=5).values())), 'playouts', False)
+    return metrics
+
+
+def compare(baseline, results, tolerance):
+    """
+    Compare results with a baseline
+
+    :param baseline: metrics of the baseline (as returned by run_suite)
+    :param results: metrics to compare
+    :param tolerance: relative change above which a metric that got worse is a regression
+    :return: list of names of the regressed metrics
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print('{:<40} {:>12.2f} {:<12} (new)'.format(name, result['value'], result['unit']))
+            continue
+        reference = baseline[name]['value']
+        change = (result['value'] - reference) / reference if reference else 0.
+        worse = -change if result['higher_is_better'] else change
+        status = 'REGRESSION' if worse > tolerance else ''
+        if status:
+            regressions.append(name)
+        print('{:<40} {:>12.2f} -> {:>12.2f} {:<12} {:>+7.1%} {}'.format(
+            name, reference, result['value'], result['unit'], change, status))
+    return regressions
+
+
+def main():
+    """
+    Run the suite or compare two result files
+    """
+    parser = argparse.ArgumentParser(description='MCTS benchmark suite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and write their results')
+    run_parser.add_argument('--output', default='benchmark_results.json', help='JSON file of the results')
+    run_parser.add_argument('--quick', action='store_true', help='smaller budgets')
+    compare_parser = commands.add_parser('compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline', help='JSON file of the baseline results')
+    compare_parser.add_argument('results', help='JSON file of the results to check')
+    compare_parser.add_argument('--tolerance', type=float, default=0.15, help='relative change allowed')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = {'environment': {'python': platform.python_version(),
+                                   'numpy': np.__version__,
+                                   'machine': platform.machine(),
+                                   'date': time.strftime('%Y-%m-%d %H:%M:%S')},
+                   'metrics': run_suite(quick=args.quick)}
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+        print('Results written to {}'.format(args.output))
+    else:
+        with open(args.baseline) as baseline, open(args.results) as results:
+            regressions = compare(json.load(baseline)['metrics'], json.load(results)['metrics'], args.tolerance)
+        if regressions:
+            print('{} regression(s): {}'.format(len(regressions), ', '.join(regressions)))
+            sys.exit(1)
+        print('No regression')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Playouts needed to find the correct move of tactical puzzles with values backed up for the player who moved into each
+node (negamax) and with the former backup of the root player values at every level
+
+Usage: python -m benchmarks.tactics
+"""
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+
+# (name, moves played from the starting position, correct moves of the player to move)
+PUZZLES = {
+    'tictactoe': [('win in one', [(0, 0), (1, 0), (0, 1), (1, 1)], [(0, 2)]),
+                  ('block a line', [(0, 0), (1, 1), (0, 1)], [(0, 2)]),
+                  ('answer a corner with the center', [(0, 0)], [(1, 1)]),
+                  ('avoid the opposite corners fork', [(0, 0), (1, 1), (2, 2)], [(0, 1), (1, 0), (1, 2), (2, 1)])],
+    'connect4': [('win in one', [0, 0, 1, 1, 2, 2], [3]),
+                 ('block a row', [0, 6, 1, 6, 2], [3]),
+                 ('block a column', [3, 0, 3, 0, 3], [3])],
+}
+GAMES = {'tictactoe': tictactoe.Game, 'connect4': connect4.Game}
+
+
+class RootValueSearch(MonteCarloTreeSearch):
+    """
+    Search backing up the wins of the root player at every level (the behaviour before negamax backup), so that the
+    opponent of the root player chooses the moves that are best for the root player
+    """
+
+    def backpropagate(self, node, n_plays, n_wins, n_ties, path=None):
+        nodes = self.nodes
+        if path is None:
+            path = nodes.ancestors(node)[::-1] + [node]
+        for node_ in path:
+            nodes.n_plays[node_] += n_plays
+            nodes.n_wins[node_] += n_wins
+            nodes.n_ties[node_] += n_ties
+
+
+def puzzle_position(game_name, moves):
+    """
+    Position of a puzzle
+
+    :param game_name: 'tictactoe' or 'connect4'
+    :param moves: moves played from the starting position
+    :return: game
+    """
+    game = GAMES[game_name]()
+    for move in moves:
+        game.play(move)
+    return game
+
+
+def playouts_to_correct_move(game, correct_moves, n_iterations, checkpoint, seed, tree_class=MonteCarloTreeSearch,
+                             **options):
+    """
+    Search a position until the recommended move is one of its correct moves for good (solver disabled)
+
+    :param game: game at the root of the tree
+    :param correct_moves: list of the correct moves
+    :param n_iterations: max number of search iterations
+    :param checkpoint: number of iterations between two recommendations
+    :param seed: random seed
+    :param tree_class: MonteCarloTreeSearch or RootValueSearch
+    :param options: other arguments of the tree
+    :return: playouts after which the recommendation stays a correct move (n_iterations if it never does)
+    """
+    np.random.seed(seed)
+    tree = tree_class(game=game, solver=False, **options)
+    checks = []
+    while tree.root.n_plays < n_iterations:
+        tree.search(max_iterations=checkpoint, max_runtime=np.inf)
+        checks.append((int(tree.root.n_plays), tree.recommended_play() in correct_moves))
+    playouts = n_iterations
+    for n_plays, correct in reversed(checks):
+        if not correct:
+            break
+        playouts = n_plays
+    return playouts
+
+
+def mean_playouts(game_name, tree_class=MonteCarloTreeSearch, n_iterations=3000, checkpoint=10, n_seeds=10):
+    """
+    Mean playouts needed to find the correct move of the puzzles of a game
+
+    :param game_name: 'tictactoe' or 'connect4'
+    :param tree_class: MonteCarloTreeSearch or RootValueSearch
+    :param n_iterations: max number of search iterations per puzzle
+    :param checkpoint: number of iterations between two recommendations
+    :param n_seeds: number of seeded searches per puzzle
+    :return: dict of mean playouts by puzzle name
+    """
+    return {name: float(np.mean([playouts_to_correct_move(puzzle_position(game_name, moves), correct_moves,
+                                                          n_iterations, checkpoint, seed, tree_class)
+                                 for seed in range(n_seeds)]))
+            for name, moves, correct_moves in PUZZLES[game_name]}
+
+
+def main():
+    """
+    Print the playouts needed to find the correct move of each puzzle with both backups
+    """
+    for game_name in PUZZLES:
+        results = {backup: mean_playouts(game_name, tree_class)
+                   for backup, tree_class in [('root', RootValueSearch), ('negamax', MonteCarloTreeSearch)]}
+        for name, _, _ in PUZZLES[game_name]:
+            print('{:<10} {:<32} | correct move found for good after {:>6.0f} playouts (root values) and {:>6.0f} '
+                  'playouts (negamax)'.format(game_name, name, results['root'][name], results['negamax'][name]))
+
+
+if __name__ == '__main__':
+    main()
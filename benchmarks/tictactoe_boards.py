@@ -0,0 +1,68 @@
+"""
+Random TicTacToe games per second and search throughput on larger boards with k-in-a-row
+
+Usage: python -m benchmarks.tictactoe_boards
+"""
+
+import time
+
+import numpy as np
+
+from games import tictactoe
+from mcts import MonteCarloTreeSearch
+
+# (board_size, n_in_a_row)
+BOARDS = [(3, 3), (7, 7), (7, 4), (15, 15), (15, 5)]
+
+
+def random_games_per_second(board_size, n_in_a_row, n_games, seed=0):
+    """
+    Play random games with Game.play from the starting position
+
+    :param board_size: number of rows and columns of the board
+    :param n_in_a_row: number of aligned stones needed to win
+    :param n_games: number of games
+    :param seed: random seed
+    :return: games per second
+    """
+    np.random.seed(seed)
+    starting_time = time.perf_counter()
+    for _ in range(n_games):
+        game = tictactoe.Game(board_size=board_size, save_history=False, n_in_a_row=n_in_a_row)
+        while game.legal_plays():
+            game.play()
+    return n_games / (time.perf_counter() - starting_time)
+
+
+def search_iterations_per_second(board_size, n_in_a_row, n_iterations, seed=0):
+    """
+    Search the starting position with one sequential rollout per iteration
+
+    :param board_size: number of rows and columns of the board
+    :param n_in_a_row: number of aligned stones needed to win
+    :param n_iterations: number of search iterations
+    :param seed: random seed
+    :return: iterations per second
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=tictactoe.Game(board_size=board_size, n_in_a_row=n_in_a_row))
+    starting_time = time.perf_counter()
+    for _ in range(n_iterations):
+        node = tree.expand(parent=tree.select())
+        n_wins, n_ties = tree.simulate(node=node, n_simulations=1)
+        tree.backpropagate(node=node, n_plays=1, n_wins=n_wins, n_ties=n_ties)
+    return n_iterations / (time.perf_counter() - starting_time)
+
+
+def main():
+    """
+    Print random games and search iterations per second for each board
+    """
+    for board_size, n_in_a_row in BOARDS:
+        print('{:>2}x{:<2} {} in a row | {:>7.0f} random games/s | {:>6.0f} search iterations/s'.format(
+            board_size, board_size, n_in_a_row, random_games_per_second(board_size, n_in_a_row, n_games=200),
+            search_iterations_per_second(board_size, n_in_a_row, n_iterations=300)))
+
+
+if __name__ == '__main__':
+    main()
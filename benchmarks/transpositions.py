@@ -0,0 +1,58 @@
+"""
+Effect of the transposition table on the number of nodes and on the playouts needed to reach a stable recommendation
+
+Usage: python -m benchmarks.transpositions
+"""
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+
+
+def run(game, transposition_size, n_iterations, checkpoint, seed):
+    """
+    Grow a tree and follow its recommended move
+
+    :param game: game at the root of the tree
+    :param transposition_size: size of the transposition table (0 to disable it)
+    :param n_iterations: number of search iterations
+    :param checkpoint: number of iterations between two recommendations
+    :param seed: random seed
+    :return: (number of distinct nodes, iterations after which the recommendation does not change anymore)
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game, transposition_size=transposition_size)
+    recommendations = []
+    for iteration in range(1, n_iterations + 1):
+        path = tree.select_path()
+        node = tree.expand(parent=path[-1])
+        if node != path[-1]:
+            path.append(node)
+        n_wins, n_ties = tree.simulate(node=node, n_simulations=1)
+        tree.backpropagate(node=node, n_plays=1, n_wins=n_wins, n_ties=n_ties, path=path)
+        if iteration % checkpoint == 0:
+            recommendations.append(tree.recommended_play())
+    stable = len(recommendations)
+    while stable > 0 and recommendations[stable - 1] == recommendations[-1]:
+        stable -= 1
+    nodes = tree.nodes
+    children = np.arange(nodes.size)[(nodes.target[:nodes.size] == np.arange(nodes.size))]
+    n_nodes = int(np.sum(nodes.parent[children] != -1)) + 1
+    return n_nodes, (stable + 1) * checkpoint
+
+
+def main():
+    """
+    Print nodes and playouts to stable recommendation with and without transposition table
+    """
+    seeds = range(20)
+    for name, game, n_iterations in [('tictactoe', tictactoe.Game(), 3000), ('connect4', connect4.Game(), 3000)]:
+        for transposition_size in (0, 2 ** 16):
+            results = np.array([run(game, transposition_size, n_iterations, 50, seed) for seed in seeds])
+            print('{:<10} transpositions: {:<3} | {:>6.0f} nodes | stable recommendation after {:>5.0f} '
+                  'playouts'.format(name, 'yes' if transposition_size else 'no', *results.mean(axis=0)))
+
+
+if __name__ == '__main__':
+    main()
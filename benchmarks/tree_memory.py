@@ -0,0 +1,48 @@
+"""
+Memory used per node of the search tree
+
+Usage: python -m benchmarks.tree_memory
+"""
+
+import tracemalloc
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+
+
+def bytes_per_node(game, n_iterations, seed=0):
+    """
+    Grow a search tree and measure the memory it uses
+
+    :param game: game at the root of the tree
+    :param n_iterations: number of search iterations
+    :param seed: random seed
+    :return: (number of nodes, total bytes per node, bytes per node used by node statistics only)
+    """
+    np.random.seed(seed)
+    tracemalloc.start()
+    tree = MonteCarloTreeSearch(game=game)
+    for _ in range(n_iterations):
+        node = tree.expand(parent=tree.select())
+        n_wins, n_ties = tree.simulate(node=node, n_simulations=1)
+        tree.backpropagate(node=node, n_plays=1, n_wins=n_wins, n_ties=n_ties)
+    total_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_nodes = int(np.sum(tree.nodes.n_children[:tree.nodes.size])) + 1
+    return n_nodes, total_bytes / n_nodes, tree.nodes.nbytes() / n_nodes
+
+
+def main():
+    """
+    Print memory per node for TicTacToe and Connect4 trees
+    """
+    for name, game in [('tictactoe', tictactoe.Game()), ('connect4', connect4.Game())]:
+        n_nodes, total, arrays = bytes_per_node(game, n_iterations=2000)
+        print('{:<10} {:>6} nodes | {:>7.0f} bytes/node | {:>5.0f} bytes/node in node arrays'.format(
+            name, n_nodes, total, arrays))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Throughput and contention of tree parallel searches with an increasing number of worker processes
+
+Usage: python -m benchmarks.tree_parallel [max number of workers]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from games import connect4
+from tree_parallel import TreeParallelSearch
+
+
+def main():
+    """
+    Print the tree parallel search statistics from 1 to N workers
+    """
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    print('workers | playouts/s | lock contention | expansion collisions | nodes')
+    for n_workers in sorted({1, 2, 4, 8, 16, 32, max_workers}):
+        if n_workers > max_workers:
+            continue
+        np.random.seed(0)
+        tree = TreeParallelSearch(game=connect4.Game(), n_workers=n_workers, capacity=2 ** 22)
+        stats = tree.search(max_iterations=np.inf, max_runtime=3.)
+        tree.close()
+        print('{:>7} | {:>10.0f} | {:>14.3%} | {:>20} | {:>5}'.format(
+            n_workers, stats.playouts_per_second, stats.lock_contention, stats.expansion_collisions,
+            stats.peak_nodes))
+
+
+if __name__ == '__main__':
+    main()
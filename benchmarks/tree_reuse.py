@@ -0,0 +1,56 @@
+"""
+Playouts behind each decision of a self-played game, with a new tree per move or a tree kept with advance
+
+Usage: python -m benchmarks.tree_reuse [seconds per move] [tictactoe|connect4]
+"""
+
+import sys
+
+import numpy as np
+
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+
+
+def self_play(game_class, max_runtime, reuse_tree, seed=0):
+    """
+    Play a game where both players follow the recommendation of the search
+
+    :param game_class: class of the game to play
+    :param max_runtime: search time per move in seconds
+    :param reuse_tree: whether the tree is kept between moves (advance) or built again before each move
+    :param seed: random seed
+    :return: list of the number of playouts of the root at each decision
+    """
+    np.random.seed(seed)
+    game = game_class()
+    tree = MonteCarloTreeSearch(game=game.copy())
+    playouts = []
+    while game.legal_plays():
+        if not reuse_tree:
+            tree = MonteCarloTreeSearch(game=game.copy())
+        tree.search(max_iterations=np.inf, max_runtime=max_runtime)
+        playouts.append(int(tree.root.n_plays))
+        move = tree.recommended_play()
+        game.play(move)
+        tree.advance(move)
+    return playouts
+
+
+def main():
+    """
+    Print the mean number of playouts per decision with and without tree reuse
+    """
+    max_runtime = float(sys.argv[1]) if len(sys.argv) > 1 else 3.
+    game_class = tictactoe.Game if len(sys.argv) > 2 and sys.argv[2] == 'tictactoe' else connect4.Game
+    results = {}
+    for reuse_tree in (False, True):
+        playouts = self_play(game_class, max_runtime, reuse_tree)
+        results[reuse_tree] = np.mean(playouts)
+        print('{:<10} | {:>3} decisions | {:>8.0f} playouts per decision'.format(
+            'reuse' if reuse_tree else 'new tree', len(playouts), results[reuse_tree]))
+    print('x{:.2f}'.format(results[True] / results[False]))
+
+
+if __name__ == '__main__':
+    main()
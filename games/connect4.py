@@ -7,6 +7,9 @@ from itertools import cycle
 
 import numpy as np
 
+from utils.records import move_dtype
+from utils.zobrist import zobrist_keys
+
 
 class Player:
     """
@@ -28,6 +31,265 @@ class Game:
     """
     Connect4 game implementation to be used by Monte Carlo Tree Search
     https://en.wikipedia.org/wiki/Connect_Four
+
+    The board is stored as one bitboard per player plus the height of each column.
+    Column c uses bits c * (n_rows + 1) to c * (n_rows + 1) + n_rows - 1 (from bottom to top), the extra bit on
+    top of each column always stays empty so that shifting a bitboard never wraps a line onto the next column.
+    """
+    gravity = True   # stones fall to the bottom of their column (used by batched rollouts)
+    n_in_a_row = 4
+
+    def __init__(self, board_size=(6, 7), save_history=True):
+        # game attributes
+        self.board_size = board_size
+        self.n_rows, self.n_cols = board_size
+        self.stride = self.n_rows + 1
+        self.bitboards = [0, 0]
+        self.heights = [0] * self.n_cols
+        self.save_history = save_history
+        self.last_play = None
+        # columns played since the game was created or copied, boards are rebuilt from them on demand
+        self.moves = np.zeros(self.n_rows * self.n_cols, dtype=move_dtype(self.n_cols))
+        self.n_moves = 0
+        self.first_last_play = None   # last_play when the game was created or copied, to be able to undo every move
+        # players attributes
+        self.players = [Player(name='A', value=1, display='O'), Player(name='B', value=2, display='X')]
+        self.players_values = list([p.value for p in self.players])
+        self.player_index = 0
+        self.current_player = self.players[self.player_index]
+        self.winner_ = None
+        # Zobrist hash of the position, updated at each move
+        self.zobrist_keys, self.zobrist_side_key = zobrist_keys((self.n_cols, self.n_rows, len(self.players)))
+        self.hash = 0
+
+    def copy(self):
+        """
+        Cheap copy of the game: only the board and the player to move are copied, history starts from current board
+
+        :return: Game
+        """
+        game = self.__class__.__new__(self.__class__)
+        game.__dict__.update(self.__dict__)   # players are never modified so they can be shared
+        game.bitboards = list(self.bitboards)
+        game.heights = list(self.heights)
+        game.moves = np.zeros_like(self.moves)
+        game.n_moves = 0
+        game.first_last_play = self.last_play
+        return game
+
+    @property
+    def state(self):
+        """
+        Board as a NumPy array (same layout as NumpyGame.state)
+
+        :return: array of shape board_size filled with players values
+        """
+        return self.board(*self.bitboards)
+
+    @property
+    def history(self):
+        """
+        Sequence of boards since the game was created or copied (only the current one if save_history is False)
+        Boards are rebuilt from the current bitboards by removing the moves played
+
+        :return: list of arrays of shape board_size
+        """
+        bitboards, heights = list(self.bitboards), list(self.heights)
+        positions = [tuple(bitboards)]
+        if self.save_history:
+            for col in self.moves[:self.n_moves][::-1].tolist():
+                heights[col] -= 1
+                mask = ~(1 << (col * self.stride + heights[col]))
+                bitboards = [bitboard & mask for bitboard in bitboards]
+                positions.append(tuple(bitboards))
+        return [self.board(*position) for position in positions[::-1]]
+
+    def record(self):
+        """
+        Moves played since the game was created or copied, as indexes (see move_index)
+
+        :return: 1d integer array
+        """
+        return self.moves[:self.n_moves].copy()
+
+    def move_index(self, move):
+        """
+        Index of a move in all_plays
+
+        :param move: column
+        :return: int
+        """
+        return int(move)
+
+    def index_move(self, index):
+        """
+        Move of an index of all_plays
+
+        :param index: int
+        :return: column
+        """
+        return int(index)
+
+    def board(self, bitboard_a, bitboard_b):
+        """
+        Convert a pair of bitboards to a NumPy board
+
+        :param bitboard_a: bitboard of the first player
+        :param bitboard_b: bitboard of the second player
+        :return: array of shape board_size filled with players values
+        """
+        board = np.zeros(self.board_size, dtype=int)
+        for row in range(self.n_rows):
+            for col in range(self.n_cols):
+                bit = 1 << (col * self.stride + self.n_rows - 1 - row)
+                if bitboard_a & bit:
+                    board[row, col] = self.players[0].value
+                elif bitboard_b & bit:
+                    board[row, col] = self.players[1].value
+        return board
+
+    def all_plays(self):
+        """
+        All the moves of the game whether they are legal or not, always in the same order
+
+        :return: list of columns
+        """
+        return list(range(self.n_cols))
+
+    def rollout_position(self):
+        """
+        Position in the format used by utils.rollouts: 1 for the first player, -1 for the second one, 0 for empty cells
+
+        :return: (board as int8 array, value of the player to move, value of the winner or 0 if there is none)
+        """
+        state = self.state
+        board = (state == self.players[0].value).astype(np.int8) - (state == self.players[1].value).astype(np.int8)
+        winner_value = 0 if self.winner_ is None else (1 if self.winner_ == self.players[0] else -1)
+        return board, 1 - 2 * self.player_index, winner_value
+
+    def legal_plays(self):
+        """
+        Columns that are not full yet (no legal plays once the game has a winner)
+
+        :return: the list of columns that are legal to play for the current player
+        """
+        if self.winner_ is not None:
+            return []
+        return [col for col in range(self.n_cols) if self.heights[col] < self.n_rows]
+
+    def winner(self):
+        """
+        Return the winner player. If game is tied, return None
+
+        :return: Player or None
+        """
+        return self.winner_
+
+    def is_winning(self, bitboard):
+        """
+        Check whether a bitboard contains 4 aligned stones
+
+        :param bitboard: bitboard of one player
+        :return: boolean
+        """
+        # vertical, horizontal and both diagonals
+        for shift in (1, self.stride, self.stride - 1, self.stride + 1):
+            pairs = bitboard & (bitboard >> shift)
+            if pairs & (pairs >> 2 * shift):
+                return True
+        return False
+
+    def show_board(self, state_number=-1, return_string=False):
+        """
+        Display the game game
+
+        :param state_number: the state to show
+        :param return_string: whether to return a string or to print it
+        :return: game representation as a string or nothing
+        """
+        # creates the string representation of the game
+        lines = []
+        no_player_display = '.'
+        for line in (self.state if state_number == -1 else self.history[state_number]):
+            elements = []
+            for element in line:
+                if element in self.players_values:
+                    for player in self.players:
+                        if element == player.value:
+                            elements.append(player.display)
+                else:
+                    elements.append(no_player_display)
+            lines.append('|'.join(elements))
+        board_representation = '\n'.join(lines)
+
+        if return_string:
+            return board_representation
+        else:
+            print(board_representation)
+
+    def play(self, move=None):
+        """
+        Play a move
+
+        :param move: selected move to play (int corresponding to the column index)
+        :return: nothing
+        """
+        if move is not None:
+            # if input move is provided check that it is legal
+            if self.winner_ is not None or not 0 <= move < self.n_cols or self.heights[move] == self.n_rows:
+                raise ValueError('Selected move is illegal')
+            selected_move = move
+        else:
+            # select a move randomly
+            legal_plays = self.legal_plays()
+            selected_move = legal_plays[np.random.randint(len(legal_plays))]
+        logging.debug('Selected move: %s', move)
+
+        # updates states
+        bitboard = self.bitboards[self.player_index] | 1 << (selected_move * self.stride + self.heights[selected_move])
+        self.bitboards[self.player_index] = bitboard
+        self.hash ^= self.zobrist_keys[selected_move][self.heights[selected_move]][self.player_index]
+        self.hash ^= self.zobrist_side_key
+        self.heights[selected_move] += 1
+        self.last_play = selected_move
+        self.moves[self.n_moves] = selected_move
+        self.n_moves += 1
+
+        # only the player who just played can have won
+        if self.is_winning(bitboard):
+            self.winner_ = self.current_player
+            return
+
+        # updates player info
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+
+    def undo(self):
+        """
+        Undo the last move played (since the game was created or copied)
+
+        :return: nothing
+        """
+        if not self.n_moves:
+            raise ValueError('No move to undo')
+        if self.winner_ is not None:
+            # the player does not change after a winning move
+            self.winner_ = None
+        else:
+            self.player_index = 1 - self.player_index
+            self.current_player = self.players[self.player_index]
+        self.heights[self.last_play] -= 1
+        self.bitboards[self.player_index] ^= 1 << (self.last_play * self.stride + self.heights[self.last_play])
+        self.hash ^= self.zobrist_keys[self.last_play][self.heights[self.last_play]][self.player_index]
+        self.hash ^= self.zobrist_side_key
+        self.n_moves -= 1
+        self.last_play = self.moves.item(self.n_moves - 1) if self.n_moves else self.first_last_play
+
+
+class NumpyGame:
+    """
+    Reference Connect4 implementation working directly on a NumPy board
+    Kept to check the bitboard implementation against it
     """
 
     def __init__(self, board_size=(6, 7), save_history=True):
@@ -128,7 +390,7 @@ class Game:
         i, j = row_number, selected_move
         pattern = ''.join([str(self.current_player.value)] * 4)
         spaces_to_check = [x[max(i-3, 0):i+4, j], x[i, max(j-3, 0):j+4],
-                           np.diagonal(x, offset=j - i), np.diagonal(x[:, ::-1], offset=len(x)-(i+j))]
+                           np.diagonal(x, offset=j - i), np.diagonal(x[:, ::-1], offset=x.shape[1]-1-(i+j))]
 
         # an ugly way to check if a list is a sublist
         for space in spaces_to_check:
@@ -0,0 +1,296 @@
+"""
+Gomoku (m,n,k-game) implementation
+"""
+
+import logging
+from bisect import insort
+
+import numpy as np
+
+from games.tictactoe import cell_lines
+from utils.records import move_dtype
+from utils.zobrist import zobrist_keys
+
+
+class Player:
+    """
+    Gomoku player
+    """
+    def __init__(self, name, value, display):
+        self.name = name
+        self.value = value
+        self.display = display
+
+    def __eq__(self, other):
+        """ Two players are equal if they have the same value"""
+        if isinstance(self, other.__class__):
+            return self.value == other.value
+        return False
+
+
+class Game:
+    """
+    Gomoku game implementation to be used by Monte Carlo Tree Search: n_in_a_row aligned stones on a board of
+    board_size (rows, columns) win, the classic game being 5 in a row on a 15x15 board
+    https://en.wikipedia.org/wiki/M,n,k-game
+
+    Stones can be played on any empty cell but legal_plays, used by the search to expand nodes and by random moves,
+    only returns the candidate cells: the empty cells at most radius rows and columns away from a stone (the center
+    of the board when it is empty). The line sums, the number of stones around each cell, the sorted candidates and
+    the winner are updated at each move so that nothing scans the board.
+    """
+    gravity = False   # stones can be placed on any empty cell
+
+    def __init__(self, board_size=(15, 15), n_in_a_row=5, radius=1, save_history=True):
+        # game attributes
+        self.board_size = board_size
+        self.n_rows, self.n_cols = board_size
+        self.n_in_a_row = n_in_a_row
+        if not 1 <= n_in_a_row <= max(board_size):
+            raise ValueError('n_in_a_row must be between 1 and the board size')
+        if radius < 1:
+            raise ValueError('radius must be at least 1 so that a game only ends when the board is full')
+        self.radius = radius
+        self.state = np.zeros(board_size, dtype=int)
+        self.save_history = save_history
+        self.last_play = None
+        # moves played since the game was created or copied (cell indexes), boards are rebuilt from them on demand
+        self.moves = np.zeros(self.n_rows * self.n_cols, dtype=move_dtype(self.n_rows * self.n_cols))
+        self.n_moves = 0
+        self.first_last_play = None   # last_play when the game was created or copied, to be able to undo every move
+        # sum of the players values of each line of n_in_a_row cells and lines of each cell
+        n_lines, self.cell_lines = cell_lines(self.n_rows, self.n_cols, n_in_a_row)
+        self.line_sums = [0] * n_lines
+        # number of stones around each cell, cells around each cell and sorted candidate moves
+        self.neighbours = self.cells_around(self.n_rows, self.n_cols, radius)
+        self.n_stones_around = [0] * (self.n_rows * self.n_cols)
+        self.candidates = []
+        self.center = (self.n_rows // 2, self.n_cols // 2)
+        self.winner_ = None
+        # players attributes
+        self.players = [Player(name='A', value=1, display='O'), Player(name='B', value=-1, display='X')]
+        self.players_values = list([p.value for p in self.players])
+        self.player_index = 0
+        self.current_player = self.players[self.player_index]
+        # Zobrist hash of the position, updated at each move
+        self.zobrist_keys, self.zobrist_side_key = zobrist_keys((self.n_rows, self.n_cols, len(self.players)))
+        self.hash = 0
+
+    @staticmethod
+    def cells_around(n_rows, n_cols, radius):
+        """
+        Cells at most radius rows and columns away from each cell (the cell itself excluded)
+
+        :param n_rows: number of rows of the board
+        :param n_cols: number of columns of the board
+        :param radius: size of the neighbourhood
+        :return: list of (cell index, (row, col)) lists, cells being ordered row by row
+        """
+        return [[(neighbour_row * n_cols + neighbour_col, (neighbour_row, neighbour_col))
+                 for neighbour_row in range(max(row - radius, 0), min(row + radius + 1, n_rows))
+                 for neighbour_col in range(max(col - radius, 0), min(col + radius + 1, n_cols))
+                 if (neighbour_row, neighbour_col) != (row, col)]
+                for row in range(n_rows) for col in range(n_cols)]
+
+    def copy(self):
+        """
+        Cheap copy of the game: only the board and the player to move are copied, history starts from current board
+
+        :return: Game
+        """
+        game = self.__class__.__new__(self.__class__)
+        game.__dict__.update(self.__dict__)   # players and neighbourhoods are never modified so they can be shared
+        game.state = self.state.copy()
+        game.line_sums = list(self.line_sums)
+        game.n_stones_around = list(self.n_stones_around)
+        game.candidates = list(self.candidates)
+        game.moves = np.zeros_like(self.moves)
+        game.n_moves = 0
+        game.first_last_play = self.last_play
+        return game
+
+    @property
+    def history(self):
+        """
+        Sequence of boards since the game was created or copied (only the current one if save_history is False)
+        Boards are rebuilt from the current one by removing the moves played
+
+        :return: list of arrays of shape board_size
+        """
+        board = self.state.copy()
+        boards = [board.copy()]
+        if self.save_history:
+            for index in self.moves[:self.n_moves][::-1]:
+                board.flat[index] = 0
+                boards.append(board.copy())
+        return boards[::-1]
+
+    def record(self):
+        """
+        Moves played since the game was created or copied, as indexes (see move_index)
+
+        :return: 1d integer array
+        """
+        return self.moves[:self.n_moves].copy()
+
+    def move_index(self, move):
+        """
+        Index of a move in all_plays
+
+        :param move: (row, col) tuple
+        :return: int
+        """
+        return int(move[0]) * self.n_cols + int(move[1])
+
+    def index_move(self, index):
+        """
+        Move of an index of all_plays
+
+        :param index: int
+        :return: (row, col) tuple
+        """
+        return divmod(int(index), self.n_cols)
+
+    def legal_plays(self):
+        """
+        Candidate moves: empty cells close to a stone, row by row (no legal plays once the game has a winner)
+
+        :return: the list of moves tuples the search considers for the current player
+        """
+        if self.winner_ is not None:
+            return []
+        if not self.candidates and not self.state[self.center]:
+            return [self.center]   # empty board
+        return list(self.candidates)
+
+    def all_plays(self):
+        """
+        All the moves of the game whether they are legal or not, always in the same order
+
+        :return: list of moves tuples
+        """
+        return [(row, col) for row in range(self.n_rows) for col in range(self.n_cols)]
+
+    def winner(self):
+        """
+        Return the winner player. If game is tied, return None
+
+        :return: Player or None
+        """
+        return self.winner_
+
+    def show_board(self, state_number=-1, return_string=False):
+        """
+        Display the game board
+
+        :param state_number: the state to show
+        :param return_string: whether to return a string or to print it
+        :return: board representation as a string or nothing
+        """
+        # creates the string representation of the game
+        displays = {player.value: player.display for player in self.players}
+        lines = []
+        for line in (self.state if state_number == -1 else self.history[state_number]):
+            lines.append('|'.join(displays.get(element, '.') for element in line))
+        board_representation = '\n'.join(lines)
+
+        if return_string:
+            return board_representation
+        else:
+            print(board_representation)
+
+    def play(self, move=None):
+        """
+        Play a move
+
+        :param move: selected move to play, any empty cell. If None it is chosen randomly among candidate moves
+        :return: nothing
+        """
+        if move is not None:
+            # if input move is provided check that it is legal
+            if self.winner_ is not None or not (0 <= move[0] < self.n_rows and 0 <= move[1] < self.n_cols) \
+                    or self.state[move[0], move[1]]:
+                raise ValueError('Selected move is illegal')
+            selected_move = (int(move[0]), int(move[1]))
+        else:
+            # select a move randomly
+            legal_plays = self.legal_plays()
+            if not legal_plays:
+                raise ValueError('No legal move to play')
+            selected_move = legal_plays[np.random.randint(len(legal_plays))]
+        logging.debug('Selected move: %s', move)
+
+        # updates states, lines and candidates
+        value = self.current_player.value
+        self.state[selected_move] = value
+        cell = self.move_index(selected_move)
+        self.moves[self.n_moves] = cell
+        self.n_moves += 1
+        line_sums, win_sum = self.line_sums, self.n_in_a_row * value
+        for line in self.cell_lines[cell]:
+            line_sums[line] += value
+            if line_sums[line] == win_sum:   # only the player who just played can have won
+                self.winner_ = self.current_player
+        if self.n_stones_around[cell]:
+            self.candidates.remove(selected_move)
+        n_stones_around, state = self.n_stones_around, self.state
+        for neighbour, neighbour_move in self.neighbours[cell]:
+            n_stones_around[neighbour] += 1
+            if n_stones_around[neighbour] == 1 and not state[neighbour_move]:
+                insort(self.candidates, neighbour_move)
+
+        # updates players info
+        self.hash ^= self.zobrist_keys[selected_move[0]][selected_move[1]][self.player_index] ^ self.zobrist_side_key
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+        self.last_play = selected_move
+
+    def undo(self):
+        """
+        Undo the last move played (since the game was created or copied)
+
+        :return: nothing
+        """
+        if not self.n_moves:
+            raise ValueError('No move to undo')
+        self.state[self.last_play] = 0
+        self.n_moves -= 1
+        cell = self.move_index(self.last_play)
+        n_stones_around, state = self.n_stones_around, self.state
+        for neighbour, neighbour_move in self.neighbours[cell]:
+            n_stones_around[neighbour] -= 1
+            if not n_stones_around[neighbour] and not state[neighbour_move]:
+                self.candidates.remove(neighbour_move)
+        if n_stones_around[cell]:
+            insort(self.candidates, self.last_play)
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+        value = self.current_player.value
+        for line in self.cell_lines[cell]:
+            self.line_sums[line] -= value
+        self.winner_ = None   # the game stops at the first win so there was no winner before the last move
+        self.hash ^= self.zobrist_keys[self.last_play[0]][self.last_play[1]][self.player_index] ^ self.zobrist_side_key
+        self.last_play = self.index_move(self.moves.item(self.n_moves - 1)) if self.n_moves else self.first_last_play
+
+
+def main():
+    """
+    Run a Gomoku game
+    """
+    # plays a game and displays the game at each move
+    logging.basicConfig(level=logging.DEBUG)
+    game = Game(board_size=(15, 15), n_in_a_row=5, save_history=True)
+    game.show_board()
+    n_round = 0
+    while game.legal_plays():
+        game.play()
+        print('-' * 30)
+        n_round += 1
+        print("ROUND NUMBER {}".format(n_round))
+        if game.winner() is not None:
+            print("WINNER {}".format(game.winner().display))
+        game.show_board()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Oware (abapa rules) game implementation
+"""
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from utils.records import move_dtype
+from utils.zobrist import zobrist_keys
+
+N_PITS = 12   # pits 0 to 5 belong to the first player, pits 6 to 11 to the second one
+N_SEEDS = 48
+
+
+@lru_cache(maxsize=None)
+def sowing_tables():
+    """
+    Effect of sowing the seeds of each pit for every number of seeds: seeds are sown one by one in the next pits
+    counterclockwise, the emptied pit being skipped when there are 12 seeds or more
+
+    :return: (int8 array of shape (N_PITS, N_SEEDS + 1, N_PITS + 2) of the change of every pit (the two last columns,
+    the scores, are never changed), list of the last pit sown by pit and number of seeds, list of the pits where at
+    least one seed is sown on the other side by pit and number of seeds)
+    """
+    changes = np.zeros((N_PITS, N_SEEDS + 1, N_PITS + 2), dtype=np.int8)
+    last_pits = [[pit] * (N_SEEDS + 1) for pit in range(N_PITS)]
+    feeds = [[False] * (N_SEEDS + 1) for _ in range(N_PITS)]
+    for pit in range(N_PITS):
+        for n_seeds in range(1, N_SEEDS + 1):
+            changes[pit, n_seeds, pit] = -n_seeds
+            current = pit
+            for _ in range(n_seeds):
+                current = (current + 1) % N_PITS
+                if current == pit:
+                    current = (current + 1) % N_PITS
+                changes[pit, n_seeds, current] += 1
+            last_pits[pit][n_seeds] = current
+            other_side = range(6, 12) if pit < 6 else range(6)
+            feeds[pit][n_seeds] = bool(changes[pit, n_seeds, other_side].any())
+    return changes, last_pits, feeds
+
+
+class Player:
+    """
+    Oware player
+    """
+    def __init__(self, name, value, display):
+        self.name = name
+        self.value = value
+        self.display = display
+
+    def __eq__(self, other):
+        """ Two players are equal if they have the same value"""
+        if isinstance(self, other.__class__):
+            return self.value == other.value
+        return False
+
+
+class Game:
+    """
+    Oware game implementation to be used by Monte Carlo Tree Search
+    https://en.wikipedia.org/wiki/Oware
+
+    A move is the index of a non empty pit of the player to move. If the last seed sown makes an opponent pit hold 2 or
+    3 seeds, this pit and the previous consecutive opponent pits holding 2 or 3 seeds are captured, unless this would
+    take all the opponent seeds (grand slam: nothing is captured). A player must give seeds to an opponent who has none
+    when possible; otherwise the game ends and the player captures the seeds of their side. A player capturing more than
+    half of the seeds wins, and the game is a draw after max_moves plies.
+
+    The pits and both scores are stored in a preallocated int8 array with one row per ply since the game was created or
+    copied: a move adds a precomputed sowing row to the current one and undoing it only goes back one row.
+    """
+
+    def __init__(self, max_moves=200, save_history=True):
+        # game attributes
+        self.max_moves = max_moves
+        self.save_history = save_history
+        self.changes, self.last_pits, self.feeds = sowing_tables()
+        # rows of 12 pits and 2 scores since the game was created or copied, the current one being boards[n_moves]
+        self.boards = np.zeros((max_moves + 1, N_PITS + 2), dtype=np.int8)
+        self.boards[0, :N_PITS] = N_SEEDS // N_PITS
+        self.last_play = None
+        self.moves = np.zeros(max_moves, dtype=move_dtype(N_PITS))
+        self.n_moves = 0
+        self.n_plies = 0   # plies since the beginning of the game, for the max_moves rule
+        self.first_last_play = None   # last_play when the game was created or copied, to be able to undo every move
+        self.over = False   # whether the scores decided the game (it is a draw when it stops at max_moves)
+        self.winner_ = None
+        # players attributes
+        self.players = [Player(name='A', value=1, display='A'), Player(name='B', value=2, display='B')]
+        self.players_values = list([p.value for p in self.players])
+        self.player_index = 0
+        self.current_player = self.players[self.player_index]
+        self.zobrist_keys, self.zobrist_side_key = zobrist_keys((N_PITS + 1, N_SEEDS + 1))
+        self.legal = self.moving_plays(self.boards[0].tolist())
+
+    def copy(self):
+        """
+        Cheap copy of the game: only the current board and the player to move are copied, history starts from current
+        board
+
+        :return: Game
+        """
+        game = self.__class__.__new__(self.__class__)
+        game.__dict__.update(self.__dict__)   # players and sowing tables are never modified so they can be shared
+        game.boards = np.empty_like(self.boards)
+        game.boards[0] = self.boards[self.n_moves]
+        game.moves = np.zeros_like(self.moves)
+        game.n_moves = 0
+        game.first_last_play = self.last_play
+        game.legal = list(self.legal)
+        return game
+
+    @property
+    def state(self):
+        """
+        Seeds in each pit
+
+        :return: int8 array of 12 pits
+        """
+        return self.boards[self.n_moves, :N_PITS]
+
+    @property
+    def scores(self):
+        """
+        Seeds captured by each player
+
+        :return: list of 2 ints
+        """
+        return self.boards[self.n_moves, N_PITS:].tolist()
+
+    @property
+    def history(self):
+        """
+        Sequence of pits since the game was created or copied (only the current ones if save_history is False)
+
+        :return: list of int8 arrays of 12 pits
+        """
+        first = 0 if self.save_history else self.n_moves
+        return list(self.boards[first:self.n_moves + 1, :N_PITS].copy())
+
+    @property
+    def hash(self):
+        """
+        Zobrist hash of the pits, the score of the first player and the player to move (the number of plies is ignored)
+
+        :return: int
+        """
+        keys = self.zobrist_keys
+        board = self.boards[self.n_moves].tolist()
+        value = self.zobrist_side_key if self.player_index else 0
+        for pit in range(N_PITS + 1):
+            value ^= keys[pit][board[pit]]
+        return value
+
+    def record(self):
+        """
+        Moves played since the game was created or copied, as indexes (see move_index)
+
+        :return: 1d integer array
+        """
+        return self.moves[:self.n_moves].copy()
+
+    def move_index(self, move):
+        """
+        Index of a move in all_plays
+
+        :param move: pit
+        :return: int
+        """
+        return int(move)
+
+    def index_move(self, index):
+        """
+        Move of an index of all_plays
+
+        :param index: int
+        :return: pit
+        """
+        return int(index)
+
+    def all_plays(self):
+        """
+        All the moves of the game whether they are legal or not, always in the same order
+
+        :return: list of pits
+        """
+        return list(range(N_PITS))
+
+    def moving_plays(self, board):
+        """
+        Pits the player to move can play: their non empty pits, only the ones feeding an opponent without seeds
+
+        :param board: current row of the boards as a list
+        :return: list of pits
+        """
+        own = range(6) if self.player_index == 0 else range(6, 12)
+        plays = [pit for pit in own if board[pit]]
+        opponent_seeds = sum(board[6:12]) if self.player_index == 0 else sum(board[:6])
+        if not opponent_seeds:
+            feeds = self.feeds
+            plays = [pit for pit in plays if feeds[pit][board[pit]]]
+        return plays
+
+    def legal_plays(self):
+        """
+        Pits the player to move can play (no legal plays once the game is over)
+
+        :return: the list of pits that are legal to play for the current player
+        """
+        return list(self.legal)
+
+    def winner(self):
+        """
+        Return the winner player. If game is tied, return None
+
+        :return: Player or None
+        """
+        return self.winner_
+
+    def show_board(self, state_number=-1, return_string=False):
+        """
+        Display the game board: pits of the second player from right to left on top of the pits of the first player
+
+        :param state_number: the state to show
+        :param return_string: whether to return a string or to print it
+        :return: board representation as a string or nothing
+        """
+        if state_number == -1:
+            board = self.boards[self.n_moves].tolist()
+        else:
+            first = 0 if self.save_history else self.n_moves
+            board = self.boards[first:self.n_moves + 1][state_number].tolist()
+        lines = ['|'.join('{:>2}'.format(seeds) for seeds in board[11:5:-1]) + ' {}: {}'.format(
+                     self.players[1].display, board[N_PITS + 1]),
+                 '|'.join('{:>2}'.format(seeds) for seeds in board[:6]) + ' {}: {}'.format(
+                     self.players[0].display, board[N_PITS])]
+        board_representation = '\n'.join(lines)
+
+        if return_string:
+            return board_representation
+        else:
+            print(board_representation)
+
+    def play(self, move=None):
+        """
+        Play a move
+
+        :param move: selected move to play (int corresponding to the pit index)
+        :return: nothing
+        """
+        if move is not None:
+            # if input move is provided check that it is legal
+            if move not in self.legal:
+                raise ValueError('Selected move is illegal')
+            selected_move = int(move)
+        else:
+            # select a move randomly
+            selected_move = self.legal[np.random.randint(len(self.legal))]
+        logging.debug('Selected move: %s', move)
+
+        # sows the seeds
+        current, following = self.boards[self.n_moves], self.boards[self.n_moves + 1]
+        n_seeds = current.item(selected_move)
+        np.add(current, self.changes[selected_move, n_seeds], out=following)
+        board = following.tolist()
+
+        # captures the opponent pits holding 2 or 3 seeds from the last one sown backwards (unless it takes them all)
+        last_pit = self.last_pits[selected_move][n_seeds]
+        first_pit = 6 if self.player_index == 0 else 0
+        if first_pit <= last_pit < first_pit + 6 and 2 <= board[last_pit] <= 3:
+            pit = last_pit
+            while pit >= first_pit and 2 <= board[pit] <= 3:
+                pit -= 1
+            captured = sum(board[pit + 1:last_pit + 1])
+            if captured < sum(board[first_pit:first_pit + 6]):
+                following[pit + 1:last_pit + 1] = 0
+                following[N_PITS + self.player_index] += captured
+                board = following.tolist()
+
+        # updates players info
+        self.moves[self.n_moves] = selected_move
+        self.n_moves += 1
+        self.n_plies += 1
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+        self.last_play = selected_move
+
+        # checks whether the game is over
+        self.legal = self.moving_plays(board)
+        if max(board[N_PITS:]) > N_SEEDS // 2:
+            self.over = True
+        elif not self.legal:
+            # the opponent cannot be fed: the player to move captures the seeds of their side
+            own = slice(0, 6) if self.player_index == 0 else slice(6, 12)
+            following[N_PITS + self.player_index] += sum(board[own])
+            following[own] = 0
+            self.over = True
+        elif self.n_plies >= self.max_moves:
+            self.legal = []   # draw
+        if self.over:
+            self.legal = []
+            score_a, score_b = following[N_PITS:].tolist()
+            self.winner_ = None if score_a == score_b else self.players[0 if score_a > score_b else 1]
+
+    def undo(self):
+        """
+        Undo the last move played (since the game was created or copied)
+
+        :return: nothing
+        """
+        if not self.n_moves:
+            raise ValueError('No move to undo')
+        self.n_moves -= 1
+        self.n_plies -= 1
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+        self.over = False   # the game stops once it is over so it was not before the last move
+        self.winner_ = None
+        self.legal = self.moving_plays(self.boards[self.n_moves].tolist())
+        self.last_play = self.moves.item(self.n_moves - 1) if self.n_moves else self.first_last_play
+
+
+def main():
+    """
+    Run an Oware game
+    """
+    # plays a game and displays the game at each move
+    logging.basicConfig(level=logging.DEBUG)
+    game = Game(save_history=True)
+    game.show_board()
+    n_round = 0
+    while game.legal_plays():
+        game.play()
+        print('-' * 17)
+        n_round += 1
+        print("ROUND NUMBER {}".format(n_round))
+        if game.winner() is not None:
+            print("WINNER {}".format(game.winner().display))
+        game.show_board()
+
+
+if __name__ == "__main__":
+    main()
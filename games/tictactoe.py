@@ -3,10 +3,14 @@ Tic Tac Toe game implementation
 """
 
 import logging
-from itertools import cycle
+from functools import lru_cache
 
 import numpy as np
 
+from utils.records import move_dtype
+from utils.rollouts import line_windows
+from utils.zobrist import zobrist_keys
+
 
 class Player:
     """
@@ -24,39 +28,149 @@ class Player:
         return False
 
 
+@lru_cache(maxsize=None)
+def cell_lines(n_rows, n_cols, n_in_a_row):
+    """
+    Lines of n_in_a_row cells each cell of a board belongs to
+
+    :param n_rows: number of rows of the board
+    :param n_cols: number of columns of the board
+    :param n_in_a_row: number of aligned stones needed to win
+    :return: (number of lines, list of the lines ids of each cell, cells being ordered row by row)
+    """
+    windows, cell_windows = line_windows(n_rows, n_cols, n_in_a_row)
+    padding_window = len(windows) - 1
+    return padding_window, [[window for window in ids if window != padding_window] for ids in cell_windows.tolist()]
+
+
 class Game:
     """
     TicTacToe game implementation to be used by Monte Carlo Tree Search
     https://en.wikipedia.org/wiki/Tic-tac-toe
+
+    Works on any board_size x board_size board with n_in_a_row aligned stones to win (board_size by default).
+    The sum of the players values of every line of n_in_a_row cells, the free cells and the winner are updated at
+    each move so that playing, listing legal plays and checking for a winner do not scan the board. A played cell is
+    removed from the free cells by moving the last free cell to its position, and put back there when it is undone.
     """
+    gravity = False   # stones can be placed on any empty cell (used by batched rollouts)
 
-    def __init__(self, board_size=3, save_history=True):
+    def __init__(self, board_size=3, save_history=True, n_in_a_row=None):
         # game attributes
         self.board_size = board_size
+        self.n_in_a_row = board_size if n_in_a_row is None else n_in_a_row
+        if not 1 <= self.n_in_a_row <= board_size:
+            raise ValueError('n_in_a_row must be between 1 and board_size')
         self.state = np.zeros((board_size, board_size), dtype=int)
         self.save_history = save_history
-        self.history = [self.state.copy()]  # copy() needed to avoid appending a reference
         self.last_play = None
-        self.sums = np.array([])
+        # moves played since the game was created or copied (cell indexes), boards are rebuilt from them on demand
+        self.moves = np.zeros(board_size * board_size, dtype=move_dtype(board_size * board_size))
+        self.n_moves = 0
+        self.first_last_play = None   # last_play when the game was created or copied, to be able to undo every move
+        # sum of the players values of each line of n_in_a_row cells and lines of each cell
+        n_lines, self.cell_lines = cell_lines(board_size, board_size, self.n_in_a_row)
+        self.line_sums = [0] * n_lines
+        self.free = self.all_plays()   # free cells, in the order left by the moves played
+        self.free_positions = list(range(board_size * board_size))   # position of each cell in free, -1 if played
+        self.removed_positions = []   # position in free of each move played since the game was created or copied
+        self.winner_ = None
         # players attributes
         self.players = [Player(name='A', value=1, display='O'), Player(name='B', value=-1, display='X')]
         self.players_values = list([p.value for p in self.players])
-        self.players_gen = cycle(self.players)
-        self.current_player = next(self.players_gen)
+        self.player_index = 0
+        self.current_player = self.players[self.player_index]
+        # Zobrist hash of the position, updated at each move
+        self.zobrist_keys, self.zobrist_side_key = zobrist_keys((board_size, board_size, len(self.players)))
+        self.hash = 0
+
+    def copy(self):
+        """
+        Cheap copy of the game: only the board and the player to move are copied, history starts from current board
+
+        :return: Game
+        """
+        game = self.__class__.__new__(self.__class__)
+        game.__dict__.update(self.__dict__)   # players and lines are never modified in place so they can be shared
+        game.state = self.state.copy()
+        game.line_sums = list(self.line_sums)
+        game.free = list(self.free)
+        game.free_positions = list(self.free_positions)
+        game.removed_positions = []
+        game.moves = np.zeros_like(self.moves)
+        game.n_moves = 0
+        game.first_last_play = self.last_play
+        return game
+
+    @property
+    def history(self):
+        """
+        Sequence of boards since the game was created or copied (only the current one if save_history is False)
+        Boards are rebuilt from the current one by removing the moves played
+
+        :return: list of arrays of shape (board_size, board_size)
+        """
+        board = self.state.copy()
+        boards = [board.copy()]
+        if self.save_history:
+            for index in self.moves[:self.n_moves][::-1]:
+                board.flat[index] = 0
+                boards.append(board.copy())
+        return boards[::-1]
+
+    def record(self):
+        """
+        Moves played since the game was created or copied, as indexes (see move_index)
+
+        :return: 1d integer array
+        """
+        return self.moves[:self.n_moves].copy()
+
+    def move_index(self, move):
+        """
+        Index of a move in all_plays
+
+        :param move: (row, col) tuple
+        :return: int
+        """
+        return int(move[0]) * self.board_size + int(move[1])
+
+    def index_move(self, index):
+        """
+        Move of an index of all_plays
+
+        :param index: int
+        :return: (row, col) tuple
+        """
+        return divmod(int(index), self.board_size)
 
     def legal_plays(self):
         """
-        Takes a sequence of game states representing the full game history
+        Free cells, row by row until moves are played (no legal plays once the game has a winner)
 
         :return: the list of moves tuples that are legal to play for the current player
         """
-        legal_plays = []
-        if self.winner() is None:
-            free_spaces = np.isin(self.state, self.players_values, invert=True)
-            legal_plays = np.argwhere(free_spaces)
-            legal_plays = list(map(tuple, legal_plays))   # convert numpy array to list of tuples
-        logging.debug('Legal plays: %s', legal_plays)
-        return legal_plays
+        if self.winner_ is not None:
+            return []
+        return list(self.free)
+
+    def all_plays(self):
+        """
+        All the moves of the game whether they are legal or not, always in the same order
+
+        :return: list of moves tuples
+        """
+        return [(row, col) for row in range(self.board_size) for col in range(self.board_size)]
+
+    def rollout_position(self):
+        """
+        Position in the format used by utils.rollouts: 1 for the first player, -1 for the second one, 0 for empty cells
+
+        :return: (board as int8 array, value of the player to move, value of the winner or 0 if there is none)
+        """
+        winner = self.winner()
+        winner_value = 0 if winner is None else (1 if winner == self.players[0] else -1)
+        return self.state.astype(np.int8), 1 - 2 * self.player_index, winner_value
 
     def winner(self):
         """
@@ -64,12 +178,7 @@ class Game:
 
         :return: Player or None
         """
-        for player in self.players:
-            if self.board_size * player.value in self.sums:   # one axis is full of this player plays (= win)
-                logging.debug('Winner: %s', player.display)
-                return player
-        logging.debug('Winner: None')
-        return None   # no winner found
+        return self.winner_
 
     def show_board(self, state_number=-1, return_string=False):
         """
@@ -82,7 +191,7 @@ class Game:
         # creates the string representation of the game
         lines = []
         no_player_display = '.'
-        for line in self.history[state_number]:
+        for line in (self.state if state_number == -1 else self.history[state_number]):
             elements = []
             for element in line:
                 if element in self.players_values:
@@ -106,34 +215,73 @@ class Game:
         :param move: selected move to play. If None it is chosen randomly amon legal plays
         :return: nothing
         """
-        legal_plays = self.legal_plays()
-
         if move is not None:
             # if input move is provided check that it is legal
-            if move in legal_plays:
-                selected_move = move
-            else:
+            try:
+                row, col = move
+                legal = 0 <= row < self.board_size and 0 <= col < self.board_size
+            except (TypeError, ValueError):
+                legal = False
+            if self.winner_ is not None or not legal or self.free_positions[self.move_index(move)] == -1:
                 raise ValueError('Selected move is illegal')
+            selected_move = (int(row), int(col))
         else:
             # select a move randomly
-            selected_move = legal_plays[np.random.choice(len(legal_plays), 1)[0]]
+            if self.winner_ is not None or not self.free:
+                raise ValueError('No legal move to play')
+            selected_move = self.free[np.random.randint(len(self.free))]
         logging.debug('Selected move: %s', move)
 
-        # updates states and players info
-        self.state[selected_move] = self.current_player.value
-        if self.save_history:
-            self.history.append(self.state.copy())  # copy() needed to avoid appending a reference
-        else:
-            self.history = [self.state.copy()]  # only the current state is save (to be able to display it)
-        self.current_player = next(self.players_gen)
+        # updates states, lines and players info
+        value = self.current_player.value
+        self.state[selected_move] = value
+        cell = self.move_index(selected_move)
+        position = self.free_positions[cell]
+        last_free = self.free.pop()
+        if position < len(self.free):
+            self.free[position] = last_free
+            self.free_positions[self.move_index(last_free)] = position
+        self.free_positions[cell] = -1
+        self.removed_positions.append(position)
+        self.moves[self.n_moves] = cell
+        self.n_moves += 1
+        line_sums, win_sum = self.line_sums, self.n_in_a_row * value
+        for line in self.cell_lines[cell]:
+            line_sums[line] += value
+            if line_sums[line] == win_sum:   # only the player who just played can have won
+                self.winner_ = self.current_player
+        self.hash ^= self.zobrist_keys[selected_move[0]][selected_move[1]][self.player_index] ^ self.zobrist_side_key
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
         self.last_play = selected_move
 
-        # updates sums that are used to check for winner
-        self.sums = np.concatenate(
-            (np.sum(self.state, axis=0),   # vertical
-             np.sum(self.state, axis=1),   # horizontal
-             np.array([np.sum(np.diag(self.state)),   # diagonal
-                       np.sum(np.diag(self.state[::-1]))])))
+    def undo(self):
+        """
+        Undo the last move played (since the game was created or copied)
+
+        :return: nothing
+        """
+        if not self.n_moves:
+            raise ValueError('No move to undo')
+        self.state[self.last_play] = 0
+        position = self.removed_positions.pop()
+        if position < len(self.free):
+            # the cell moved to the position of the played cell goes back to the end
+            self.free_positions[self.move_index(self.free[position])] = len(self.free)
+            self.free.append(self.free[position])
+            self.free[position] = self.last_play
+        else:
+            self.free.append(self.last_play)
+        self.free_positions[self.move_index(self.last_play)] = position
+        self.n_moves -= 1
+        self.player_index = 1 - self.player_index
+        self.current_player = self.players[self.player_index]
+        value = self.current_player.value
+        for line in self.cell_lines[self.move_index(self.last_play)]:
+            self.line_sums[line] -= value
+        self.winner_ = None   # the game stops at the first win so there was no winner before the last move
+        self.hash ^= self.zobrist_keys[self.last_play[0]][self.last_play[1]][self.player_index] ^ self.zobrist_side_key
+        self.last_play = self.index_move(self.moves.item(self.n_moves - 1)) if self.n_moves else self.first_last_play
 
 
 def main():
@@ -16,20 +16,23 @@ def main():
     game = Game()
     # print init version of game
     game.show_board()
+    # the tree is kept between moves, its root following the game
+    tree = MonteCarloTreeSearch(game=game.copy())
     while game.legal_plays():
         # run Monte Carlo Tree Search and show recommended move
-        tree = MonteCarloTreeSearch(game=game)
         tree.search(max_iterations=10000, max_runtime=3, n_simulations=1)
         tree.show_tree(level=1)
         print("MCTS recommends: {}".format(tree.recommended_play()))
         # ask user for move to play and play it
         move = tuple([int(s) for s in input("Move to play (format: .,.) : ").split(',')])
         game.play(move)
+        tree.advance(move)
         print('You played:')
         game.show_board()
         # a random  move is selected for opponent
         if game.legal_plays():
             game.play()
+            tree.advance(game.last_play)
         print('Opponent played:')
         game.show_board()
     if game.winner() is None:
@@ -3,83 +3,271 @@ Monte Carlo Tree Search implementation
 """
 
 import logging
+import multiprocessing
+import pickle
 import time
-from copy import deepcopy
 
 import numpy as np
-from anytree import Node, LevelOrderGroupIter, RenderTree
-from utils.scoring import ucb1, average_wins
+from anytree import LevelOrderGroupIter, RenderTree
+from utils.scoring import ucb1_array, rave_ucb1_array, average_wins_array, puct_array, visits_array
+from utils.rollouts import random_rollouts
+from utils.stats import SearchStats, peak_rss
+from utils.transpositions import TranspositionTable
+from utils.tree import ArrayTree, ROOT, PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS, UNPROVEN
 
 from games.tictactoe import Game
 
+SHUTDOWN_GRACE = 1.   # seconds given to worker processes to return their results after the search deadline
+PRUNE_RATIO = 0.75   # share of the slots budget kept when the tree is pruned, so that pruning is not done too often
+
 
 class MonteCarloTreeSearch:
     """
     Implementation of the Monte Carlo Tree Search algorithm
     Based on http://mcts.ai/pubs/mcts-survey-master.pdf
+
+    Nodes are integer ids of an ArrayTree, views of them (with the same attributes as the former anytree nodes) are
+    available through the root attribute and the node method.
+    With a transposition table (games must provide a hash attribute), move orders leading to the same position share
+    the same node and the tree becomes a directed acyclic graph.
+    The wins of a node are counted for the player who moved into it, so that selection maximizes the value of the
+    player to move at every level (negamax).
+    With the solver, terminal positions are proven wins, draws or losses. Proofs are backed up the tree (MCTS-Solver):
+    solved nodes are not selected anymore, proven winning moves are recommended at once and the search stops as soon
+    as the root is solved. Games are assumed to alternate players.
+    With RAVE (rave_equivalence > 0), the moves played by each rollout update the all-moves-as-first statistics of the
+    nodes of its path and selection blends them with the node statistics (utils.scoring.rave_ucb1_array).
+    With max_nodes or max_memory, the least played subtrees are pruned whenever the tree gets over budget during a
+    search: their root nodes keep their statistics and become leaves again. max_memory counts the node arrays and the
+    cached games (see below).
+    Nodes only store their move: the game at a node is rebuilt on a single scratch game, which is moved from one node to
+    the next by undoing moves up to their common ancestor and playing the moves down to the node. Games of the nodes
+    of the first state_cache_depth levels are cached so that the scratch game can restart from a copy of them.
+    With an evaluator (see utils.evaluators), the search is AlphaZero like (PUCT): rollouts are replaced by the value
+    the evaluator gives to the leaves, and the priors it gives to their moves guide the selection. Up to batch_size
+    leaves are selected before being evaluated in a single call, a virtual loss on their paths spreading the selections.
     """
 
-    def __init__(self, game):
+    def __init__(self, game, capacity=1024, transposition_size=0, solver=True, rave_equivalence=0, max_nodes=0,
+                 max_memory=0, state_cache_depth=3, evaluator=None, c_puct=1.5, batch_size=64, virtual_loss=1,
+                 scoring_func=None, c_=0.5):
+        if evaluator is not None and (rave_equivalence or transposition_size):
+            raise ValueError('PUCT search does not support RAVE nor transpositions')
         self.game = game
-        self.node_init_params = {'n_plays': 0, 'n_wins': 0, 'n_ties': 0, 'score': 0.}
-        self.root = Node('0', game=self.game, **self.node_init_params)
+        self.solver = solver
+        self.rave_equivalence = rave_equivalence
+        self.scoring_func = scoring_func   # selection scores, ucb1_array or rave_ucb1_array if None
+        self.c_ = c_
+        self.playouts = []   # (move ids, result) of the rollouts not backpropagated yet, only recorded with RAVE
+        self.path_moves = []   # move ids of the slots followed by the last selection and expansion
+        self.evaluator = evaluator
+        self.c_puct = c_puct
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.nodes = ArrayTree(capacity=capacity, rave=rave_equivalence > 0, puct=evaluator is not None)
+        self.nodes.root_game = game
+        self.state_cache_depth = state_cache_depth
+        self.state_cache = None   # games of the nodes close to the root, by node id
+        self.state_nbytes = len(pickle.dumps(game, pickle.HIGHEST_PROTOCOL))   # estimate of the memory of a game
+        self.scratch = None   # game at the position of the last node of scratch_chain
+        self.scratch_chain = None   # ids of the nodes from the root whose moves were played (or copied) on scratch
+        self.scratch_base = 0   # number of nodes of scratch_chain whose moves cannot be undone
+        self.reset_scratch()
+        self.transposition_size = transposition_size
+        self.transpositions = None
+        self.transposed_slots = {}   # slots pointing to a node holding their position by node id, to back up proofs
+        self.stats = None   # statistics being collected by the running search, if asked for
+        if transposition_size:
+            self.transpositions = TranspositionTable(size=transposition_size)
+            self.nodes.key[ROOT] = game.hash
+            self.transpositions.store(game.hash, ROOT, self.nodes.n_plays)
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.budget = self.slots_budget()
+
+    @property
+    def root(self):
+        """ View of the root node"""
+        return self.nodes.view(ROOT)
+
+    def node(self, node):
+        """
+        View of a node of the tree
+
+        :param node: node id
+        :return: NodeView
+        """
+        return self.nodes.view(node)
+
+    def reset_scratch(self):
+        """
+        Start a new scratch game at the root and empty the states cache (needed whenever the nodes are renumbered)
+
+        :return: nothing
+        """
+        self.state_cache = {ROOT: self.game}
+        self.scratch = self.game.copy()
+        self.scratch_chain = [ROOT]
+        self.scratch_base = 1
+
+    def position(self, node):
+        """
+        Move the scratch game to the position of a node
+        Only the moves below the last node shared with the previous position are undone and played again, unless a
+        cached game is at least as deep as this shared node: the scratch game is then a copy of the cached game
+
+        :param node: node id
+        :return: the scratch game (it must be left at the same position)
+        """
+        nodes, game, scratch_chain = self.nodes, self.scratch, self.scratch_chain
+        if node == scratch_chain[-1]:
+            return game
+        chain = nodes.chain(node)
+        common = 1
+        while common < min(len(chain), len(scratch_chain)) and chain[common] == scratch_chain[common]:
+            common += 1
+        cache = self.state_cache
+        cached = min(len(chain), self.state_cache_depth + 1)
+        while chain[cached - 1] not in cache:
+            cached -= 1
+        if cached >= common or common < self.scratch_base:
+            game = self.scratch = cache[chain[cached - 1]].copy()
+            common = self.scratch_base = cached
+        else:
+            for _ in range(len(scratch_chain) - common):
+                game.undo()
+        for depth in range(common, len(chain)):
+            game.play(nodes.moves[nodes.move[chain[depth]]])
+            if depth <= self.state_cache_depth:
+                cache[chain[depth]] = game.copy()
+                if self.max_memory:
+                    self.budget = self.slots_budget()   # the cached games take memory from the node arrays
+        self.scratch_chain = chain
+        return game
 
-    def select(self, scoring_func=ucb1):
+    def select(self, scoring_func=None):
         """
         Select a node of the tree based on scores or expand current one if not all children have been visited
 
-        :param scoring_func: the function that takes as inputs (n_plays, n_wins, n_ties) and output the node score
-        :return: Node with best score
+        :param scoring_func: the function that takes as inputs arrays (n_plays, n_wins, n_ties) of all children of a
+        node, their total_plays and c_ and outputs their scores. With RAVE it also takes their amaf_plays, amaf_wins and
+        the equivalence parameter. If None, the scoring_func of the search, else ucb1_array or rave_ucb1_array is used
+        :return: id of the node with best score
+        """
+        return self.select_path(scoring_func=scoring_func)[-1]
+
+    def select_path(self, scoring_func=None):
+        """
+        Same as select but returns the whole path followed from the root (needed to backpropagate when nodes have
+        several parents)
+
+        :param scoring_func: the function that takes as inputs arrays (n_plays, n_wins, n_ties) of all children of a
+        node, their total_plays and c_ and outputs their scores. With RAVE it also takes their amaf_plays, amaf_wins and
+        the equivalence parameter. If None, the scoring_func of the search, else ucb1_array or rave_ucb1_array is used
+        :return: list of node ids from the root to the selected node (the move ids of the slots followed, which differ
+        from the moves of the nodes with transpositions, are kept in path_moves)
         """
+        if scoring_func is None:
+            scoring_func = self.scoring_func or (rave_ucb1_array if self.rave_equivalence else ucb1_array)
         # selection start from root node
-        node = self.root
+        nodes = self.nodes
+        node = ROOT
+        path = [node]
+        self.path_moves = []
 
         # browse each level until we reach a terminal node
-        while node.children:
-            if len(node.game.legal_plays()) > len(node.children):
+        while nodes.n_children[node]:
+            if nodes.n_legal[node] > nodes.n_children[node]:
                 # if node still has unexplored children we select it
-                logging.debug('-SELECT- chose node: %s that was not completely expanded', node.name)
-                return node
+                logging.debug('-SELECT- chose node: %s that was not completely expanded', nodes.view(node))
+                return path
             else:
                 # we go down the tree until we reach the bottom always choosing the best score at each level
-                nodes = node.children
-                scores = []
-                for node_ in nodes:
-                    total_plays = node_.parent.n_plays
-                    node_.score = scoring_func(plays=node_.n_plays,
-                                               wins=node_.n_wins,
-                                               ties=node_.n_ties,
-                                               total_plays=total_plays,
-                                               c_=0.5)
-                    scores.append(node_.score)
-                node = nodes[np.argmax(scores)]
-                logging.debug('-SELECT- chose temporary best score node: %s', node.name)
-        logging.debug('-SELECT- final choice is node: %s', node.name)
-        return node
+                first = nodes.first_child[node]
+                slots = children = slice(first, first + nodes.n_children[node])
+                if self.transpositions is not None:
+                    children = nodes.target[children]   # statistics are held by the target nodes
+                rave = {}
+                if self.rave_equivalence:
+                    # AMAF statistics are held by the slots, which belong to a single parent
+                    rave = {'amaf_plays': nodes.amaf_plays[slots], 'amaf_wins': nodes.amaf_wins[slots],
+                            'equivalence': self.rave_equivalence}
+                scores = scoring_func(plays=nodes.n_plays[children],
+                                      wins=nodes.n_wins[children],
+                                      ties=nodes.n_ties[children],
+                                      total_plays=nodes.n_plays[node],
+                                      c_=self.c_,
+                                      **rave)
+                if self.solver:
+                    proven = nodes.proven[children]
+                    solved = proven != UNPROVEN
+                    if solved.all() or np.any(proven == PROVEN_WIN):
+                        # the node is solved through other paths (transpositions): the backpropagation of this
+                        # iteration will prove it
+                        return path
+                    scores[solved] = -np.inf
+                nodes.score[children] = scores
+                slot = first + int(np.argmax(scores))
+                node = int(nodes.target[slot])
+                path.append(node)
+                self.path_moves.append(int(nodes.move[slot]))
+                logging.debug('-SELECT- chose temporary best score node: %s', nodes.view(node))
+        logging.debug('-SELECT- final choice is node: %s', nodes.view(node))
+        return path
 
-    def expand(self, parent):
+    def expand(self, parent, move=None):
         """
         Randomly expand a child for selected node in order to expand the tree
 
-        :param parent: Node to expand
-        :return: Expanded child node
+        :param parent: id of the node to expand
+        :param move: play leading to the child to create. If None it is chosen randomly among unexplored plays
+        :return: id of the expanded child node (an existing node if its position is already in the transposition table)
         """
-        # filter out plays that already have been expanded
-        already_played = [node.game.last_play for node in parent.children]
-        unexplored_plays = [play for play in parent.game.legal_plays() if play not in already_played]
-        if unexplored_plays:
-            # choose one play randomly
-            selected_play = unexplored_plays[np.random.choice(len(unexplored_plays), 1)[0]]
+        nodes = self.nodes
+        game = self.position(parent)
+        if not nodes.is_expanded(parent):
+            nodes.reserve_children(parent, game.legal_plays())
+        # slots after the explored children hold the plays that have not been expanded yet
+        n_children, n_legal = nodes.n_children[parent], nodes.n_legal[parent]
+        if n_children < n_legal:
+            if move is None:
+                # choose one play randomly
+                slot = np.random.randint(n_children, n_legal)
+            else:
+                unexplored_plays = nodes.unexplored_moves(parent)
+                if move not in unexplored_plays:
+                    raise ValueError('Selected move is not an unexplored play')
+                slot = n_children + unexplored_plays.index(move)
             # create a new node where this play is performed
-            child_game = deepcopy(parent.game)
-            child_game.play(selected_play)
-            child_name = parent.name + '_' + str(len(parent.children))
-            child = Node(name=child_name, parent=parent, game=child_game, **self.node_init_params)
-            logging.debug('-EXPAND- played %s from node %s to new child %s', selected_play, parent.name, child.name)
+            child = nodes.add_child(parent, slot)
+            self.path_moves.append(int(nodes.move[child]))
+            selected_play = nodes.moves[nodes.move[child]]
+            mover = game.current_player
+            game.play(selected_play)
+            self.scratch_chain = self.scratch_chain + [child]   # the child slot even if it is a transposition
+            if self.transpositions is not None:
+                transposition = self.transpositions.lookup(game.hash)
+                if transposition != -1:
+                    # the child slot points to the node already holding this position
+                    nodes.target[child] = transposition
+                    self.transposed_slots.setdefault(int(transposition), []).append(int(child))
+                    logging.debug('-EXPAND- played %s from node %s to existing node %s', selected_play,
+                                  nodes.view(parent), nodes.view(transposition))
+                    return transposition
+                nodes.key[child] = game.hash
+                self.transpositions.store(game.hash, child, nodes.n_plays)
+            if self.solver:
+                if game.winner() is not None:
+                    # usually the player who just moved, but an Oware game can end with a win of the player to move
+                    nodes.proven[child] = PROVEN_WIN if game.winner() == mover else PROVEN_LOSS
+                elif not game.legal_plays():
+                    nodes.proven[child] = PROVEN_DRAW
+            logging.debug('-EXPAND- played %s from node %s to new child %s', selected_play, nodes.view(parent),
+                          nodes.view(child))
             node = child
         else:
             # if all nodes have been explored return parent without expanding (can happen at end of tree search)
-            logging.debug('-EXPAND- did not expanded parent %s', parent.name)
+            logging.debug('-EXPAND- did not expanded parent %s', nodes.view(parent))
             node = parent
         return node
 
@@ -87,50 +275,190 @@ class MonteCarloTreeSearch:
         """
         Simulate games from current game state and returns number of wins
 
-        :param node: node from which the simulated games start
+        :param node: id of the node from which the simulated games start
         :param n_simulations: number of games simulations to perform
         :return: number of time the current player has won
         """
+        # batched rollouts do not return their moves, which RAVE needs
+        if n_simulations > 1 and hasattr(self.game, 'rollout_position') and not self.rave_equivalence:
+            n_wins, n_ties = self.simulate_batch(nodes=[node], n_simulations=n_simulations)
+            return int(n_wins[0]), int(n_ties[0])
+        return self.rollout(self.position(node), n_simulations)
+
+    def rollout(self, game, n_simulations):
+        """
+        Play random games one after the other from a game state
+        Games are played in place and unwound afterwards, so the game is left unchanged
+        With RAVE, the moves of each game are recorded in playouts until they are backpropagated
+
+        :param game: game from which the simulated games start
+        :param n_simulations: number of games simulations to perform
+        :return: number of wins and ties from the root player point of view
+        """
         n_wins = 0
         n_ties = 0
+        root_player = self.game.current_player
         for _ in range(n_simulations):
             # play until the end of the game
-            game = deepcopy(node.game)
-            node_player = game.current_player
-            logging.debug('-SIMULATE- from state\n%s\n with player %s', game.show_board(return_string=True),
-                          node_player.display)
+            n_moves = 0
+            moves = []
             while game.legal_plays():
                 game.play()
-            if game.winner() == self.root.game.current_player:  # all wins are from root point of view
+                n_moves += 1
+                if self.rave_equivalence:
+                    moves.append(self.nodes.move_id(game.last_play))
+            if game.winner() == root_player:  # all wins are from root point of view
                 n_wins += 1
+                result = 1
             elif game.winner() is None:
                 n_ties += 1
-            logging.debug('-SIMULATE- and ended on state\n%s', game.show_board(return_string=True))
+                result = 0
+            else:
+                result = -1
+            if self.rave_equivalence:
+                self.playouts.append((moves, result))
+            for _ in range(n_moves):
+                game.undo()
+            if self.stats is not None:
+                self.stats.rollout_lengths[n_moves] += 1
         logging.debug('-SIMULATE- performed %s plays and got %s wins', n_simulations, n_wins)
         return n_wins, n_ties
 
-    def backpropagate(self, node, n_plays, n_wins, n_ties):
+    def simulate_batch(self, nodes, n_simulations):
+        """
+        Simulate games from several nodes at once, all games being played in lockstep by utils.rollouts
+
+        :param nodes: list of ids of the nodes from which the simulated games start
+        :param n_simulations: number of games simulations to perform from each node (int or one int per node)
+        :return: arrays of the number of wins and ties (from the root player point of view) of each node
+        """
+        n_simulations = np.broadcast_to(n_simulations, (len(nodes),))
+        positions = [self.position(node).rollout_position() for node in nodes]
+        boards, to_move, winners = (np.repeat(np.array(values), n_simulations, axis=0) for values in zip(*positions))
+        lengths = np.zeros(len(boards), dtype=np.int64) if self.stats is not None else None
+        results = random_rollouts(boards, to_move, n_in_a_row=self.game.n_in_a_row, gravity=self.game.gravity,
+                                  winners=winners, lengths=lengths)
+        if lengths is not None:
+            self.stats.add_rollout_lengths(lengths)
+        # values of the batched games are 1 for the first player and -1 for the second one
+        root_value = 1 if self.game.current_player == self.game.players[0] else -1
+        owners = np.repeat(np.arange(len(nodes)), n_simulations)
+        n_wins = np.bincount(owners, weights=results == root_value, minlength=len(nodes)).astype(int)
+        n_ties = np.bincount(owners, weights=results == 0, minlength=len(nodes)).astype(int)
+        logging.debug('-SIMULATE- performed %s batched plays from %s nodes', len(results), len(nodes))
+        return n_wins, n_ties
+
+    def backpropagate(self, node, n_plays, n_wins, n_ties, path=None, moves=None):
         """
         Back-propagate the results of the simulations to the ancestor nodes of the tree
 
-        :param node: starting node for backpropagation (from bottom to top)
+        :param node: id of the starting node for backpropagation (from bottom to top)
         :param n_plays: number of games played to backpropagate
-        :param n_wins: number of games won to backpropagate
+        :param n_wins: number of games won by the root player to backpropagate
         :param n_ties: number of ties to backpropagate
+        :param path: list of node ids from the root to node. If None the first parent of each node is followed (which
+        is only correct without transpositions)
+        :param moves: move ids played along the path (see update_amaf)
+        :return: nothing
+        """
+        nodes = self.nodes
+        if path is None:
+            path = nodes.ancestors(node)[::-1] + [node]
+        # apply updates on current node and its ancestors, the root player moved into the nodes at odd depths
+        n_losses = n_plays - n_wins - n_ties
+        for depth in range(len(path) - 1, -1, -1):
+            node_ = path[depth]
+            nodes.n_plays[node_] += n_plays
+            nodes.n_wins[node_] += n_wins if depth % 2 else n_losses
+            nodes.n_ties[node_] += n_ties
+            output = '-BACKPROPAGATED- %s plays (of which %s ties) to node %s'
+            logging.debug(output, n_plays, n_ties, nodes.view(node_))
+        if self.playouts:
+            self.update_amaf(path, moves)
+        if self.solver:
+            self.solve(path)
+
+    def update_amaf(self, path, moves=None):
+        """
+        Update the all-moves-as-first statistics of the children slots of the nodes of a path with the recorded playouts
+        A slot of a node is updated by every playout in which its move was played after the node by the player to move
+        at the node, whose wins are counted
+
+        :param path: list of node ids from the root to the node the playouts started from
+        :param moves: move ids of the slots followed along the path. If None the moves of the nodes are used, which is
+        only correct without transpositions (the move of a node is the one of the first move order that reached it)
+        :return: nothing
+        """
+        nodes = self.nodes
+        tree_moves = list(moves) if moves is not None else [int(nodes.move[node]) for node in path[1:]]
+        for rollout_moves, result in self.playouts:
+            moves = np.array(tree_moves + rollout_moves, dtype=np.int32)
+            for depth, node in enumerate(path):
+                first = nodes.first_child[node]
+                if first == -1:
+                    continue
+                slots = np.arange(first, first + nodes.n_legal[node])
+                # the player to move at a node plays every other move from there
+                played = slots[np.isin(nodes.move[slots], moves[depth::2])]
+                nodes.amaf_plays[played] += 1
+                if result == (1 if depth % 2 == 0 else -1):
+                    nodes.amaf_wins[played] += 1
+        self.playouts = []
+
+    def solve(self, path):
+        """
+        Back up proofs along a path, from its last node up to the first node that cannot be proven
+        A node is a proven loss (for the player who moved into it) if one of its children is a proven win for the player
+        to move, and is solved once all its children are: it is then a win if they are all losses and a draw otherwise.
+        With transpositions, the proofs are also backed up to the other parents of the proven nodes.
+
+        :param path: list of node ids from the root
         :return: nothing
         """
-        # apply updates on current node
-        node.n_plays += n_plays
-        node.n_wins += n_wins
-        node.n_ties += n_ties
+        nodes = self.nodes
+        for node in reversed(path):
+            if nodes.proven[node] != UNPROVEN:
+                continue
+            if not self.prove(node):
+                return
+            if self.transpositions is not None:
+                self.solve_parents(node)
+
+    def prove(self, node):
+        """
+        Prove an unproven node from the proofs of its children
+
+        :param node: id of the node
+        :return: whether the node was proven
+        """
+        nodes = self.nodes
+        if not nodes.n_children[node]:
+            return False   # leaf whose value is unknown
+        proven = nodes.proven[nodes.children_targets(node)]
+        if np.any(proven == PROVEN_WIN):
+            nodes.proven[node] = PROVEN_LOSS
+        elif nodes.n_children[node] == nodes.n_legal[node] and np.all(proven != UNPROVEN):
+            nodes.proven[node] = -np.max(proven)
+        else:
+            return False
+        logging.debug('-SOLVE- proved node %s: %s', nodes.view(node), nodes.proven[node])
+        return True
+
+    def solve_parents(self, node):
+        """
+        Back up the proof of a node to all the parents of the slots pointing to it (transpositions), and so on for the
+        parents that get proven
 
-        # and its ancestors
-        for ancestor in node.ancestors:
-            ancestor.n_plays += n_plays
-            ancestor.n_wins += n_wins
-            ancestor.n_ties += n_ties
-            output = '-BACKPROPAGATED- %s plays (of which %s ties) to ancestor node %s'
-            logging.debug(output, n_plays, n_ties, ancestor.name)
+        :param node: id of a proven node
+        :return: nothing
+        """
+        nodes = self.nodes
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for parent in sorted({int(nodes.parent[slot]) for slot in [node] + self.transposed_slots.get(node, [])}):
+                if parent != -1 and nodes.proven[parent] == UNPROVEN and self.prove(parent):
+                    stack.append(parent)
 
     def show_tree(self, return_string=False, level=-1):
         """
@@ -147,7 +475,7 @@ class MonteCarloTreeSearch:
             :param nodes: list of nodes
             :return: sorted list
             """
-            return sorted(nodes, key=lambda n: n.game.last_play)
+            return sorted(nodes, key=lambda n: n.move)
 
         result = ['\n']
         output = '%s%s | Last move is %s | Player %s turn | %s wins and %s ties in %s plays | score: %.3f'
@@ -172,7 +500,8 @@ class MonteCarloTreeSearch:
             return result
         print(result)
 
-    def search(self, max_iterations, max_runtime, n_simulations=1, display_tree=False):
+    def search(self, max_iterations, max_runtime, n_simulations=1, display_tree=False, n_workers=1,
+               collect_stats=False, stats_callback=None, stats_interval=1000, snapshotter=None):
         """
         Run a Monte Carlo Tree Search starting from root node
 
@@ -180,36 +509,447 @@ class MonteCarloTreeSearch:
         :param max_runtime: max search time in seconds
         :param n_simulations: number of simulations per expanded node
         :param display_tree: whether or not the tree is printed at each iteration
+        :param n_workers: number of processes. If more than 1, independent searches are run in parallel from the root
+        and their statistics are merged in the root children (root parallelization)
+        :param collect_stats: whether to time each phase and to collect depths and rollout lengths
+        :param stats_callback: function called with the SearchStats every stats_interval iterations (streaming)
+        :param stats_interval: number of iterations between two calls of stats_callback
+        :param snapshotter: utils.diagnostics.TreeSnapshotter taking snapshots of the tree at its interval
+        :return: SearchStats of the search
         """
-        i, starting_time, ending_time = 0, time.time(), time.time() + max_runtime
-        node = self.root
-        while i < max_iterations and time.time() < ending_time:
-            logging.info('\n[MCTS] Iteration %s', i + 1)
-            logging.info('[MCTS] current parent node is %s', node.name)
-            node = self.select()
-            logging.info('[MCTS] selected node %s to be expanded', node.name)
+        stats = SearchStats(n_simulations=n_simulations)
+        n_nodes = self.n_nodes()
+        starting_time = time.time()
+        if self.evaluator is not None:
+            if n_workers > 1:
+                raise ValueError('PUCT search is not parallelized')
+            stats.iterations = self.puct_search(max_iterations, starting_time + max_runtime, stats, collect_stats)
+            self.finish_stats(stats, starting_time, n_nodes)
+            logging.info('[MCTS] Performed %s PUCT iterations in %s seconds.', stats.iterations,
+                         round(stats.elapsed, 2))
+            return stats
+        if n_workers > 1:
+            n_plays = self.nodes.n_plays[ROOT]
+            self.root_parallel_search(max_iterations, max_runtime, n_simulations=n_simulations, n_workers=n_workers,
+                                      stats=stats if collect_stats else None)
+            stats.iterations = int(self.nodes.n_plays[ROOT] - n_plays) // n_simulations
+            return self.finish_stats(stats, starting_time, n_nodes)
+        self.stats = stats if collect_stats else None
+        clock = time.perf_counter
+        phase_times = stats.phase_times
+        i, ending_time = 0, starting_time + max_runtime
+        while i < max_iterations and time.time() < ending_time and self.nodes.proven[ROOT] == UNPROVEN:
+            if collect_stats:
+                start = clock()
+            path = self.select_path()
+            node = path[-1]
+            if collect_stats:
+                selected = clock()
             expanded_node = self.expand(parent=node)
-            logging.info('[MCTS] expanded node %s to %s', node.name, expanded_node.name)
+            if expanded_node != node:
+                path.append(expanded_node)
+            if collect_stats:
+                expanded = clock()
             n_wins, n_ties = self.simulate(node=expanded_node, n_simulations=n_simulations)
-            self.backpropagate(node=expanded_node, n_plays=n_simulations, n_wins=n_wins, n_ties=n_ties)
+            if collect_stats:
+                simulated = clock()
+            self.backpropagate(node=expanded_node, n_plays=n_simulations, n_wins=n_wins, n_ties=n_ties, path=path,
+                               moves=self.path_moves)
+            if collect_stats:
+                phase_times['select'] += selected - start
+                phase_times['expand'] += expanded - selected
+                phase_times['simulate'] += simulated - expanded
+                phase_times['backpropagate'] += clock() - simulated
+                stats.add_depth(len(path) - 1)
+            if self.budget and self.nodes.size > self.budget:
+                stats.peak_nodes = max(stats.peak_nodes, self.n_nodes())
+                stats.pruned_nodes += self.prune(int(PRUNE_RATIO * self.budget))
             if display_tree:
                 self.show_tree()
             i += 1
-            logging.info('Resulting tree: %s \n', self.show_tree(return_string=True))
-        logging.info('[MCTS] Performed %s iterations in %s seconds.', i, round(time.time() - starting_time, 2))
+            if stats_callback is not None and i % stats_interval == 0:
+                stats.iterations = i
+                stats_callback(self.finish_stats(stats, starting_time, n_nodes))
+            if snapshotter is not None:
+                snapshotter.on_iteration(self, i)
+        stats.iterations = i
+        self.stats = None
+        if self.nodes.proven[ROOT] != UNPROVEN:
+            logging.info('[MCTS] Root solved after %s iterations: %s', i, self.nodes.proven[ROOT])
+        self.finish_stats(stats, starting_time, n_nodes)
+        logging.info('[MCTS] Performed %s iterations in %s seconds.', i, round(stats.elapsed, 2))
+        return stats
+
+    def puct_search(self, max_iterations, ending_time, stats, collect_stats=False):
+        """
+        PUCT iterations: leaves are selected in batches with a virtual loss, evaluated at once, expanded with the priors
+        of their moves and their values are backed up. Terminal leaves are backed up at once with their exact value.
+
+        :param max_iterations: max number of leaves evaluated or terminal leaves visited
+        :param ending_time: time at which the search must stop
+        :param stats: SearchStats of the search
+        :param collect_stats: whether to collect the depths of the leaves
+        :return: number of iterations performed
+        """
+        root_player = self.game.current_player
+        i = 0
+        while i < max_iterations and time.time() < ending_time and self.nodes.proven[ROOT] == UNPROVEN:
+            nodes = self.nodes
+            pending, inputs, leaves = [], [], set()
+            for _ in range(int(min(self.batch_size, max_iterations - i))):
+                path = self.puct_select_path()
+                leaf = path[-1]
+                if collect_stats:
+                    stats.add_depth(len(path) - 1)
+                if nodes.proven[leaf] == UNPROVEN:
+                    if leaf in leaves:
+                        break   # the virtual losses do not lead elsewhere: the batch is evaluated as it is
+                    game = self.position(leaf)
+                    winner, legal_plays = game.winner(), game.legal_plays()
+                    if winner is None and legal_plays:
+                        inputs.append(self.evaluator.encode(game))
+                        pending.append((path, legal_plays, [game.move_index(move) for move in legal_plays]))
+                        leaves.add(leaf)
+                        self.add_virtual_loss(path, self.virtual_loss)
+                        continue
+                    # terminal position: the value of the player who moved into the leaf is known
+                    root_value = 0 if winner is None else (1 if winner == root_player else -1)
+                    mover_value = root_value if (len(path) - 1) % 2 else -root_value
+                    nodes.proven[leaf] = PROVEN_WIN if mover_value > 0 else PROVEN_LOSS if mover_value else PROVEN_DRAW
+                # terminal leaves are backed up with their exact value
+                self.puct_backpropagate(path, nodes.proven[leaf] if (len(path) - 1) % 2 else -nodes.proven[leaf])
+                i += 1
+            if not pending:
+                continue
+            priors, values = self.evaluator.evaluate(np.stack(inputs))
+            for (path, legal_plays, move_indexes), move_priors, value in zip(pending, priors, values):
+                leaf = path[-1]
+                self.add_virtual_loss(path, -self.virtual_loss)
+                nodes.reserve_children(leaf, legal_plays)
+                first = nodes.first_child[leaf]
+                leaf_priors = move_priors[move_indexes]
+                nodes.prior[first:first + len(legal_plays)] = leaf_priors / max(leaf_priors.sum(), 1e-12)
+                # the value is given for the player to move at the leaf, who is the root player at even depths
+                self.puct_backpropagate(path, value if (len(path) - 1) % 2 == 0 else -value)
+                i += 1
+            if self.budget and self.nodes.size > self.budget:
+                stats.peak_nodes = max(stats.peak_nodes, self.n_nodes())
+                stats.pruned_nodes += self.prune(int(PRUNE_RATIO * self.budget))
+        return i
+
+    def puct_select_path(self):
+        """
+        Go down the tree choosing the move with the best PUCT score until a node that has not been evaluated yet (a new
+        child is added for an unexplored move) or a terminal node
+
+        :return: list of node ids from the root to the selected node
+        """
+        nodes = self.nodes
+        node = ROOT
+        path = [node]
+        while nodes.first_child[node] != -1:
+            first, n_children, n_legal = nodes.first_child[node], nodes.n_children[node], nodes.n_legal[node]
+            plays, value_sums = np.zeros(n_legal), np.zeros(n_legal)
+            plays[:n_children] = nodes.n_plays[first:first + n_children]
+            value_sums[:n_children] = nodes.value_sum[first:first + n_children]
+            scores = puct_array(plays, value_sums, nodes.prior[first:first + n_legal], nodes.n_plays[node],
+                                c_puct=self.c_puct)
+            slot = int(np.argmax(scores))
+            if slot >= n_children:
+                path.append(nodes.add_child(node, slot))
+                break
+            node = first + slot
+            path.append(node)
+        return path
+
+    def add_virtual_loss(self, path, virtual_loss):
+        """
+        Count virtual lost plays on the nodes of a path while its leaf waits for its evaluation (removed with a negative
+        virtual_loss)
+
+        :param path: list of node ids from the root
+        :param virtual_loss: number of lost plays
+        :return: nothing
+        """
+        self.nodes.n_plays[path] += virtual_loss
+        self.nodes.value_sum[path[1:]] -= virtual_loss
+
+    def puct_backpropagate(self, path, root_value):
+        """
+        Back up a value along a path, each node receiving it from the point of view of the player who moved into it
+
+        :param path: list of node ids from the root
+        :param root_value: value between -1 and 1 for the player to move at the root
+        :return: nothing
+        """
+        nodes = self.nodes
+        nodes.n_plays[path] += 1
+        # the root player moved into the nodes at odd depths
+        nodes.value_sum[path] += np.where(np.arange(len(path)) % 2 == 1, root_value, -root_value)
+        if self.solver:
+            self.solve(path)
+
+    def finish_stats(self, stats, starting_time, n_nodes):
+        """
+        Update the counters of a search that do not need to be followed at each iteration
+
+        :param stats: SearchStats of the search
+        :param starting_time: time at which the search started
+        :param n_nodes: number of nodes of the tree when the search started
+        :return: the updated SearchStats
+        """
+        stats.elapsed = time.time() - starting_time
+        current_nodes = self.n_nodes()
+        stats.nodes_created = current_nodes - n_nodes
+        stats.peak_nodes = max(stats.peak_nodes, current_nodes)
+        stats.peak_rss = peak_rss()
+        return stats
+
+    def n_nodes(self):
+        """
+        Number of nodes of the tree (slots of unexplored moves and transposed slots excluded)
+
+        :return: int
+        """
+        size = self.nodes.size
+        return int(np.count_nonzero(self.nodes.target[:size] == np.arange(size)))
+
+    def slots_budget(self):
+        """
+        Max number of slots of the tree allowed by max_nodes and max_memory
+        The capacity of the node arrays can be up to twice the number of slots, and max_memory also holds the cached
+        games (state_cache)
+
+        :return: int (0 if the tree is not bounded)
+        """
+        budgets = [self.max_nodes] if self.max_nodes else []
+        if self.max_memory:
+            available = self.max_memory - len(self.state_cache) * self.state_nbytes
+            budgets.append(max(int(available / (2 * self.nodes.nbytes() / self.nodes.capacity)), 1))
+        return min(budgets) if budgets else 0
+
+    def prune(self, n_slots):
+        """
+        Collapse the least played subtrees so that the tree holds at most n_slots slots, then compact it
+        The root of a collapsed subtree becomes a leaf that keeps its statistics (they already include the ones of its
+        subtree) and is expanded again if it is selected. The root and its children are always kept.
+
+        :param n_slots: number of slots to keep
+        :return: number of nodes removed
+        """
+        nodes = self.nodes
+        size = nodes.size
+        n_nodes = self.n_nodes()
+        # a node is never played more than its parent, so the most played expanded nodes form a tree
+        expanded = np.flatnonzero((nodes.target[:size] == np.arange(size)) & (nodes.first_child[:size] != -1))
+        expanded = expanded[expanded != ROOT]
+        order = np.concatenate(([ROOT], expanded[np.argsort(-nodes.n_plays[expanded], kind='stable')]))
+        kept_slots = 1 + np.cumsum(nodes.n_legal[order])
+        collapsed = order[max(int(np.searchsorted(kept_slots, n_slots, side='right')), 1):]
+        nodes.first_child[collapsed] = -1
+        nodes.n_children[collapsed] = 0
+        nodes.n_legal[collapsed] = 0
+        self.nodes = nodes.subtree(ROOT)
+        self.nodes.root_game = self.game
+        self.reset_scratch()
+        if self.transpositions is not None:
+            self.index_transpositions()
+        self.budget = self.slots_budget()
+        n_removed = n_nodes - self.n_nodes()
+        logging.info('[MCTS] Pruned %s subtrees (%s nodes), %s of %s slots kept', len(collapsed), n_removed,
+                     self.nodes.size, size)
+        return n_removed
+
+    def settings(self):
+        """
+        Arguments of the constructor configuring the search (the game, the capacity and the PUCT ones excluded), to
+        run the same search in worker processes
+
+        :return: dict of keyword arguments of MonteCarloTreeSearch
+        """
+        return {'transposition_size': self.transposition_size, 'solver': self.solver,
+                'rave_equivalence': self.rave_equivalence, 'max_nodes': self.max_nodes, 'max_memory': self.max_memory,
+                'state_cache_depth': self.state_cache_depth, 'scoring_func': self.scoring_func, 'c_': self.c_}
+
+    def root_parallel_search(self, max_iterations, max_runtime, n_simulations=1, n_workers=2, stats=None):
+        """
+        Run independent searches with different seeds in worker processes and merge their root statistics
+        The iterations budget is split between workers, which all stop at the same deadline. Workers run the search
+        configured like this one (see settings) and the proofs of the root children are merged as well.
+
+        :param max_iterations: max number of iterations for the tree search (all workers included)
+        :param max_runtime: max search time in seconds
+        :param n_simulations: number of simulations per expanded node
+        :param n_workers: number of worker processes
+        :param stats: SearchStats to which the phase times, depths and rollout lengths collected by the workers are
+        added, None not to collect them
+        :return: nothing
+        """
+        starting_time = time.time()
+        ending_time = starting_time + max_runtime
+        if np.isinf(max_iterations):
+            budgets = [max_iterations] * n_workers
+        else:
+            budgets = [max_iterations // n_workers + (worker < max_iterations % n_workers)
+                       for worker in range(n_workers)]
+        seeds = np.random.randint(2 ** 31 - 1, size=n_workers)
+        statistics = []
+        pool = multiprocessing.Pool(n_workers)
+        try:
+            results = [pool.apply_async(root_search_worker, (self.game, budget, ending_time, n_simulations, seed,
+                                                             self.settings(), stats is not None))
+                       for budget, seed in zip(budgets, seeds)]
+            for result in results:
+                try:
+                    statistics.append(result.get(timeout=max(ending_time - time.time(), 0.) + SHUTDOWN_GRACE))
+                except multiprocessing.TimeoutError:
+                    logging.warning('[MCTS] a root parallel worker did not finish before the deadline')
+        finally:
+            # workers still running after the deadline are killed
+            pool.terminate()
+            pool.join()
+        for worker_statistics, proofs, worker_stats in statistics:
+            self.merge_root_statistics(worker_statistics, proofs)
+            if stats is not None:
+                stats.merge(worker_stats)
+        logging.info('[MCTS] Merged %s root parallel searches in %s seconds.', len(statistics),
+                     round(time.time() - starting_time, 2))
+
+    def root_statistics(self):
+        """
+        Statistics of the root node and of its children
+
+        :return: ((n_plays, n_wins, n_ties) of the root, dict of (n_plays, n_wins, n_ties) of each child by move)
+        """
+        nodes = self.nodes
+        children = {nodes.moves[nodes.move[child]]: (int(nodes.n_plays[target]), int(nodes.n_wins[target]),
+                                                     int(nodes.n_ties[target]))
+                    for child, target in zip(nodes.children(ROOT), nodes.children_targets(ROOT))}
+        return (int(nodes.n_plays[ROOT]), int(nodes.n_wins[ROOT]), int(nodes.n_ties[ROOT])), children
+
+    def root_proofs(self):
+        """
+        Proofs of the root children
+
+        :return: dict of the proof (PROVEN_WIN, PROVEN_DRAW or PROVEN_LOSS) of each proven child by move
+        """
+        nodes = self.nodes
+        return {nodes.moves[nodes.move[child]]: int(nodes.proven[target])
+                for child, target in zip(nodes.children(ROOT), nodes.children_targets(ROOT))
+                if nodes.proven[target] != UNPROVEN}
+
+    def merge_root_statistics(self, statistics, proofs=None):
+        """
+        Add statistics of another search from the same root (as returned by root_statistics) to this tree
+
+        :param statistics: root and children statistics
+        :param proofs: proofs of the root children (as returned by root_proofs), only used with the solver
+        :return: nothing
+        """
+        nodes = self.nodes
+        root_counts, children_counts = statistics
+        if not nodes.is_expanded(ROOT):
+            nodes.reserve_children(ROOT, self.game.legal_plays())
+        children = {nodes.moves[nodes.move[child]]: target
+                    for child, target in zip(nodes.children(ROOT), nodes.children_targets(ROOT))}
+        for move, counts in children_counts.items():
+            if move not in children:
+                children[move] = self.expand(ROOT, move=move)
+            child = children[move]
+            nodes.n_plays[child] += counts[0]
+            nodes.n_wins[child] += counts[1]
+            nodes.n_ties[child] += counts[2]
+        nodes.n_plays[ROOT] += root_counts[0]
+        nodes.n_wins[ROOT] += root_counts[1]
+        nodes.n_ties[ROOT] += root_counts[2]
+        if self.solver and proofs:
+            for move, proof in proofs.items():
+                nodes.proven[children[move]] = proof   # proven children were expanded, so they have statistics
+            if nodes.proven[ROOT] == UNPROVEN:
+                self.prove(ROOT)
 
-    def recommended_play(self, scoring_func=average_wins):
+    def advance(self, move):
+        """
+        Move the root of the tree to the node reached by a move, so that the statistics gathered below it are kept for
+        the next search. The rest of the tree is freed. It must be called for every move played in the game.
+
+        :param move: move played from the root position
+        :return: nothing
+        """
+        nodes = self.nodes
+        game = self.game.copy()
+        game.play(move)
+        child = None
+        for slot, target in zip(nodes.children(ROOT), nodes.children_targets(ROOT)):
+            if nodes.moves[nodes.move[slot]] == move:
+                child = target
+        self.nodes = nodes.subtree(child) if child is not None else nodes.empty_like(size=1)
+        self.nodes.root_game = game
+        self.game = game
+        self.reset_scratch()
+        self.budget = self.slots_budget()
+        if self.transpositions is not None:
+            self.index_transpositions()
+        logging.info('[MCTS] Advanced the root to move %s, keeping %s of %s nodes', move, self.nodes.size, nodes.size)
+
+    def index_transpositions(self):
+        """
+        Fill the transposition table and the slots pointing to other nodes again (after the nodes have been renumbered)
+
+        :return: nothing
+        """
+        targets = self.nodes.target[:self.nodes.size]
+        nodes = targets == np.arange(self.nodes.size)
+        self.transpositions.clear()
+        for node in np.flatnonzero(nodes):
+            self.transpositions.store(int(self.nodes.key[node]), int(node), self.nodes.n_plays)
+        self.transposed_slots = {}
+        for slot in np.flatnonzero(~nodes & (targets != -1)):   # slots not expanded yet have no target
+            self.transposed_slots.setdefault(int(targets[slot]), []).append(int(slot))
+
+    def recommended_play(self, scoring_func=None):
         """
         Move recommended by the Monte Carlo Tree Search
 
+        :param scoring_func: function scoring arrays (n_plays, n_wins, n_ties) of all children of the root. If None,
+        average_wins_array or visits_array with an evaluator
         :return: tuple corresponding to the recommended move
         """
-        nodes = list(LevelOrderGroupIter(self.root))
-        if nodes:
-            level1_nodes = nodes[1]
-            scores = [scoring_func(plays=n.n_plays, wins=n.n_wins, ties=n.n_ties) for n in level1_nodes]
-            best_node = level1_nodes[np.argmax(scores)]
-            return best_node.game.last_play
+        if scoring_func is None:
+            scoring_func = average_wins_array if self.evaluator is None else visits_array
+        nodes = self.nodes
+        if nodes.n_children[ROOT]:
+            children = nodes.children_targets(ROOT)
+            scores = scoring_func(plays=nodes.n_plays[children], wins=nodes.n_wins[children],
+                                  ties=nodes.n_ties[children])
+            if self.solver:
+                # a proven win is played at once and proven losses are avoided whenever possible
+                proven = nodes.proven[children]
+                scores[proven == PROVEN_WIN] = np.inf
+                if not np.all(proven == PROVEN_LOSS):
+                    scores[proven == PROVEN_LOSS] = -np.inf
+            best_child = nodes.first_child[ROOT] + int(np.argmax(scores))
+            return nodes.moves[nodes.move[best_child]]
+
+
+def root_search_worker(game, max_iterations, ending_time, n_simulations, seed, settings, collect_stats=False):
+    """
+    Run an independent search in a worker process
+
+    :param game: game at the root of the search
+    :param max_iterations: max number of iterations of this worker
+    :param ending_time: time at which the search must stop
+    :param n_simulations: number of simulations per expanded node
+    :param seed: random seed of this worker
+    :param settings: keyword arguments of MonteCarloTreeSearch (see MonteCarloTreeSearch.settings)
+    :param collect_stats: whether to time each phase and to collect depths and rollout lengths
+    :return: (root statistics, proofs of the root children, SearchStats of the search)
+    """
+    np.random.seed(seed)
+    tree = MonteCarloTreeSearch(game=game, **settings)
+    stats = tree.search(max_iterations=max_iterations, max_runtime=ending_time - time.time(),
+                        n_simulations=n_simulations, collect_stats=collect_stats)
+    return tree.root_statistics(), tree.root_proofs(), stats
 
 
 def main():
@@ -220,6 +960,7 @@ def main():
     game = Game()
     tree = MonteCarloTreeSearch(game)
     tree.search(max_iterations=15, max_runtime=10, n_simulations=1, display_tree=False)
+    tree.show_tree()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+"""
+Self-play data generation: games of MonteCarloTreeSearch against itself played in worker processes, their positions
+streamed to a sharded dataset (utils.shards) to train evaluators
+
+Each searched position gives one row: the board (game.state as int8), the player to move, the visit counts of the root
+children (in the order of game.all_plays) and the result of the game for the player to move (1, 0 or -1).
+"""
+
+import json
+import logging
+import multiprocessing
+import time
+
+import numpy as np
+
+from mcts import MonteCarloTreeSearch
+from utils.shards import ShardWriter
+
+from games.tictactoe import Game
+
+
+def position_fields(game):
+    """
+    Fields of the rows of a self-play dataset
+
+    :param game: game at its starting position
+    :return: dict of name: (dtype, shape of a row) (see ShardWriter)
+    """
+    return {'boards': (np.int8, np.shape(game.state)),
+            'players': (np.int8, ()),
+            'visits': (np.int32, (len(game.all_plays()),)),
+            'results': (np.int8, ())}
+
+
+def self_play_game(game_class, game_kwargs, max_iterations, evaluator, temperature_moves, seed):
+    """
+    Play a game with a search before each move, the tree being kept from one move to the next
+    The first temperature_moves moves are drawn in proportion to the visit counts so that games differ, the next ones
+    are the recommended moves.
+
+    :param game_class: class of the game
+    :param game_kwargs: arguments of the game class
+    :param max_iterations: number of search iterations per move
+    :param evaluator: evaluator of a PUCT search (see utils.evaluators), None for rollouts
+    :param temperature_moves: number of moves drawn from the visit counts
+    :param seed: random seed of the game
+    :return: dict of the arrays of the rows of the positions of the game (see position_fields)
+    """
+    np.random.seed(seed)
+    game = game_class(**game_kwargs)
+    tree = MonteCarloTreeSearch(game=game.copy(), evaluator=evaluator)
+    n_moves = len(game.all_plays())
+    boards, players, visits = [], [], []
+    while game.legal_plays():
+        tree.search(max_iterations=max_iterations, max_runtime=np.inf)
+        counts = np.zeros(n_moves, dtype=np.int32)
+        for move, (n_plays, _, _) in tree.root_statistics()[1].items():
+            counts[game.move_index(move)] = n_plays
+        boards.append(np.array(game.state, dtype=np.int8))
+        players.append(game.player_index)
+        visits.append(counts)
+        if len(boards) <= temperature_moves and counts.sum():
+            move = game.index_move(np.random.choice(n_moves, p=counts / counts.sum()))
+        else:
+            move = tree.recommended_play()
+        game.play(move)
+        tree.advance(move)
+    winner = game.winner()
+    results = [0 if winner is None else (1 if winner == game.players[player] else -1) for player in players]
+    return {'boards': np.array(boards), 'players': np.array(players), 'visits': np.array(visits),
+            'results': np.array(results)}
+
+
+def self_play_worker(arguments):
+    """
+    Play a self-play game in a worker process
+
+    :param arguments: arguments of self_play_game
+    :return: rows of the positions of the game
+    """
+    return self_play_game(*arguments)
+
+
+def self_play(directory, game_class, n_games, game_kwargs=None, max_iterations=200, evaluator=None, n_workers=2,
+              temperature_moves=8, shard_size=100000, commit_every=10, seed=0):
+    """
+    Play self-play games in a process pool and append their positions to a sharded dataset
+    Games are written in order as soon as they are finished and committed every commit_every games: a run that was
+    stopped is resumed from its manifest by calling self_play again with the same directory, game and seed, the
+    games already committed being skipped (game i always uses the same random seed).
+
+    :param directory: dataset directory (see utils.shards)
+    :param game_class: class of the game
+    :param n_games: total number of games of the dataset, games already in the directory included
+    :param game_kwargs: arguments of the game class
+    :param max_iterations: number of search iterations per move
+    :param evaluator: evaluator of a PUCT search (see utils.evaluators), None for rollouts
+    :param n_workers: number of worker processes (games are played in this process if 1)
+    :param temperature_moves: number of moves of each game drawn from the visit counts
+    :param shard_size: max number of positions per shard
+    :param commit_every: number of games between two commits of the dataset
+    :param seed: random seed of the dataset
+    :return: dict of the number of games and positions written by this call, elapsed time, positions/s and games/s
+    """
+    game_kwargs = dict(game_kwargs or {})
+    # game_kwargs as read back from the manifest (tuples become lists) so that a resumed dataset compares equal
+    metadata = {'game': '{}.{}'.format(game_class.__module__, game_class.__name__),
+                'game_kwargs': json.loads(json.dumps(game_kwargs)), 'seed': seed}
+    writer = ShardWriter(directory, position_fields(game_class(**game_kwargs)), shard_size=shard_size)
+    if any(writer.metadata.get(key, value) != value for key, value in metadata.items()):
+        raise ValueError('The dataset in {} was generated with another game or seed'.format(directory))
+    writer.metadata.update(metadata)
+    first_game = writer.metadata.get('n_games', 0)
+    seeds = np.random.RandomState(seed).randint(2 ** 31 - 1, size=max(n_games, 0))
+    tasks = [(game_class, game_kwargs, max_iterations, evaluator, temperature_moves, int(seeds[number]))
+             for number in range(first_game, n_games)]
+    starting_time = time.time()
+    n_positions = 0
+    pool = multiprocessing.Pool(n_workers) if n_workers > 1 and tasks else None
+    try:
+        games = pool.imap(self_play_worker, tasks) if pool is not None else map(self_play_worker, tasks)
+        for number, rows in enumerate(games, start=first_game + 1):
+            writer.append(**rows)
+            n_positions += len(rows['results'])
+            writer.metadata['n_games'] = number
+            writer.metadata['n_positions'] = writer.metadata.get('n_positions', 0) + len(rows['results'])
+            if (number - first_game) % commit_every == 0:
+                writer.commit()
+    finally:
+        # the games finished so far are kept when the run is interrupted, unless a game was being written
+        if writer.n_appended == writer.metadata.get('n_positions', 0):
+            writer.commit()
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    elapsed = time.time() - starting_time
+    report = {'games': len(tasks), 'positions': n_positions, 'elapsed': elapsed,
+              'positions_per_second': n_positions / elapsed if elapsed else 0.,
+              'games_per_second': len(tasks) / elapsed if elapsed else 0.}
+    logging.info('[SelfPlay] Wrote %s positions of %s games in %s seconds (%s positions/s).', n_positions,
+                 len(tasks), round(elapsed, 2), round(report['positions_per_second'], 1))
+    return report
+
+
+def main():
+    """
+    Generate a small TicTacToe self-play dataset
+    """
+    logging.basicConfig(level=logging.INFO)
+    self_play('selfplay_data', Game, n_games=100, max_iterations=200, n_workers=multiprocessing.cpu_count())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,600 @@
+"""
+Local move-recommendation server: one search tree per game session, kept in a worker process and advanced as the
+moves of the game arrive
+
+The asyncio server speaks a minimal HTTP/1.1 with JSON bodies, on a TCP port or on a Unix socket:
+    POST /sessions {"game": "connect4", "game_kwargs": {}} -> {"session": "..."}
+    POST /sessions/<session>/moves {"move": 3} -> {"n_moves": 1}
+    POST /sessions/<session>/recommend {"time_budget": 0.1, "max_iterations": 10000} -> {"move": 3, "iterations": 812}
+    DELETE /sessions/<session> -> {}
+    GET /stats -> number of sessions and latency percentiles by endpoint
+Moves are JSON values, lists standing for tuples (TicTacToe and Gomoku cells).
+
+Usage: python -m server [port]
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import multiprocessing
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from mcts import MonteCarloTreeSearch
+from games import connect4, gomoku, oware, tictactoe
+
+GAMES = {'tictactoe': tictactoe.Game, 'connect4': connect4.Game, 'gomoku': gomoku.Game, 'oware': oware.Game}
+MAX_BODY = 2 ** 16
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+                  500: 'Internal Server Error'}
+
+
+class UnknownSession(KeyError):
+    """
+    Session that was never created or was evicted
+    """
+
+
+class WorkerError(RuntimeError):
+    """
+    Command that failed in a worker for another reason than its arguments, or whose worker stopped
+    """
+
+
+def to_move(value):
+    """
+    Move of a JSON value
+
+    :param value: decoded JSON value
+    :return: move (lists become tuples)
+    """
+    return tuple(to_move(item) for item in value) if isinstance(value, list) else value
+
+
+def to_json(move):
+    """
+    JSON value of a move
+
+    :param move: move (tuple, int or numpy integer)
+    :return: JSON serializable value
+    """
+    if isinstance(move, (tuple, list)):
+        return [to_json(item) for item in move]
+    return move.item() if isinstance(move, np.generic) else move
+
+
+def next_command(queue):
+    """
+    Pop the next command to run: the first command that is not a search and whose session has no earlier command
+    waiting (the commands of a session keep their order), otherwise the first command
+
+    :param queue: deque of the commands received by a worker
+    :return: command
+    """
+    blocked = set()
+    for index, message in enumerate(queue):
+        if message is None:
+            break
+        if message[1] != 'recommend' and message[2] not in blocked:
+            del queue[index]
+            return message
+        blocked.add(message[2])
+    return queue.popleft()
+
+
+def search_worker(connection, seed):
+    """
+    Loop of a worker process: keeps the games and trees of its sessions and runs the commands sent by the server
+    Commands are (request id, command, session, arguments) tuples, the replies (request id, result, exception).
+    Cheap commands received while a search was running are run before the waiting searches (see next_command).
+
+    :param connection: end of the pipe to the server
+    :param seed: random seed of the worker
+    :return: nothing
+    """
+    np.random.seed(seed)
+    logging.getLogger().setLevel(logging.WARNING)
+    sessions = {}
+    queue = collections.deque()
+    while True:
+        try:
+            if not queue:
+                queue.append(connection.recv())
+            while connection.poll():
+                queue.append(connection.recv())
+        except EOFError:
+            return
+        message = next_command(queue)
+        if message is None:
+            return   # stopped by the server
+        request_id, command, session, arguments = message
+        try:
+            if command == 'new':
+                game = GAMES[arguments['game']](**arguments.get('game_kwargs', {}))
+                sessions[session] = (game, MonteCarloTreeSearch(game=game.copy()))
+                result = {'session': session}
+            elif command == 'close':
+                sessions.pop(session, None)
+                result = {}
+            elif session not in sessions:
+                raise UnknownSession(session)
+            elif command == 'play':
+                game, tree = sessions[session]
+                move = to_move(arguments['move'])
+                game.play(move)
+                tree.advance(move)
+                result = {'n_moves': game.n_moves, 'over': not game.legal_plays()}
+            elif command == 'recommend':
+                game, tree = sessions[session]
+                if not game.legal_plays():
+                    raise ValueError('The game is over')
+                # the time spent waiting for the worker is part of the budget of the request
+                runtime = max(arguments['deadline'] - time.time(), arguments['min_search_time'])
+                stats = tree.search(max_iterations=arguments['max_iterations'], max_runtime=runtime)
+                move = tree.recommended_play()
+                if move is None:
+                    legal_plays = game.legal_plays()
+                    move = legal_plays[np.random.randint(len(legal_plays))]
+                result = {'move': to_json(move), 'iterations': stats.iterations, 'search_time': stats.elapsed}
+            else:
+                raise ValueError('Unknown command: {}'.format(command))
+            connection.send((request_id, result, None))
+        except (KeyError, ValueError, TypeError, IndexError) as error:
+            connection.send((request_id, None, error if isinstance(error, UnknownSession) else
+                             ValueError('{}: {}'.format(error.__class__.__name__, error))))
+        except Exception as error:
+            # MemoryError of a huge game for instance: the worker and its other sessions are still usable
+            connection.send((request_id, None, WorkerError('{}: {}'.format(error.__class__.__name__, error))))
+
+
+class WorkerPool:
+    """
+    Worker processes running the searches, each session being pinned to one worker which keeps its tree
+    Replies are read by the event loop when the pipes become readable, so waiting for a worker never blocks the loop.
+    """
+
+    def __init__(self, n_workers, seed=0):
+        self.loop = asyncio.get_running_loop()
+        self.seeds = [int(worker_seed) for worker_seed in np.random.RandomState(seed).randint(2 ** 31 - 1,
+                                                                                              size=n_workers)]
+        self.connections = [None] * n_workers
+        self.processes = [None] * n_workers
+        self.pending = [{} for _ in range(n_workers)]   # futures of the requests sent to each worker, by request id
+        self.request_ids = iter(range(2 ** 62))
+        self.n_restarts = 0
+        for index in range(n_workers):
+            self.start_worker(index)
+
+    def start_worker(self, index):
+        """
+        Start the process of a worker and watch its pipe from the event loop
+
+        :param index: index of the worker
+        :return: nothing
+        """
+        server_end, worker_end = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=search_worker, args=(worker_end, self.seeds[index]), daemon=True)
+        process.start()
+        worker_end.close()
+        self.loop.add_reader(server_end.fileno(), self.receive, index)
+        self.connections[index] = server_end
+        self.processes[index] = process
+
+    def restart_worker(self, index):
+        """
+        Replace a worker whose pipe was closed (the process died): its pending requests fail with WorkerError and
+        the sessions it kept are lost (their later requests get UnknownSession)
+
+        :param index: index of the worker
+        :return: nothing
+        """
+        connection, process = self.connections[index], self.processes[index]
+        self.loop.remove_reader(connection.fileno())
+        connection.close()
+        process.join(timeout=1.)
+        if process.is_alive():
+            process.terminate()
+        pending, self.pending[index] = self.pending[index], {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WorkerError('Worker {} stopped (exit code {})'.format(index, process.exitcode)))
+        logging.error('[Server] Worker %s stopped with exit code %s, %s pending requests failed', index,
+                      process.exitcode, len(pending))
+        self.n_restarts += 1
+        self.start_worker(index)
+
+    def receive(self, index):
+        """
+        Resolve the future of a request answered by a worker
+
+        :param index: index of the worker whose pipe became readable
+        :return: nothing
+        """
+        try:
+            request_id, result, error = self.connections[index].recv()
+        except (EOFError, OSError):
+            self.restart_worker(index)
+            return
+        future = self.pending[index].pop(request_id)
+        if not future.done():
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def worker(self, session):
+        """
+        Index of the worker of a session
+
+        :param session: session id
+        :return: int
+        """
+        return int(session[:8], 16) % len(self.connections)
+
+    def run(self, command, session, arguments=None):
+        """
+        Send a command to the worker of a session
+
+        :param command: 'new', 'play', 'recommend' or 'close'
+        :param session: session id
+        :param arguments: dict of the arguments of the command
+        :return: future of the result (UnknownSession, ValueError or WorkerError if the command failed)
+        """
+        request_id = next(self.request_ids)
+        index = self.worker(session)
+        future = self.loop.create_future()
+        self.pending[index][request_id] = future
+        try:
+            self.connections[index].send((request_id, command, session, arguments or {}))
+        except OSError:
+            self.restart_worker(index)
+        return future
+
+    def close(self):
+        """
+        Stop the workers
+
+        :return: nothing
+        """
+        for connection in self.connections:
+            self.loop.remove_reader(connection.fileno())
+            try:
+                connection.send(None)
+            except OSError:
+                pass   # the worker already stopped
+            connection.close()
+        for process in self.processes:
+            process.join(timeout=1.)
+            if process.is_alive():
+                process.terminate()
+
+
+class RecommendationServer:
+    """
+    Asyncio HTTP server of the sessions: requests are parsed on the event loop and the searches run in a WorkerPool
+    Sessions idle for more than idle_timeout seconds are evicted, as well as the least recently used ones beyond
+    max_sessions. Latencies of the last latency_window requests of each endpoint are kept for the percentiles.
+    """
+
+    def __init__(self, n_workers=None, idle_timeout=600., max_sessions=10000, default_time_budget=0.1,
+                 max_time_budget=10., min_search_time=0.005, max_iterations=10 ** 6, latency_window=10000, seed=0):
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.default_time_budget = default_time_budget
+        self.max_time_budget = max_time_budget
+        self.min_search_time = min_search_time   # search time of the requests whose budget was spent waiting
+        self.max_iterations = max_iterations
+        self.seed = seed
+        self.sessions = collections.OrderedDict()   # last activity time by session id, least recent first
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=latency_window))
+        self.n_evicted = 0
+        self.pool = None
+        self.server = None
+        self.evictor = None
+        self.connections = {}   # writers of the open connections by handler task
+
+    async def start(self, host='127.0.0.1', port=8080, path=None):
+        """
+        Start the workers and listen on a TCP port or on a Unix socket
+
+        :param host: host of the TCP server
+        :param port: TCP port (0 for any free port)
+        :param path: path of the Unix socket, used instead of the TCP port if given
+        :return: address listened to (port or path)
+        """
+        self.pool = WorkerPool(self.n_workers, seed=self.seed)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle_connection, path=path)
+            address = path
+        else:
+            self.server = await asyncio.start_server(self.handle_connection, host=host, port=port)
+            address = self.server.sockets[0].getsockname()[1]
+        self.evictor = asyncio.ensure_future(self.evict_periodically())
+        logging.info('[Server] Listening on %s with %s workers', address, self.n_workers)
+        return address
+
+    async def stop(self):
+        """
+        Stop listening and stop the workers
+
+        :return: nothing
+        """
+        self.evictor.cancel()
+        self.server.close()
+        # open connections are closed so that their handlers return
+        for writer in self.connections.values():
+            writer.transport.abort()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.pool.close()
+
+    async def evict_periodically(self):
+        """
+        Evict the idle sessions every idle_timeout / 4 seconds (at most 10 seconds)
+
+        :return: nothing
+        """
+        while True:
+            await asyncio.sleep(min(max(self.idle_timeout / 4., 0.01), 10.))
+            self.evict_idle_sessions()
+
+    def evict_idle_sessions(self):
+        """
+        Close the sessions idle for more than idle_timeout
+
+        :return: number of evicted sessions
+        """
+        limit = time.time() - self.idle_timeout
+        n_sessions = len(self.sessions)
+        while self.sessions and next(iter(self.sessions.values())) <= limit:
+            self.close_session(next(iter(self.sessions)))
+        return n_sessions - len(self.sessions)
+
+    def close_session(self, session, evicted=True):
+        """
+        Forget a session and its tree
+
+        :param session: session id
+        :param evicted: whether the session is closed by the server (idle or least recently used)
+        :return: nothing
+        """
+        del self.sessions[session]
+        self.pool.run('close', session)
+        self.n_evicted += evicted
+
+    def touch(self, session):
+        """
+        Record an activity of a session
+
+        :param session: session id
+        :return: nothing
+        """
+        if session not in self.sessions:
+            raise UnknownSession(session)
+        self.sessions[session] = time.time()
+        self.sessions.move_to_end(session)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answer the requests of a connection until the client closes it (keep-alive)
+
+        :param reader: asyncio StreamReader
+        :param writer: asyncio StreamWriter
+        :return: nothing
+        """
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                starting_time = time.perf_counter()
+                method, target = request_line.decode('latin1').split()[:2]
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin1').strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    # the body is not read: the connection is closed after the response
+                    await self.respond(writer, 413, {'error': 'Body larger than {} bytes'.format(MAX_BODY)},
+                                       close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    endpoint, status, result = await self.dispatch(method, target, body)
+                except Exception:
+                    logging.exception('[Server] %s %s failed', method, target)
+                    endpoint, status, result = 'error', 500, {'error': 'Internal server error'}
+                await self.respond(writer, status, result)
+                self.latencies[endpoint].append(time.perf_counter() - starting_time)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass   # client gone or malformed request: the connection is closed
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, result, close=False):
+        """
+        Write a JSON response
+
+        :param writer: asyncio StreamWriter
+        :param status: HTTP status
+        :param result: JSON serializable result
+        :param close: whether the connection is closed after the response
+        :return: nothing
+        """
+        payload = json.dumps(result).encode()
+        writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n{}\r\n'.format(
+            status, STATUS_REASONS[status], len(payload), 'Connection: close\r\n' if close else '').encode('latin1') +
+            payload)
+        await writer.drain()
+
+    async def dispatch(self, method, target, body):
+        """
+        Run the command of a request
+
+        :param method: HTTP method
+        :param target: request path
+        :param body: request body (JSON)
+        :return: (endpoint name, HTTP status, JSON serializable result)
+        """
+        parts = target.strip('/').split('/')
+        try:
+            arguments = json.loads(body.decode()) if body else {}
+            if not isinstance(arguments, dict):
+                raise ValueError('The body must be a JSON object')
+            if parts == ['stats'] and method == 'GET':
+                return 'stats', 200, self.stats()
+            if parts == ['sessions'] and method == 'POST':
+                return 'new', 200, await self.new_session(arguments)
+            if len(parts) == 2 and parts[0] == 'sessions' and method == 'DELETE':
+                self.touch(parts[1])
+                self.close_session(parts[1], evicted=False)
+                return 'close', 200, {}
+            if len(parts) == 3 and parts[0] == 'sessions' and method == 'POST' and parts[2] in ('moves', 'recommend'):
+                session, endpoint = parts[1], parts[2]
+                self.touch(session)
+                if endpoint == 'moves':
+                    return 'moves', 200, await self.pool.run('play', session, {'move': arguments['move']})
+                time_budget = min(float(arguments.get('time_budget', self.default_time_budget)),
+                                  self.max_time_budget)
+                max_iterations = min(int(arguments.get('max_iterations', self.max_iterations)), self.max_iterations)
+                return 'recommend', 200, await self.pool.run('recommend', session, {
+                    'deadline': time.time() + time_budget, 'min_search_time': self.min_search_time,
+                    'max_iterations': max_iterations})
+            return 'unknown', 404 if method in ('GET', 'POST', 'DELETE') else 405, {'error': 'Unknown endpoint'}
+        except UnknownSession as error:
+            # also raised by a worker which was restarted and lost the session
+            self.sessions.pop(error.args[0], None)
+            return 'error', 404, {'error': 'Unknown session: {}'.format(error.args[0])}
+        except KeyError as error:
+            return 'error', 400, {'error': 'Missing argument: {}'.format(error.args[0])}
+        except (ValueError, TypeError, AttributeError) as error:
+            return 'error', 400, {'error': str(error)}
+        except WorkerError as error:
+            return 'error', 500, {'error': str(error)}
+
+    async def new_session(self, arguments):
+        """
+        Create a session and its tree in its worker
+
+        :param arguments: dict with the game name and the arguments of the game class
+        :return: dict of the session id
+        """
+        if arguments.get('game') not in GAMES:
+            raise ValueError('Unknown game, one of {}'.format(sorted(GAMES)))
+        if len(self.sessions) >= self.max_sessions:
+            self.close_session(next(iter(self.sessions)))   # least recently used session
+        session = uuid.uuid4().hex
+        self.sessions[session] = time.time()
+        try:
+            return await self.pool.run('new', session, {'game': arguments['game'],
+                                                        'game_kwargs': arguments.get('game_kwargs', {})})
+        except Exception:
+            self.sessions.pop(session, None)
+            raise
+
+    def stats(self):
+        """
+        Number of sessions and latency percentiles (milliseconds) by endpoint
+
+        :return: dict
+        """
+        latencies = {endpoint: {'requests': len(values),
+                                'p50': float(np.percentile(values, 50)) * 1000,
+                                'p99': float(np.percentile(values, 99)) * 1000}
+                     for endpoint, values in self.latencies.items() if values}
+        return {'sessions': len(self.sessions), 'evicted': self.n_evicted, 'workers': self.n_workers,
+                'worker_restarts': self.pool.n_restarts, 'latency_ms': latencies}
+
+
+class RecommendationClient:
+    """
+    Asyncio client of a RecommendationServer keeping its connection open between requests
+    """
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host='127.0.0.1', port=8080, path=None):
+        """
+        Open the connection
+
+        :param host: host of the TCP server
+        :param port: TCP port
+        :param path: path of the Unix socket, used instead of the TCP port if given
+        :return: nothing
+        """
+        if path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def request(self, method, target, arguments=None):
+        """
+        Send a request and wait for its response
+
+        :param method: HTTP method
+        :param target: request path
+        :param arguments: JSON serializable body
+        :return: (HTTP status, decoded JSON result)
+        """
+        payload = json.dumps(arguments).encode() if arguments is not None else b''
+        self.writer.write('{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n'.format(
+            method, target, len(payload)).encode('latin1') + payload)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = (await self.reader.readline()).decode('latin1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads((await self.reader.readexactly(length)).decode())
+
+    async def close(self):
+        """
+        Close the connection
+
+        :return: nothing
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def main():
+    """
+    Run the server on a local TCP port
+    """
+    logging.basicConfig(level=logging.INFO)
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = RecommendationServer()
+    loop.run_until_complete(server.start(port=port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+
+
+if __name__ == "__main__":
+    main()
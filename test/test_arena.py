@@ -0,0 +1,34 @@
+import unittest
+
+from arena import Engine, match, tournament
+from games.tictactoe import Game
+
+
+class TestArena(unittest.TestCase):
+
+    def test_match(self):
+        strong, weak = Engine('strong', max_iterations=200), Engine('weak', max_iterations=1, solver=False)
+        result = match(Game, strong, weak, n_games=6, n_workers=1)
+        self.assertEqual(result.n_games, 6)
+        self.assertEqual(result.wins + result.draws + result.losses, 6)
+        self.assertGreater(result.score, 0.5)
+        results = result.as_dict()
+        # colours alternate so both engines play the same number of games first
+        self.assertGreater(results['think_time_per_move'][0], results['think_time_per_move'][1])
+        self.assertGreater(results['playouts_per_move'][0], 10 * results['playouts_per_move'][1])
+        self.assertLessEqual(results['elo_interval'][0], results['elo'])
+        # the SPRT stops a lopsided match early
+        result = match(Game, strong, weak, n_games=100, n_workers=2, sprt_elos=(0, 100), min_games=6)
+        self.assertEqual(result.decision, 'H1')
+        self.assertLess(result.n_games, 100)
+
+    def test_tournament(self):
+        engines = [Engine('a', max_iterations=20), Engine('b', max_iterations=20, c_=1.4),
+                   Engine('c', max_iterations=20, solver=False)]
+        results = tournament(Game, engines, n_games=2, n_workers=1)
+        self.assertEqual([result.names for result in results], [['a', 'b'], ['a', 'c'], ['b', 'c']])
+        self.assertEqual([result.n_games for result in results], [2, 2, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
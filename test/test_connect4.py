@@ -56,6 +56,32 @@ class TestConnect4Methods(unittest.TestCase):
         self.game.play(move=move)
         self.assertEqual(self.game.winner(), self.game.players[1])
 
+    def test_undo(self):
+        state = self.game.state
+        player = self.game.current_player
+        for move in [6, 0, 4]:
+            self.game.play(move=move)
+        self.assertIsNotNone(self.game.winner())
+        for _ in range(3):
+            self.game.undo()
+        self.assertIsNone(self.game.winner())
+        self.assertEqual(self.game.current_player, player)
+        self.assertEqual(self.game.last_play, 4)
+        self.assertEqual(len(self.game.history), 12)
+        np.testing.assert_array_equal(self.game.state, state)
+
+    def test_copy(self):
+        state = self.game.state
+        game = self.game.copy()
+        game.play(move=0)
+        np.testing.assert_array_equal(self.game.state, state)
+        self.assertEqual(game.state[5, 0], self.game.current_player.value)
+        self.assertEqual(len(game.history), 2)
+        game.undo()
+        np.testing.assert_array_equal(game.state, state)
+        with self.assertRaises(ValueError):
+            game.undo()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+from games.connect4 import Game, NumpyGame
+
+
+class TestConnect4BitboardMethods(unittest.TestCase):
+
+    def assert_same_game(self, game, reference):
+        np.testing.assert_array_equal(game.state, reference.state)
+        self.assertEqual(game.legal_plays(), reference.legal_plays())
+        self.assertEqual(game.winner(), reference.winner())
+        self.assertEqual(game.current_player, reference.current_player)
+        self.assertEqual(game.last_play, reference.last_play)
+
+    def play_random_games(self, board_size, n_games, seed):
+        random_state = np.random.RandomState(seed)
+        for _ in range(n_games):
+            game = Game(board_size=board_size)
+            reference = NumpyGame(board_size=board_size)
+            self.assert_same_game(game, reference)
+            while reference.legal_plays():
+                legal_plays = reference.legal_plays()
+                move = legal_plays[random_state.randint(len(legal_plays))]
+                game.play(move)
+                reference.play(move)
+                self.assert_same_game(game, reference)
+            for state, reference_state in zip(game.history, reference.history):
+                np.testing.assert_array_equal(state, reference_state)
+            # unwinding the game goes through the same states backwards
+            for reference_state in reference.history[-2::-1]:
+                game.undo()
+                np.testing.assert_array_equal(game.state, reference_state)
+            self.assertEqual(game.legal_plays(), list(range(board_size[1])))
+
+    def test_random_games(self):
+        self.play_random_games(board_size=(6, 7), n_games=300, seed=0)
+
+    def test_random_games_other_size(self):
+        self.play_random_games(board_size=(5, 8), n_games=100, seed=1)
+
+    def test_illegal_move(self):
+        game = Game()
+        for move in [0, 1] * 3:
+            game.play(move)
+        with self.assertRaises(ValueError):
+            game.play(7)
+        game.play(0)
+        self.assertEqual(game.winner(), game.players[0])
+        with self.assertRaises(ValueError):
+            game.play(2)
+
+    def test_random_play(self):
+        np.random.seed(0)
+        game = Game(save_history=False)
+        while game.legal_plays():
+            game.play()
+        self.assertEqual(len(game.history), 1)
+        self.assertGreater(np.count_nonzero(game.state), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from games.tictactoe import Game
+from mcts import MonteCarloTreeSearch
+from utils.diagnostics import TreeSnapshotter, read_snapshots
+
+
+class TestDiagnosticsMethods(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.tree = MonteCarloTreeSearch(game=Game())
+
+    def test_interval(self):
+        snapshotter = TreeSnapshotter(interval=50, max_depth=1, top_k=3)
+        self.tree.search(max_iterations=120, max_runtime=20, snapshotter=snapshotter)
+        self.assertEqual([s['iteration'] for s in snapshotter.snapshots], [50, 100])
+        root = snapshotter.snapshots[-1]['root']
+        self.assertEqual(root['n_plays'], 100)
+        self.assertEqual(len(root['children']), 3)
+        plays = [child['n_plays'] for child in root['children']]
+        self.assertEqual(plays, sorted(plays, reverse=True))
+        self.assertNotIn('children', root['children'][0])
+
+    def test_on_demand_output(self):
+        self.tree.search(max_iterations=100, max_runtime=20)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshots.jsonl')
+            snapshotter = TreeSnapshotter(max_depth=2, top_k=2, output=path)
+            snapshotter.snapshot(self.tree)
+            snapshotter.snapshot(self.tree)
+            snapshots = read_snapshots(path)
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(snapshotter.snapshots, [])
+        root = snapshots[0]['root']
+        self.assertIsNone(snapshots[0]['iteration'])
+        self.assertEqual(root['n_plays'], 100)
+        self.assertIn(tuple(root['children'][0]['move']), Game().legal_plays())
+        self.assertLessEqual(len(root['children'][0]['children']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
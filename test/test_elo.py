@@ -0,0 +1,33 @@
+import math
+import unittest
+
+from utils.elo import score_elo, elo_score, elo_interval, sprt_llr, sprt, sprt_bounds
+
+
+class TestElo(unittest.TestCase):
+
+    def test_elo(self):
+        self.assertEqual(score_elo(0.5), 0.)
+        self.assertAlmostEqual(score_elo(0.75), 190.85, places=2)
+        self.assertAlmostEqual(elo_score(score_elo(0.3)), 0.3)
+        self.assertEqual(score_elo(1.), math.inf)
+        elo, lower, upper = elo_interval(60, 20, 20)
+        self.assertAlmostEqual(elo, score_elo(0.7))
+        self.assertLess(lower, elo)
+        self.assertLess(elo, upper)
+        # more games give a narrower interval
+        _, more_lower, more_upper = elo_interval(600, 200, 200)
+        self.assertLess(more_upper - more_lower, upper - lower)
+
+    def test_sprt(self):
+        lower, upper = sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(upper, math.log(19))
+        self.assertAlmostEqual(lower, -upper)
+        self.assertEqual(sprt_llr(10, 0, 0, 0, 50), 0.)   # no variance yet
+        self.assertEqual(sprt(60, 20, 20, elo0=0, elo1=50), 'H1')
+        self.assertEqual(sprt(400, 200, 400, elo0=0, elo1=50), 'H0')
+        self.assertIsNone(sprt(6, 2, 4, elo0=0, elo1=50))
+
+
+if __name__ == '__main__':
+    unittest.main()
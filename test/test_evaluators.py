@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from games import connect4
+from games.tictactoe import Game
+from utils.evaluators import UniformEvaluator, MLPEvaluator
+
+
+class TestEvaluators(unittest.TestCase):
+
+    def test_uniform(self):
+        game = Game()
+        evaluator = UniformEvaluator(game)
+        priors, values = evaluator.evaluate(np.stack([evaluator.encode(game)] * 3))
+        np.testing.assert_allclose(priors, np.full((3, 9), 1. / 9))
+        np.testing.assert_array_equal(values, [0., 0., 0.])
+
+    def test_mlp(self):
+        game = connect4.Game()
+        evaluator = MLPEvaluator(game, n_hidden=16)
+        inputs = [evaluator.encode(game)]
+        game.play(3)
+        inputs.append(evaluator.encode(game))
+        # the stone of the first player is on the opponent plane of the second player
+        self.assertEqual((inputs[1][:42].sum(), inputs[1][42:].sum()), (0, 1))
+        priors, values = evaluator.evaluate(np.stack(inputs))
+        self.assertEqual(priors.shape, (2, 7))
+        np.testing.assert_allclose(priors.sum(axis=1), [1., 1.], rtol=1e-5)
+        self.assertTrue(np.all(np.abs(values) <= 1.))
+        # a batch gives the same results as the positions one by one
+        single_priors, single_values = evaluator.evaluate(inputs[1][np.newaxis])
+        np.testing.assert_allclose(single_priors[0], priors[1], rtol=1e-5)
+        self.assertAlmostEqual(float(single_values[0]), float(values[1]), places=5)
+        # weights are saved and loaded
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.npz')
+            evaluator.save(path)
+            loaded_priors, loaded_values = MLPEvaluator.load(path, game).evaluate(np.stack(inputs))
+        np.testing.assert_array_equal(loaded_priors, priors)
+        np.testing.assert_array_equal(loaded_values, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
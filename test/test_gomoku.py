@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+from games.gomoku import Game
+from mcts import MonteCarloTreeSearch
+from utils.rollouts import line_windows
+
+
+class TestGomokuMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.game = Game(board_size=(7, 9), n_in_a_row=4)
+
+    def test_first_move(self):
+        self.assertEqual(self.game.legal_plays(), [(3, 4)])
+        self.game.play((0, 0))
+        self.assertEqual(self.game.legal_plays(), [(0, 1), (1, 0), (1, 1)])
+
+    def test_candidates(self):
+        self.game.play((3, 4))
+        self.game.play((3, 5))
+        self.assertEqual(self.game.legal_plays(), [(2, 3), (2, 4), (2, 5), (2, 6), (3, 3), (3, 6), (4, 3), (4, 4),
+                                                   (4, 5), (4, 6)])
+        self.game.undo()
+        self.assertEqual(len(self.game.legal_plays()), 8)
+        with self.assertRaises(ValueError):
+            self.game.play((3, 4))
+        with self.assertRaises(ValueError):
+            self.game.play((7, 0))
+
+    def test_winner(self):
+        for move in [(0, 0), (6, 8), (1, 1), (6, 7), (2, 2), (6, 6)]:
+            self.game.play(move)
+        self.assertIsNone(self.game.winner())
+        self.game.play((3, 3))
+        self.assertEqual(self.game.winner(), self.game.players[0])
+        self.assertEqual(self.game.legal_plays(), [])
+        self.game.undo()
+        self.assertIsNone(self.game.winner())
+
+    def test_random_games(self):
+        # candidates, winner and hash updated at each move are the same as the ones computed from the board
+        np.random.seed(0)
+        windows, _ = line_windows(7, 9, 4)
+        for radius in [1, 2]:
+            for _ in range(10):
+                game = Game(board_size=(7, 9), n_in_a_row=4, radius=radius)
+                while game.legal_plays():
+                    game.play()
+                    line_sums = np.append(game.state.ravel(), 0)[windows].sum(axis=1)
+                    winners = [player for player in game.players if 4 * player.value in line_sums]
+                    self.assertEqual(game.winner(), winners[0] if winners else None)
+                    if not winners:
+                        stones = np.pad(game.state != 0, radius)
+                        around = sum(np.roll(np.roll(stones, d_row, 0), d_col, 1)
+                                     for d_row in range(-radius, radius + 1) for d_col in range(-radius, radius + 1))
+                        around = around[radius:-radius, radius:-radius]
+                        candidates = np.argwhere((around > 0) & (game.state == 0)).tolist()
+                        self.assertEqual(game.legal_plays(), list(map(tuple, candidates)))
+                while game.n_moves:
+                    game.undo()
+                self.assertEqual(game.legal_plays(), [(3, 4)])
+                self.assertEqual(game.hash, 0)
+
+    def test_copy(self):
+        self.game.play((3, 4))
+        game = self.game.copy()
+        game.play((3, 5))
+        self.assertEqual(len(self.game.legal_plays()), 8)
+        self.assertEqual(len(game.history), 2)
+        game.undo()
+        self.assertEqual(game.legal_plays(), self.game.legal_plays())
+
+    def test_search(self):
+        np.random.seed(0)
+        for move in [(3, 2), (0, 0), (3, 3), (0, 8), (3, 4), (6, 0)]:
+            self.game.play(move)
+        tree = MonteCarloTreeSearch(game=self.game)
+        tree.search(max_iterations=500, max_runtime=np.inf)
+        self.assertIn(tree.recommended_play(), [(3, 1), (3, 5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,24 +1,24 @@
 import unittest
 import logging
-from copy import deepcopy
 
-from anytree import Node, PreOrderIter, LevelOrderGroupIter
+import numpy as np
+from anytree import PreOrderIter, LevelOrderGroupIter
 from anytree.search import findall
 
 from mcts import MonteCarloTreeSearch
+from utils.tree import PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS, UNPROVEN, ROOT
 from games.tictactoe import Game
+from utils.evaluators import UniformEvaluator, MLPEvaluator
+from utils.scoring import ucb1_array, average_wins_array
 
 
 class TestMCTSMethods(unittest.TestCase):
 
     def make_level(self, starting_node, n_nodes):
         possible_plays = starting_node.game.legal_plays()
-        for i in range(n_nodes):
-            new_game = deepcopy(starting_node.game)
+        for _ in range(n_nodes):
             move = possible_plays.pop()
-            new_game.play(move)
-            new_name = starting_node.name + '_' + str(i)
-            _ = Node(name=new_name, parent=starting_node, game=new_game, **self.tree.node_init_params)
+            self.tree.expand(starting_node.id, move=move)
 
     def update_nodes(self, n_plays, n_wins, n_ties=0, nodes=None, node_names=None, include_ancestors=False):
         # get selection as nodes
@@ -68,7 +68,7 @@ class TestMCTSMethods(unittest.TestCase):
         node_name = '0_6'
         self.update_nodes(node_names=[node_name], n_plays=50, n_wins=45)
 
-        selected_node = self.tree.select()   # to update scores
+        selected_node = self.tree.node(self.tree.select())   # to update scores
         self.assertEqual(node_name, selected_node.name)
 
     def test_select_level2(self):
@@ -79,7 +79,7 @@ class TestMCTSMethods(unittest.TestCase):
         node_name = '0_3_6'
         self.update_nodes(node_names=[node_name], include_ancestors=True, n_plays=50, n_wins=45)
 
-        selected_node = self.tree.select()   # to update scores
+        selected_node = self.tree.node(self.tree.select())   # to update scores
         self.assertEqual(node_name, selected_node.name)
 
     def test_select_level3(self):
@@ -91,20 +91,20 @@ class TestMCTSMethods(unittest.TestCase):
         node = findall(self.tree.root, filter_=lambda n: n.name == node_name)[0]
         self.update_nodes(node_names=[node_name], include_ancestors=True, n_plays=50, n_wins=45)
 
-        selected_node = self.tree.select()   # to update scores
+        selected_node = self.tree.node(self.tree.select())   # to update scores
         self.assertEqual(node.parent.name, selected_node.name)   # because node is not fully expanded
 
     def test_expand(self):
         # expand one node
         node = self.tree.root.children[3].children[4]
         n_nodes_before_expand = len(list(PreOrderIter(self.tree.root)))
-        self.tree.expand(node)
+        self.tree.expand(node.id)
         n_nodes_after_expand = len(list(PreOrderIter(self.tree.root)))
 
         self.assertEqual(n_nodes_before_expand+1, n_nodes_after_expand)
 
     def test_simulate(self):
-        n_wins, _ = self.tree.simulate(node=self.tree.root, n_simulations=100)
+        n_wins, _ = self.tree.simulate(node=self.tree.root.id, n_simulations=100)
         self.assertGreater(n_wins, 1)
 
     def test_backpropagate1(self):
@@ -114,7 +114,7 @@ class TestMCTSMethods(unittest.TestCase):
         total_plays_before = sum([n.n_plays for n in PreOrderIter(self.tree.root)])
 
         # perform backpropagation
-        self.tree.backpropagate(node, n_plays=100, n_wins=10, n_ties=0)
+        self.tree.backpropagate(node.id, n_plays=100, n_wins=10, n_ties=0)
         total_plays_after = sum([n.n_plays for n in PreOrderIter(self.tree.root)])
         total_wins_after = sum([n.n_wins for n in PreOrderIter(self.tree.root)])
 
@@ -128,7 +128,7 @@ class TestMCTSMethods(unittest.TestCase):
         # select a node from which backpropagation start
         node_name = '0_3_6'
         node = findall(self.tree.root, filter_=lambda n: n.name == node_name)[0]
-        self.tree.backpropagate(node, n_plays=20, n_wins=6, n_ties=0)
+        self.tree.backpropagate(node.id, n_plays=20, n_wins=6, n_ties=0)
 
         # root node stats
         root_plays = self.tree.root.n_plays
@@ -140,7 +140,28 @@ class TestMCTSMethods(unittest.TestCase):
         level1_wins = sum([node.n_wins for node in level1_nodes])
 
         self.assertEquals(root_plays, level1_plays)
-        self.assertEquals(root_wins, level1_wins)
+        # wins of each node are the wins of the player who moved into it
+        self.assertEquals(root_wins, level1_plays - level1_wins)
+
+    def test_backpropagate_negamax(self):
+        self.update_nodes(nodes=list(PreOrderIter(self.tree.root)), n_plays=0, n_wins=0)
+        node = findall(self.tree.root, filter_=lambda n: n.name == '0_3_4_1')[0]
+        # 7 wins of the root player, 1 tie and 2 wins of the other player
+        self.tree.backpropagate(node.id, n_plays=10, n_wins=7, n_ties=1)
+        wins = [n.n_wins for n in node.ancestors] + [node.n_wins]
+        self.assertEqual(wins, [2, 7, 2, 7])
+
+    def test_select_opponent(self):
+        # the opponent of the root player chooses the children that are best for itself
+        self.update_nodes(nodes=list(PreOrderIter(self.tree.root)), n_plays=100, n_wins=50)
+        level2 = self.tree.root.children[3]
+        self.update_nodes(nodes=[level2], n_plays=1000, n_wins=900)
+        self.update_nodes(nodes=list(level2.children), n_plays=100, n_wins=10)
+        best = level2.children[5]
+        self.update_nodes(nodes=[best], n_plays=100, n_wins=90)
+        self.tree.nodes.n_legal[level2.children[4].id] = 3   # only keep the level 2 nodes in the way
+        path = self.tree.select_path()
+        self.assertEqual(path[:3], [self.tree.root.id, level2.id, best.id])
 
     def test_recommend(self):
         # create fake wins and plays
@@ -149,7 +170,7 @@ class TestMCTSMethods(unittest.TestCase):
         # backpropagate good attributes to node where same player than root has to play
         node_name = '0_3_4'
         node = findall(self.tree.root, filter_=lambda n: node_name == n.name)[0]
-        self.tree.backpropagate(node, n_plays=1000, n_wins=999, n_ties=0)
+        self.tree.backpropagate(node.id, n_plays=1000, n_wins=999, n_ties=0)
 
         # corresponding level1 name
         node_to_recommend_name = '_'.join(node_name.split('_')[:2])
@@ -157,7 +178,265 @@ class TestMCTSMethods(unittest.TestCase):
 
         # move corresponding to node
         recommended_move = self.tree.recommended_play()
-        self.assertEqual(node_to_recommend.game.last_play, recommended_move)
+        self.assertEqual(node_to_recommend.move, recommended_move)
+
+    def test_advance(self):
+        tree = MonteCarloTreeSearch(game=Game(), solver=False)   # a solved root would stop the second search early
+        tree.search(max_iterations=300, max_runtime=20)
+        child = max(tree.root.children, key=lambda n: n.n_plays)
+        grandchild = max(child.children, key=lambda n: n.n_plays)
+        plays, wins, ties = grandchild.n_plays, grandchild.n_wins, grandchild.n_ties
+        moves = (child.move, grandchild.move)
+        # wins are counted for the player who moved into a node so they do not change with the root
+        child_plays, child_wins = child.n_plays, child.n_wins
+        tree.advance(moves[0])
+        self.assertEqual((tree.root.n_plays, tree.root.n_wins), (child_plays, child_wins))
+        tree.advance(moves[1])
+        self.assertEqual(tree.root.game.last_play, moves[1])
+        self.assertEqual((tree.root.n_plays, tree.root.n_wins, tree.root.n_ties), (plays, wins, ties))
+        self.assertEqual(sum(node.n_plays for node in tree.root.children), plays - 1)
+        tree.search(max_iterations=100, max_runtime=20)
+        self.assertEqual(tree.root.n_plays, plays + 100)
+        # a move that was never explored starts a new tree
+        tree = MonteCarloTreeSearch(game=Game())
+        tree.advance((1, 1))
+        self.assertEqual(tree.root.n_plays, 0)
+        self.assertEqual(tree.root.game.last_play, (1, 1))
+        self.assertEqual(len(tree.root.game.legal_plays()), 8)
+
+    def test_position(self):
+        tree = MonteCarloTreeSearch(game=Game(), state_cache_depth=1)
+        tree.search(max_iterations=300, max_runtime=20)
+        np.random.seed(0)
+        for node in np.random.randint(tree.nodes.size, size=50):
+            if tree.nodes.target[node] != node:
+                continue
+            # the scratch game goes from node to node and matches the game rebuilt from the root
+            np.testing.assert_array_equal(tree.position(node).state, tree.nodes.position(node).state)
+        self.assertEqual(len(tree.scratch.history), len(tree.scratch_chain) - tree.scratch_base + 1)
+        self.assertLessEqual(len(tree.state_cache), 10)
+
+    def test_search_stats(self):
+        tree = MonteCarloTreeSearch(game=Game())
+        streamed = []
+        stats = tree.search(max_iterations=100, max_runtime=20, collect_stats=True,
+                            stats_callback=lambda s: streamed.append(s.iterations), stats_interval=40)
+        self.assertEqual(streamed, [40, 80])
+        self.assertEqual(stats.playouts, 100)
+        self.assertEqual(stats.nodes_created, 100)
+        self.assertEqual(sum(stats.rollout_lengths.values()), 100)
+        self.assertLessEqual(max(stats.rollout_lengths), 9)
+        self.assertGreater(stats.phase_times['simulate'], 0)
+        self.assertGreaterEqual(stats.max_depth, stats.average_depth)
+        # without collection only the global counters are filled
+        stats = tree.search(max_iterations=50, max_runtime=20, n_simulations=2)
+        self.assertEqual((stats.playouts, stats.peak_nodes, stats.max_depth), (100, tree.n_nodes(), 0))
+        self.assertEqual(sum(stats.phase_times.values()), 0)
+
+    def test_solver(self):
+        game = Game()
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            game.play(move)
+        # (0, 2) wins at once for the player to move
+        tree = MonteCarloTreeSearch(game=game)
+        stats = tree.search(max_iterations=1000, max_runtime=20)
+        self.assertEqual(tree.recommended_play(), (0, 2))
+        winning_child = [child for child in tree.root.children if child.move == (0, 2)][0]
+        self.assertEqual(winning_child.proven, PROVEN_WIN)
+        self.assertEqual(tree.root.proven, PROVEN_LOSS)   # loss for the player who moved into the root
+        # the search stopped once the root was solved
+        self.assertLess(stats.iterations, 1000)
+        self.assertEqual(tree.root.n_plays, stats.iterations)
+        # without solver the whole budget is used
+        tree = MonteCarloTreeSearch(game=game, solver=False)
+        self.assertEqual(tree.search(max_iterations=300, max_runtime=20).iterations, 300)
+        self.assertEqual(tree.root.proven, UNPROVEN)
+
+    def test_solver_draw(self):
+        game = Game()
+        for move in [(0, 0), (1, 1), (2, 2), (0, 2), (2, 0), (1, 0), (1, 2)]:
+            game.play(move)
+        # B must block (2, 1) and the game ends in a draw
+        tree = MonteCarloTreeSearch(game=game)
+        tree.search(max_iterations=1000, max_runtime=20)
+        self.assertEqual(tree.root.proven, PROVEN_DRAW)
+        self.assertEqual(tree.recommended_play(), (2, 1))
+
+    def test_rave_transpositions(self):
+        tree = MonteCarloTreeSearch(game=Game(), transposition_size=1 << 10, rave_equivalence=10)
+        nodes = tree.nodes
+
+        def slot(parent, move):
+            first = nodes.first_child[parent]
+            return first + list(nodes.move[first:first + nodes.n_legal[parent]]).index(nodes.move_id(move))
+
+        node = tree.expand(tree.expand(tree.expand(ROOT, move=(0, 0)), move=(1, 1)), move=(0, 1))
+        # the same position reached by another move order
+        path = [ROOT, tree.expand(ROOT, move=(0, 1))]
+        path.append(tree.expand(path[-1], move=(1, 1)))
+        tree.path_moves = []
+        self.assertEqual(tree.expand(path[-1], move=(0, 0)), node)
+        self.assertEqual(tree.path_moves, [nodes.move_id((0, 0))])
+        tree.playouts = [([], 1)]
+        tree.backpropagate(node, n_plays=1, n_wins=1, n_ties=0, path=path + [node],
+                           moves=[nodes.move_id(move) for move in [(0, 1), (1, 1), (0, 0)]])
+        # the moves of this path are credited, not the ones of the move order that first reached the position
+        for parent, move, amaf in [(ROOT, (0, 0), (1, 1)), (ROOT, (0, 1), (1, 1)), (path[2], (0, 0), (1, 1))]:
+            self.assertEqual((nodes.amaf_plays[slot(parent, move)], nodes.amaf_wins[slot(parent, move)]), amaf)
+        # the selection records the moves of the slots it follows
+        np.random.seed(0)
+        tree.search(max_iterations=200, max_runtime=20)
+        path = tree.select_path()
+        self.assertEqual([nodes.target[slot(parent, nodes.moves[move])] for parent, move in zip(path, tree.path_moves)],
+                         path[1:])
+
+    def test_solver_transpositions(self):
+        # a node reached by several move orders is proven through one of its parents: the other ones must be proven too
+        for seed in range(3):
+            np.random.seed(seed)
+            tree = MonteCarloTreeSearch(game=Game(), transposition_size=1 << 16)
+            tree.search(max_iterations=3000, max_runtime=60)
+            nodes = tree.nodes
+            for node in range(nodes.size):
+                if nodes.target[node] == node and nodes.proven[node] == UNPROVEN and nodes.n_children[node]:
+                    self.assertFalse(np.any(nodes.proven[nodes.children_targets(node)] == PROVEN_WIN))
+        # the slots pointing to other nodes are recorded when they are linked and after the nodes are renumbered
+        tree = MonteCarloTreeSearch(game=Game(), transposition_size=1 << 16, max_nodes=400)
+        for move in [(1, 1), None]:
+            tree.search(max_iterations=1000, max_runtime=60)
+            targets = tree.nodes.target[:tree.nodes.size]
+            slots = np.flatnonzero((targets != np.arange(tree.nodes.size)) & (targets != -1))
+            self.assertGreater(len(slots), 0)
+            self.assertEqual({node: sorted(node_slots) for node, node_slots in tree.transposed_slots.items()},
+                             {int(node): slots[targets[slots] == node].tolist() for node in np.unique(targets[slots])})
+            if move is not None:
+                tree.advance(move)
+
+    def test_rave(self):
+        tree = MonteCarloTreeSearch(game=Game(), rave_equivalence=10)
+        child = tree.expand(tree.root.id, move=(0, 0))
+        # the root player then played (0, 1) and won, the other player played (1, 1)
+        tree.playouts = [([tree.nodes.move_id((1, 1)), tree.nodes.move_id((0, 1))], 1)]
+        tree.backpropagate(child, n_plays=1, n_wins=1, n_ties=0)
+        amaf = {tree.nodes.moves[tree.nodes.move[slot]]: (tree.nodes.amaf_plays[slot], tree.nodes.amaf_wins[slot])
+                for slot in range(tree.nodes.first_child[tree.root.id], tree.nodes.first_child[tree.root.id] + 9)}
+        self.assertEqual(amaf.pop((0, 0)), (1, 1))
+        self.assertEqual(amaf.pop((0, 1)), (1, 1))
+        self.assertEqual(set(amaf.values()), {(0, 0)})
+        self.assertEqual(tree.playouts, [])
+        # every playout going through a child played its move
+        tree.search(max_iterations=300, max_runtime=20)
+        for child in tree.nodes.children(tree.root.id):
+            self.assertGreaterEqual(tree.nodes.amaf_plays[child], tree.nodes.n_plays[child])
+            self.assertGreaterEqual(tree.nodes.amaf_plays[child], tree.nodes.amaf_wins[child])
+
+    def test_max_nodes(self):
+        tree = MonteCarloTreeSearch(game=Game(), solver=False, max_nodes=300)
+        stats = tree.search(max_iterations=2000, max_runtime=20)
+        self.assertLessEqual(tree.nodes.size, 300)
+        self.assertGreater(stats.pruned_nodes, 0)
+        self.assertGreater(stats.peak_rss, 0)
+        # statistics of the pruned subtrees are kept by their roots
+        self.assertEqual(tree.root.n_plays, 2000)
+        self.assertEqual(sum(child.n_plays for child in tree.root.children), 2000)
+        self.assertEqual(len(tree.root.children), 9)
+
+    def test_max_memory(self):
+        tree = MonteCarloTreeSearch(game=Game(), solver=False, max_memory=100000)
+        budget = tree.budget
+        stats = tree.search(max_iterations=2000, max_runtime=20)
+        self.assertGreater(stats.pruned_nodes, 0)
+        # the cached games are counted in the memory of the tree
+        self.assertGreater(len(tree.state_cache), 1)
+        self.assertEqual(tree.budget, tree.slots_budget())
+        self.assertLess(tree.budget, budget)
+        self.assertLessEqual(2 * tree.nodes.nbytes() / tree.nodes.capacity * tree.budget +
+                             len(tree.state_cache) * tree.state_nbytes, 100000)
+
+    def test_prune(self):
+        self.update_nodes(nodes=list(PreOrderIter(self.tree.root)), n_plays=10, n_wins=5)
+        kept = self.tree.root.children[3]
+        self.update_nodes(nodes=[kept], n_plays=100, n_wins=60)
+        n_removed = self.tree.prune(n_slots=1 + 9 + 8)
+        # the least played level 2 node lost its 3 children, its parent kept its level 2 children
+        self.assertEqual(n_removed, 3)
+        self.assertEqual(self.tree.nodes.size, 1 + 9 + 8)
+        kept = self.tree.root.children[3]
+        self.assertEqual((kept.n_plays, kept.n_wins, len(kept.children)), (100, 60, 8))
+        collapsed = kept.children[4]
+        self.assertEqual((collapsed.n_plays, len(collapsed.children)), (10, 0))
+        # a collapsed node is expanded again
+        self.assertNotEqual(self.tree.expand(collapsed.id), collapsed.id)
+
+    def test_root_parallel_search(self):
+        tree = MonteCarloTreeSearch(game=Game())
+        tree.search(max_iterations=41, max_runtime=20, n_workers=2)
+        children = tree.root.children
+        self.assertEqual(tree.root.n_plays, 41)
+        self.assertEqual(sum(child.n_plays for child in children), 41)
+        self.assertEqual(len(set(child.move for child in children)), len(children))
+        self.assertIn(tree.recommended_play(), Game().legal_plays())
+        # workers run the same search: their proofs and collected statistics are merged
+        game = Game()
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            game.play(move)
+        tree = MonteCarloTreeSearch(game=game, transposition_size=1 << 10, rave_equivalence=10, max_nodes=500,
+                                    c_=0.8)
+        self.assertEqual(MonteCarloTreeSearch(game=game, **tree.settings()).settings(), tree.settings())
+        stats = tree.search(max_iterations=2000, max_runtime=20, n_workers=2, collect_stats=True)
+        self.assertEqual(tree.root.proven, PROVEN_LOSS)
+        self.assertEqual(tree.recommended_play(), (0, 2))
+        self.assertGreater(stats.phase_times['simulate'], 0.)
+        self.assertGreater(stats.max_depth, 0)
+        self.assertEqual(sum(stats.rollout_lengths.values()), stats.playouts)
+
+    def test_scoring_func(self):
+        tree = MonteCarloTreeSearch(game=Game(), c_=0.1)
+        tree.search(max_iterations=100, max_runtime=20)
+        children = list(tree.nodes.children(ROOT))
+        tree.select()
+        expected = ucb1_array(tree.nodes.n_plays[children], tree.nodes.n_wins[children], tree.nodes.n_ties[children],
+                              total_plays=tree.nodes.n_plays[ROOT], c_=0.1)
+        np.testing.assert_allclose(tree.nodes.score[children], expected, atol=1e-5)
+        tree = MonteCarloTreeSearch(game=Game(), scoring_func=average_wins_array)
+        tree.search(max_iterations=100, max_runtime=20)
+        tree.select()
+        np.testing.assert_allclose(tree.nodes.score[children], average_wins_array(
+            tree.nodes.n_plays[children], tree.nodes.n_wins[children], tree.nodes.n_ties[children]))
+
+    def test_puct(self):
+        game = Game()
+        for move in [(0, 0), (1, 0), (0, 1), (1, 1)]:
+            game.play(move)
+        # (0, 2) wins at once for the player to move
+        tree = MonteCarloTreeSearch(game=game, evaluator=UniformEvaluator(game), batch_size=8)
+        stats = tree.search(max_iterations=1000, max_runtime=20)
+        self.assertEqual(tree.recommended_play(), (0, 2))
+        self.assertEqual(tree.root.proven, PROVEN_LOSS)
+        self.assertEqual(tree.root.n_plays, stats.iterations)
+        # no virtual loss is left once the search is over
+        tree = MonteCarloTreeSearch(game=Game(), evaluator=MLPEvaluator(Game()), solver=False, batch_size=16)
+        tree.search(max_iterations=200, max_runtime=20)
+        nodes = tree.nodes
+        self.assertEqual(nodes.n_plays[ROOT], 200)
+        for node in range(nodes.size):
+            children = list(nodes.children(node))
+            if children:
+                self.assertEqual(nodes.n_plays[children].sum(), nodes.n_plays[node] - 1)
+            self.assertLessEqual(abs(nodes.value_sum[node]), nodes.n_plays[node] + 1e-6)
+        first = nodes.first_child[ROOT]
+        self.assertAlmostEqual(float(nodes.prior[first:first + 9].sum()), 1., places=5)
+        # the tree is kept when moves are played
+        move = tree.recommended_play()
+        child_plays = max(child.n_plays for child in tree.root.children)
+        tree.advance(move)
+        self.assertEqual(tree.root.n_plays, child_plays)
+        tree.search(max_iterations=50, max_runtime=20)
+        self.assertEqual(tree.root.n_plays, child_plays + 50)
+        with self.assertRaises(ValueError):
+            MonteCarloTreeSearch(game=Game(), evaluator=UniformEvaluator(Game()), rave_equivalence=10)
+        with self.assertRaises(ValueError):
+            tree.search(max_iterations=10, max_runtime=20, n_workers=2)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,109 @@
+import unittest
+
+import numpy as np
+from games.oware import Game
+from mcts import MonteCarloTreeSearch
+
+
+def position(pits, scores, player_index):
+    game = Game()
+    game.boards[0] = pits + scores
+    game.player_index = player_index
+    game.current_player = game.players[player_index]
+    game.legal = game.moving_plays(game.boards[0].tolist())
+    return game
+
+
+class TestOwareMethods(unittest.TestCase):
+
+    def test_sowing(self):
+        game = Game()
+        self.assertEqual(game.legal_plays(), [0, 1, 2, 3, 4, 5])
+        game.play(2)
+        np.testing.assert_array_equal(game.state, [4, 4, 0, 5, 5, 5, 5, 4, 4, 4, 4, 4])
+        self.assertEqual(game.legal_plays(), [6, 7, 8, 9, 10, 11])
+        self.assertEqual(game.current_player, game.players[1])
+        with self.assertRaises(ValueError):
+            game.play(2)
+
+    def test_skip_emptied_pit(self):
+        game = position([12, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1], [15, 15], 0)
+        game.play(0)
+        np.testing.assert_array_equal(game.state, [0, 2, 1, 1, 1, 1, 2, 2, 2, 2, 2, 2])
+
+    def test_capture(self):
+        game = position([0, 0, 0, 0, 0, 2, 1, 2, 0, 0, 0, 4], [19, 20], 0)
+        game.play(5)
+        np.testing.assert_array_equal(game.state, [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4])
+        self.assertEqual(game.scores, [24, 20])
+        game.undo()
+        np.testing.assert_array_equal(game.state, [0, 0, 0, 0, 0, 2, 1, 2, 0, 0, 0, 4])
+        self.assertEqual(game.scores, [19, 20])
+
+    def test_grand_slam(self):
+        game = position([1, 0, 0, 0, 0, 2, 1, 2, 0, 0, 0, 0], [19, 23], 0)
+        game.play(5)
+        np.testing.assert_array_equal(game.state, [1, 0, 0, 0, 0, 0, 2, 3, 0, 0, 0, 0])
+        self.assertEqual(game.scores, [19, 23])
+        self.assertEqual(game.legal_plays(), [6, 7])
+
+    def test_feeding(self):
+        game = position([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0], [23, 23], 0)
+        self.assertEqual(game.legal_plays(), [5])
+
+    def test_starvation(self):
+        # once the second player emptied their side, the first player cannot feed them and captures their seeds
+        game = position([0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1], [23, 23], 1)
+        game.play(11)
+        self.assertEqual(game.legal_plays(), [])
+        self.assertEqual(game.scores, [25, 23])
+        self.assertEqual(game.winner(), game.players[0])
+        game.undo()
+        self.assertIsNone(game.winner())
+        self.assertEqual(game.legal_plays(), [11])
+        # the search proves that the only move of the second player loses
+        tree = MonteCarloTreeSearch(game=game)
+        tree.search(max_iterations=10, max_runtime=np.inf)
+        self.assertEqual(tree.nodes.proven[tree.nodes.children_targets(0)].tolist(), [-1])
+
+    def test_max_moves(self):
+        game = Game(max_moves=2)
+        game.play(0)
+        game.play(6)
+        self.assertEqual(game.legal_plays(), [])
+        self.assertIsNone(game.winner())
+        game.undo()
+        self.assertEqual(game.legal_plays(), [6, 7, 8, 9, 10, 11])
+
+    def test_random_games(self):
+        np.random.seed(0)
+        game = Game(save_history=False)
+        for _ in range(20):
+            hashes = []
+            while game.legal_plays():
+                hashes.append(game.hash)
+                game.play()
+                self.assertEqual(int(game.state.sum()) + sum(game.scores), 48)
+                self.assertTrue(game.state.min() >= 0)
+            self.assertTrue(game.winner() is None or max(game.scores) > 24)
+            while game.n_moves:
+                game.undo()
+                self.assertEqual(game.hash, hashes.pop())
+            self.assertEqual(game.legal_plays(), [0, 1, 2, 3, 4, 5])
+
+    def test_copy(self):
+        game = Game()
+        game.play(3)
+        copy = game.copy()
+        copy.play(8)
+        self.assertEqual(len(copy.history), 2)
+        np.testing.assert_array_equal(copy.history[0], game.state)
+        copy.undo()
+        self.assertEqual(copy.hash, game.hash)
+        self.assertEqual(copy.last_play, 3)
+        with self.assertRaises(ValueError):
+            copy.undo()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from games import connect4, tictactoe
+from utils import records
+
+
+class TestRecordsMethods(unittest.TestCase):
+
+    def random_games(self, game_class, n_games, **kwargs):
+        games = []
+        for _ in range(n_games):
+            game = game_class(**kwargs)
+            while game.legal_plays():
+                game.play()
+            games.append(game)
+        return games
+
+    def assert_same_games(self, games, loaded_games):
+        self.assertEqual(len(games), len(loaded_games))
+        for game, loaded_game in zip(games, loaded_games):
+            np.testing.assert_array_equal(game.state, loaded_game.state)
+            np.testing.assert_array_equal(game.record(), loaded_game.record())
+            self.assertEqual(game.hash, loaded_game.hash)
+
+    def save_and_load(self, games, game_class, **kwargs):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.rec')
+            records.save_games(path, games)
+            return records.load_games(path, game_class, **kwargs)
+
+    def test_save_load(self):
+        np.random.seed(0)
+        for game_class in [tictactoe.Game, connect4.Game]:
+            games = self.random_games(game_class, n_games=20)
+            self.assertEqual(games[0].record().dtype, np.int8)
+            self.assert_same_games(games, self.save_and_load(games, game_class))
+
+    def test_large_board(self):
+        np.random.seed(1)
+        games = self.random_games(tictactoe.Game, n_games=2, board_size=12)
+        self.assertEqual(games[0].record().dtype, np.int16)
+        self.assert_same_games(games, self.save_and_load(games, tictactoe.Game, board_size=12))
+
+    def test_empty(self):
+        self.assertEqual(self.save_and_load([], tictactoe.Game), [])
+        game = connect4.Game()
+        self.assertEqual(self.save_and_load([game], connect4.Game)[0].n_moves, 0)
+
+    def test_not_a_records_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.rec')
+            with open(path, 'wb') as file:
+                file.write(b'not a records file')
+            with self.assertRaises(ValueError):
+                records.load_records(path)
+
+    def test_copy_memory(self):
+        game = connect4.Game()
+        for move in [0, 1, 2, 3, 4, 5]:
+            game.play(move)
+        copy = game.copy()
+        self.assertEqual(copy.moves.nbytes, game.moves.nbytes)
+        self.assertEqual(copy.n_moves, 0)
+        self.assertEqual(len(copy.history), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+from utils.rollouts import line_windows, random_rollouts
+
+
+class TestRolloutsMethods(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def test_line_windows(self):
+        windows, cell_windows = line_windows(3, 3, 3)
+        self.assertEqual(len(windows) - 1, 8)   # last window is padding
+        self.assertEqual(sum(cell_windows[4] < 8), 4)   # center belongs to 4 lines
+        windows, _ = line_windows(6, 7, 4)
+        self.assertEqual(len(windows) - 1, 69)
+
+    def test_forced_win(self):
+        board = np.array([[[1, 1, 0], [-1, -1, 1], [1, -1, -1]]], dtype=np.int8)
+        results = random_rollouts(np.repeat(board, 10, axis=0), np.ones(10), n_in_a_row=3, gravity=False)
+        np.testing.assert_array_equal(results, np.ones(10))
+
+    def test_lengths(self):
+        board = np.array([[[1, 1, 0], [-1, -1, 0], [1, -1, 0]]], dtype=np.int8)
+        lengths = np.zeros(20, dtype=np.int64)
+        results = random_rollouts(np.repeat(board, 20, axis=0), np.ones(20), n_in_a_row=3, gravity=False,
+                                  lengths=lengths)
+        # the first player wins right away by playing the top right cell, or the game lasts 3 moves
+        np.testing.assert_array_equal(lengths[lengths == 1], np.ones(np.count_nonzero(lengths == 1)))
+        self.assertTrue(set(lengths) <= {1, 2, 3})
+        self.assertTrue(np.all(results[lengths == 1] == 1))
+
+    def test_forced_tie(self):
+        board = np.array([[[1, -1, 1], [1, -1, -1], [-1, 1, 0]]], dtype=np.int8)
+        results = random_rollouts(board, np.ones(1), n_in_a_row=3, gravity=False)
+        np.testing.assert_array_equal(results, [0])
+
+    def test_already_won(self):
+        board = np.zeros((1, 3, 3), dtype=np.int8)
+        results = random_rollouts(board, np.ones(1), n_in_a_row=3, gravity=False, winners=[-1])
+        np.testing.assert_array_equal(results, [-1])
+
+    def test_gravity(self):
+        # only the top right cell is free: it completes an anti-diagonal for the first player
+        board = np.array([[[-1, 1, -1, 0],
+                           [1, -1, 1, -1],
+                           [-1, 1, -1, 1],
+                           [1, -1, 1, 1]]], dtype=np.int8)
+        results = random_rollouts(board, np.ones(1), n_in_a_row=4, gravity=True)
+        np.testing.assert_array_equal(results, [1])
+        results = random_rollouts(board, -np.ones(1), n_in_a_row=4, gravity=True)
+        np.testing.assert_array_equal(results, [0])
+        # in an empty column stones fall to the bottom
+        column = np.array([[[0], [0], [0], [0]]], dtype=np.int8)
+        results = random_rollouts(column, np.ones(1), n_in_a_row=2, gravity=True)
+        np.testing.assert_array_equal(results, [0])
+
+    def test_tictactoe_distribution(self):
+        # known outcome of random TicTacToe games: 58.5% first player wins, 28.8% second player wins, 12.7% ties
+        results = random_rollouts(np.zeros((20000, 3, 3), dtype=np.int8), np.ones(20000), n_in_a_row=3, gravity=False)
+        self.assertAlmostEqual(np.mean(results == 1), 0.585, delta=0.02)
+        self.assertAlmostEqual(np.mean(results == -1), 0.288, delta=0.02)
+        self.assertAlmostEqual(np.mean(results == 0), 0.127, delta=0.02)
+
+    def test_connect4_distribution(self):
+        n_games = 2000
+        results = random_rollouts(np.zeros((n_games, 6, 7), dtype=np.int8), np.ones(n_games), n_in_a_row=4,
+                                  gravity=True)
+        sequential_wins = 0
+        for _ in range(n_games):
+            game = connect4.Game(save_history=False)
+            while game.legal_plays():
+                game.play()
+            sequential_wins += game.winner() == game.players[0]
+        self.assertAlmostEqual(np.mean(results == 1), sequential_wins / n_games, delta=0.05)
+
+    def test_simulate_batch(self):
+        game = tictactoe.Game()
+        for move in [(0, 0), (1, 1), (0, 1)]:
+            game.play(move)
+        tree = MonteCarloTreeSearch(game=game)
+        winning_node = tree.expand(0, move=(2, 2))
+        losing_node = tree.expand(0, move=(1, 0))
+        tree.expand(losing_node, move=(0, 2))
+        losing_node = tree.nodes.first_child[losing_node]   # first player completes the top row
+        n_wins, n_ties = tree.simulate_batch([winning_node, losing_node], n_simulations=[50, 20])
+        self.assertEqual(n_wins[1], 0)
+        self.assertEqual(n_ties[1], 0)
+        self.assertLessEqual(n_wins[0] + n_ties[0], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
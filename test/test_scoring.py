@@ -1,7 +1,8 @@
 import unittest
 
 import numpy as np
-from utils.scoring import average_wins, ucb1
+from utils.scoring import average_wins, ucb1, thompson, average_wins_array, ucb1_array, thompson_array, \
+    rave_ucb1_array, puct_array, visits_array
 
 
 class TestScoringMethods(unittest.TestCase):
@@ -41,6 +42,47 @@ class TestScoringMethods(unittest.TestCase):
 
         self.assertAlmostEqual(score, 0.9071, places=4)
 
+    def test_ucb1_array(self):
+        plays = np.array([0, 50, 4])
+        wins = np.array([0, 30, 1])
+        ties = np.array([0, 20, 0])
+        scores = ucb1_array(plays, wins, ties, total_plays=100, c_=0.5)
+        expected = [ucb1(p, w, t, total_plays=100, c_=0.5) for p, w, t in zip(plays, wins, ties)]
+        np.testing.assert_allclose(scores, expected, atol=1e-5)
+
+    def test_average_wins_array(self):
+        scores = average_wins_array(np.array([0, 100, 4]), np.array([0, 33, 4]), np.array([0, 10, 0]))
+        np.testing.assert_allclose(scores, [99., 0.33, 1.])
+
+    def test_thompson_array(self):
+        np.random.seed(0)
+        scores = thompson_array(np.array([0, 1000, 1000]), np.array([0, 900, 100]), np.array([0, 0, 0]))
+        self.assertEqual(scores[0], 99.)
+        self.assertAlmostEqual(scores[1], 0.9, places=1)
+        self.assertAlmostEqual(scores[2], 0.1, places=1)
+        self.assertTrue(0. <= thompson(10, 5, 0) <= 1.)
+
+    def test_rave_ucb1_array(self):
+        plays, wins, ties = np.array([0, 50, 4, 4]), np.array([0, 30, 1, 1]), np.array([0, 20, 0, 0])
+        amaf_plays, amaf_wins = np.array([10, 0, 100, 100]), np.array([5, 0, 90, 10])
+        scores = rave_ucb1_array(plays, wins, ties, total_plays=100, c_=0.5, amaf_plays=amaf_plays,
+                                 amaf_wins=amaf_wins, equivalence=1e9)
+        self.assertEqual(scores[0], 99.)
+        # without AMAF statistics the score is the UCB1 score, with a huge equivalence the AMAF average is used
+        self.assertAlmostEqual(scores[1], ucb1(50, 30, 20, total_plays=100, c_=0.5), places=5)
+        self.assertGreater(scores[2], scores[3])
+        self.assertAlmostEqual(scores[3], 0.1 + 0.5 * np.sqrt(np.log(100) / 4), places=3)
+
+    def test_puct_array(self):
+        plays, value_sums, priors = np.array([0, 10, 10]), np.array([0., 5., -5.]), np.array([0.5, 0.25, 0.25])
+        scores = puct_array(plays, value_sums, priors, total_plays=20, c_puct=1.5)
+        np.testing.assert_allclose(scores, [0.75 * np.sqrt(20), 0.5 + 0.375 * np.sqrt(20) / 11,
+                                            -0.5 + 0.375 * np.sqrt(20) / 11])
+        # unvisited arms are ranked by their prior, and a root without plays still uses the priors
+        scores = puct_array(np.zeros(3), np.zeros(3), priors, total_plays=0, unvisited_value=-1.)
+        self.assertEqual(int(np.argmax(scores)), 0)
+        np.testing.assert_allclose(visits_array(plays), plays)
+
 
 if __name__ == '__main__':
     unittest.main()
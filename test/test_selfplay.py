@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+
+import numpy as np
+from games import connect4
+from games.tictactoe import Game
+from selfplay import self_play
+from utils.evaluators import UniformEvaluator
+from utils.shards import ShardReader
+
+
+class TestSelfPlay(unittest.TestCase):
+
+    def test_self_play(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report = self_play(directory, Game, n_games=6, max_iterations=50, n_workers=1, commit_every=4)
+            reader = ShardReader(directory)
+            self.assertEqual((report['games'], report['positions']), (6, len(reader)))
+            self.assertEqual(reader.metadata['n_games'], 6)
+            rows = reader[:]
+            # every game starts on an empty board, the first player being to move
+            starts = np.flatnonzero(np.all(rows['boards'] == 0, axis=(1, 2)))
+            self.assertEqual(len(starts), 6)
+            np.testing.assert_array_equal(rows['players'][starts], 0)
+            self.assertTrue(np.all(rows['visits'].sum(axis=1) > 0))
+            self.assertTrue(set(rows['results']) <= {-1, 0, 1})
+            # both players of a game get opposite results
+            for start, stop in zip(starts, list(starts[1:]) + [len(reader)]):
+                results = rows['results'][start:stop]
+                np.testing.assert_array_equal(results[::2], results[0])
+                np.testing.assert_array_equal(results[1::2], -results[0])
+            # a resumed run adds the missing games, which are the same as with a single run in worker processes
+            report = self_play(directory, Game, n_games=8, max_iterations=50, n_workers=1)
+            self.assertEqual(report['games'], 2)
+            resumed = ShardReader(directory)[:]
+            with tempfile.TemporaryDirectory() as other_directory:
+                self_play(other_directory, Game, n_games=8, max_iterations=50, n_workers=2)
+                single = ShardReader(other_directory)[:]
+            for field in ('boards', 'visits', 'results'):
+                np.testing.assert_array_equal(resumed[field], single[field])
+            with self.assertRaises(ValueError):
+                self_play(directory, Game, n_games=10, seed=1)
+
+    def test_self_play_puct(self):
+        game = connect4.Game()
+        with tempfile.TemporaryDirectory() as directory:
+            self_play(directory, connect4.Game, n_games=1, max_iterations=30, evaluator=UniformEvaluator(game),
+                      n_workers=1)
+            rows = ShardReader(directory)[:]
+        self.assertEqual(rows['boards'].shape[1:], (6, 7))
+        self.assertEqual(rows['visits'].shape[1], 7)
+
+    def test_resume_tuple_kwargs(self):
+        game_kwargs = {'board_size': (4, 5)}
+        with tempfile.TemporaryDirectory() as directory:
+            self_play(directory, connect4.Game, n_games=1, game_kwargs=game_kwargs, max_iterations=10, n_workers=1)
+            report = self_play(directory, connect4.Game, n_games=2, game_kwargs=game_kwargs, max_iterations=10,
+                               n_workers=1)
+            reader = ShardReader(directory)
+        self.assertEqual(report['games'], 1)
+        self.assertEqual(reader.metadata['n_games'], 2)
+        self.assertEqual(reader.metadata['game_kwargs'], {'board_size': [4, 5]})
+        self.assertEqual(reader[0]['boards'].shape, (4, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
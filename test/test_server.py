@@ -0,0 +1,125 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from games.tictactoe import Game
+from server import MAX_BODY, RecommendationServer, RecommendationClient
+
+
+class TestServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RecommendationServer(n_workers=2, idle_timeout=60., max_sessions=3)
+        self.port = await self.server.start(port=0)
+        self.client = RecommendationClient()
+        await self.client.connect(port=self.port)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.stop()
+
+    async def test_session(self):
+        status, result = await self.client.request('POST', '/sessions', {'game': 'tictactoe'})
+        self.assertEqual(status, 200)
+        session = '/sessions/{}'.format(result['session'])
+        game = Game()
+        while game.legal_plays():
+            status, result = await self.client.request('POST', session + '/recommend',
+                                                       {'time_budget': 0.02, 'max_iterations': 200})
+            self.assertEqual(status, 200)
+            move = tuple(result['move'])
+            self.assertIn(move, game.legal_plays())
+            self.assertLessEqual(result['iterations'], 200)
+            game.play(move)
+            status, result = await self.client.request('POST', session + '/moves', {'move': list(move)})
+            self.assertEqual((status, result['n_moves'], result['over']), (200, game.n_moves, not game.legal_plays()))
+        self.assertEqual((await self.client.request('POST', session + '/recommend', {}))[0], 400)
+        self.assertEqual((await self.client.request('DELETE', session))[0], 200)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': [0, 0]}))[0], 404)
+        status, result = await self.client.request('GET', '/stats')
+        self.assertEqual((result['sessions'], result['evicted']), (0, 0))
+        self.assertEqual(result['latency_ms']['moves']['requests'], game.n_moves)
+        self.assertLessEqual(result['latency_ms']['moves']['p50'], result['latency_ms']['moves']['p99'])
+
+    async def test_errors(self):
+        self.assertEqual((await self.client.request('POST', '/sessions', {'game': 'chess'}))[0], 400)
+        self.assertEqual((await self.client.request('POST', '/sessions', {'game': 'tictactoe',
+                                                                          'game_kwargs': {'size': 3}}))[0], 400)
+        self.assertEqual((await self.client.request('GET', '/unknown'))[0], 404)
+        status, result = await self.client.request('POST', '/sessions', {'game': 'connect4'})
+        session = '/sessions/{}'.format(result['session'])
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': 9}))[0], 400)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {}))[0], 400)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': 3}))[0], 200)
+        self.assertEqual((await self.client.request('GET', '/stats'))[1]['sessions'], 1)
+        # malformed bodies are rejected without closing the connection
+        self.assertEqual((await self.client.request('POST', '/sessions', [1, 2]))[0], 400)
+        self.assertEqual((await self.client.request('POST', session + '/recommend', {'time_budget': None}))[0], 400)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': 2}))[0], 200)
+
+    async def test_oversized_body(self):
+        status, result = await self.client.request('POST', '/sessions', {'game': 'x' * MAX_BODY})
+        self.assertEqual(status, 413)
+        await self.client.close()
+        await self.client.connect(port=self.port)
+        self.assertEqual((await self.client.request('GET', '/stats'))[0], 200)
+
+    async def test_worker_failures(self):
+        # a MemoryError in a worker is reported and its other sessions survive
+        status, result = await self.client.request('POST', '/sessions', {'game': 'tictactoe'})
+        session = '/sessions/{}'.format(result['session'])
+        self.assertEqual((await self.client.request('POST', '/sessions', {
+            'game': 'tictactoe', 'game_kwargs': {'board_size': 1000000}}))[0], 500)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': [1, 1]}))[0], 200)
+        self.assertEqual((await self.client.request('GET', '/stats'))[1]['sessions'], 1)
+        # a killed worker is restarted, losing its sessions
+        process = self.server.pool.processes[self.server.pool.worker(result['session'])]
+        process.kill()
+        process.join()
+        for _ in range(100):
+            if self.server.pool.n_restarts:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual((await self.client.request('POST', session + '/moves', {'move': [0, 0]}))[0], 404)
+        status, result = await self.client.request('GET', '/stats')
+        self.assertEqual((result['sessions'], result['worker_restarts']), (0, 1))
+        status, result = await self.client.request('POST', '/sessions', {'game': 'tictactoe'})
+        self.assertEqual(status, 200)
+        self.assertEqual((await self.client.request('POST', '/sessions/{}/moves'.format(result['session']),
+                                                    {'move': [1, 1]}))[0], 200)
+
+    async def test_eviction(self):
+        sessions = []
+        for _ in range(4):
+            sessions.append((await self.client.request('POST', '/sessions', {'game': 'connect4'}))[1]['session'])
+        # the least recently used session was evicted beyond max_sessions
+        status, result = await self.client.request('GET', '/stats')
+        self.assertEqual((result['sessions'], result['evicted']), (3, 1))
+        self.assertEqual((await self.client.request('POST', '/sessions/{}/moves'.format(sessions[0]),
+                                                    {'move': 3}))[0], 404)
+        # idle sessions are evicted
+        self.assertEqual(self.server.evict_idle_sessions(), 0)
+        self.server.idle_timeout = 0.
+        self.assertEqual(self.server.evict_idle_sessions(), 3)
+        status, result = await self.client.request('GET', '/stats')
+        self.assertEqual((result['sessions'], result['evicted']), (0, 4))
+
+    async def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'server.sock')
+            server = RecommendationServer(n_workers=1)
+            await server.start(path=path)
+            client = RecommendationClient()
+            await client.connect(path=path)
+            status, result = await client.request('POST', '/sessions', {'game': 'oware'})
+            status, result = await client.request('POST', '/sessions/{}/recommend'.format(result['session']),
+                                                  {'time_budget': 0.01})
+            self.assertEqual(status, 200)
+            self.assertIn(result['move'], range(6))
+            await client.close()
+            await server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from utils.shards import ShardWriter, ShardReader
+
+FIELDS = {'boards': (np.int8, (2, 3)), 'results': (np.int8, ())}
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def rows(self, start, stop):
+        return {'boards': np.arange(start, stop).repeat(6).reshape(-1, 2, 3), 'results': np.arange(start, stop)}
+
+    def test_append_and_read(self):
+        writer = ShardWriter(self.path, FIELDS, shard_size=4, metadata={'game': 'test'})
+        writer.append(**self.rows(0, 3))
+        writer.append(**self.rows(3, 10))
+        writer.commit()
+        writer.close()
+        # rows are split between shards which are regular .npy files
+        self.assertEqual(np.load(os.path.join(self.path, 'shard-00000.boards.npy')).shape, (4, 2, 3))
+        np.testing.assert_array_equal(np.load(os.path.join(self.path, 'shard-00002.results.npy')), [8, 9])
+        reader = ShardReader(self.path)
+        self.assertEqual(len(reader), 10)
+        self.assertEqual(reader.metadata, {'game': 'test'})
+        np.testing.assert_array_equal(reader[[9, 0, 5]]['results'], [9, 0, 5])
+        np.testing.assert_array_equal(reader[-1]['boards'], np.full((2, 3), 9))
+        np.testing.assert_array_equal(reader[2:6]['results'], [2, 3, 4, 5])
+        batch = reader.sample(5, np.random.RandomState(0))
+        np.testing.assert_array_equal(batch['boards'][:, 0, 0], batch['results'])
+        with self.assertRaises(IndexError):
+            reader[10]
+
+    def test_resume(self):
+        writer = ShardWriter(self.path, FIELDS, shard_size=4)
+        writer.append(**self.rows(0, 6))
+        writer.commit()
+        # rows appended after the last commit are not visible and are dropped when the dataset is resumed
+        writer.append(**self.rows(100, 103))
+        writer.write_headers()
+        self.assertEqual(len(ShardReader(self.path)), 6)
+        writer.close()
+        writer = ShardWriter(self.path, FIELDS, shard_size=4)
+        self.assertEqual(writer.n_rows, 6)
+        writer.append(**self.rows(6, 9))
+        writer.commit()
+        writer.close()
+        np.testing.assert_array_equal(ShardReader(self.path)[:]['results'], np.arange(9))
+        with self.assertRaises(ValueError):
+            ShardWriter(self.path, {'boards': (np.int8, (3, 3)), 'results': (np.int8, ())})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 
 import numpy as np
 from games.tictactoe import Game
+from utils.rollouts import line_windows
 
 
 class TestTicTacToeMethods(unittest.TestCase):
@@ -52,6 +53,79 @@ class TestTicTacToeMethods(unittest.TestCase):
             self.board.play(move=move)
         self.assertEqual(self.board.winner(), None)
 
+    def test_undo(self):
+        self.board.play(move=(2, 2))
+        self.board.play(move=(0, 2))
+        self.assertEqual(self.board.winner().value, 1)
+        self.board.undo()
+        self.board.undo()
+        self.assertIsNone(self.board.winner())
+        self.assertEqual(self.board.last_play, (0, 1))
+        self.assertEqual(self.board.current_player, self.board.players[1])
+        self.assertEqual(len(self.board.history), 4)
+        self.test_state()
+
+    def test_copy(self):
+        game = self.board.copy()
+        game.play(move=(2, 2))
+        self.test_state()
+        self.assertEqual(self.board.current_player, self.board.players[1])
+        self.assertEqual(game.current_player, game.players[0])
+        self.assertEqual(len(game.history), 2)
+        game.undo()
+        self.assertEqual(game.last_play, (0, 1))
+        with self.assertRaises(ValueError):
+            game.undo()
+
+    def test_show_board(self):
+        self.assertEqual(self.board.show_board(state_number=1, return_string=True), 'O|.|.\n.|.|.\n.|.|.')
+        self.assertEqual(self.board.show_board(state_number=2, return_string=True), 'O|.|.\n.|X|.\n.|.|.')
+        np.testing.assert_array_equal(self.board.record(), [0, 4, 1])
+
+    def test_n_in_a_row(self):
+        game = Game(board_size=5, n_in_a_row=4)
+        for move in [(0, 1), (4, 4), (1, 2), (4, 3), (2, 3), (4, 2)]:
+            game.play(move)
+        self.assertIsNone(game.winner())
+        game.play((3, 4))
+        self.assertEqual(game.winner(), game.players[0])
+        self.assertEqual(game.legal_plays(), [])
+        game.undo()
+        self.assertIsNone(game.winner())
+        self.assertEqual(len(game.legal_plays()), 19)
+        with self.assertRaises(ValueError):
+            Game(board_size=3, n_in_a_row=4)
+        for move in [(0, 1), (5, 0), (-1, 2), (1,), 7]:
+            with self.assertRaises(ValueError):
+                game.play(move)
+        # undoing a move puts its cell back at its position in the legal plays
+        legal_plays = game.legal_plays()
+        game.play(legal_plays[3])
+        self.assertNotIn(legal_plays[3], game.legal_plays())
+        game.undo()
+        self.assertEqual(game.legal_plays(), legal_plays)
+
+    def test_random_games(self):
+        # winner and legal plays updated at each move are the same as the ones computed from the board
+        random_state = np.random.RandomState(0)
+        for board_size, n_in_a_row in [(3, 3), (4, 3), (6, 4), (7, 5)]:
+            windows, _ = line_windows(board_size, board_size, n_in_a_row)
+            for _ in range(20):
+                game = Game(board_size=board_size, n_in_a_row=n_in_a_row)
+                while game.legal_plays():
+                    legal_plays = game.legal_plays()
+                    game.play(legal_plays[random_state.randint(len(legal_plays))])
+                    line_sums = np.append(game.state.ravel(), 0)[windows].sum(axis=1)
+                    winners = [player for player in game.players if n_in_a_row * player.value in line_sums]
+                    self.assertEqual(game.winner(), winners[0] if winners else None)
+                    if not winners:
+                        self.assertEqual(sorted(game.legal_plays()),
+                                         list(map(tuple, np.argwhere(game.state == 0).tolist())))
+                while game.n_moves:
+                    game.undo()
+                self.assertEqual(game.legal_plays(), game.all_plays())
+                self.assertEqual(game.hash, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+from games import connect4, tictactoe
+from mcts import MonteCarloTreeSearch
+from utils.transpositions import TranspositionTable
+
+
+class TestTranspositionsMethods(unittest.TestCase):
+
+    def test_table(self):
+        table = TranspositionTable(size=4, n_ways=2)
+        visits = np.array([10, 1, 5])
+        keys = [2 ** 63 + 2, 2, 4]   # same bucket
+        table.store(keys[0], 0, visits)
+        table.store(keys[1], 1, visits)
+        self.assertEqual(table.lookup(keys[0]), 0)
+        self.assertEqual(table.lookup(keys[1]), 1)
+        self.assertEqual(table.lookup(keys[2]), -1)
+        # bucket is full: least visited node is replaced
+        table.store(keys[2], 2, visits)
+        self.assertEqual(table.lookup(keys[1]), -1)
+        self.assertEqual(table.lookup(keys[2]), 2)
+        self.assertEqual(table.lookup(keys[0]), 0)
+        self.assertEqual(table.n_replacements, 1)
+
+    def test_tictactoe_hash(self):
+        game_a, game_b = tictactoe.Game(), tictactoe.Game()
+        for move in [(0, 0), (1, 1), (2, 2)]:
+            game_a.play(move)
+        for move in [(2, 2), (1, 1), (0, 0)]:
+            game_b.play(move)
+        self.assertEqual(game_a.hash, game_b.hash)
+        game_a.undo()
+        self.assertNotEqual(game_a.hash, game_b.hash)
+        game_b.undo()
+        game_b.undo()
+        game_b.play((1, 1))
+        self.assertNotEqual(game_a.hash, game_b.hash)   # same stones but not the same players
+        for _ in range(2):
+            game_a.undo()
+        self.assertEqual(game_a.hash, tictactoe.Game().hash)
+
+    def test_connect4_hash(self):
+        game_a, game_b = connect4.Game(), connect4.Game()
+        for move in [0, 1, 2, 3]:
+            game_a.play(move)
+        for move in [2, 3, 0, 1]:
+            game_b.play(move)
+        self.assertEqual(game_a.hash, game_b.hash)
+        copy = game_a.copy()
+        self.assertEqual(copy.hash, game_a.hash)
+        for move in [0, 1, 0, 1, 0]:
+            copy.play(move)
+        self.assertIsNotNone(copy.winner())
+        for _ in range(5):
+            copy.undo()
+        self.assertEqual(copy.hash, game_a.hash)
+
+    def test_search(self):
+        np.random.seed(0)
+        tree = MonteCarloTreeSearch(game=connect4.Game(), transposition_size=2 ** 12)
+        tree.search(max_iterations=500, max_runtime=60)
+        nodes = tree.nodes
+        children = np.concatenate([nodes.children(node) for node in range(nodes.size) if nodes.n_children[node]])
+        transposed = children[nodes.target[children] != children]
+        self.assertGreater(len(transposed), 0)
+        self.assertEqual(tree.root.n_plays, 500)
+        self.assertEqual(sum(nodes.n_plays[nodes.children_targets(0)]), 500)
+        # every transposed slot points to a node holding the same position
+        for child in transposed:
+            self.assertEqual(nodes.position(child).hash, int(nodes.key[nodes.target[child]]))
+            self.assertEqual(tree.position(nodes.target[child]).hash, int(nodes.key[nodes.target[child]]))
+
+    def test_advance(self):
+        np.random.seed(0)
+        tree = MonteCarloTreeSearch(game=connect4.Game(), transposition_size=2 ** 12)
+        tree.search(max_iterations=500, max_runtime=60)
+        move = tree.recommended_play()
+        tree.advance(move)
+        nodes = tree.nodes
+        # the rebuilt table points to the renumbered nodes
+        table = tree.transpositions
+        stored = table.nodes != -1
+        self.assertGreater(np.count_nonzero(stored), 0)
+        np.testing.assert_array_equal(nodes.key[table.nodes[stored]], table.keys[stored])
+        self.assertEqual(table.lookup(tree.game.hash), 0)
+        plays = tree.root.n_plays
+        tree.search(max_iterations=100, max_runtime=60)
+        self.assertEqual(tree.root.n_plays, plays + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+from utils.tree import ArrayTree, ROOT
+
+
+class TestArrayTreeMethods(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = ArrayTree(capacity=2)
+        self.tree.reserve_children(ROOT, ['a', 'b', 'c'])
+        self.first_child = self.tree.add_child(ROOT, 2)
+        self.second_child = self.tree.add_child(ROOT, 2)
+
+    def test_grow(self):
+        self.assertGreaterEqual(self.tree.capacity, 4)
+        self.assertEqual(self.tree.size, 4)
+        np.testing.assert_array_equal(self.tree.parent[:4], [-1, ROOT, ROOT, ROOT])
+
+    def test_children(self):
+        self.assertEqual(list(self.tree.children(ROOT)), [self.first_child, self.second_child])
+        self.assertEqual([view.move for view in self.tree.view(ROOT).children], ['c', 'a'])
+        self.assertEqual(self.tree.unexplored_moves(ROOT), ['b'])
+        self.assertEqual(list(self.tree.children(self.first_child)), [])
+
+    def test_names(self):
+        self.tree.reserve_children(self.second_child, ['d', 'e'])
+        grandchild = self.tree.add_child(self.second_child, 1)
+        view = self.tree.view(grandchild)
+        self.assertEqual(view.name, '0_1_0')
+        self.assertEqual(view.move, 'e')
+        self.assertEqual([ancestor.name for ancestor in view.ancestors], ['0', '0_1'])
+        self.assertEqual(self.tree.ancestors(grandchild), [self.second_child, ROOT])
+
+    def test_subtree(self):
+        self.tree.reserve_children(self.second_child, ['d', 'e'])
+        grandchild = self.tree.add_child(self.second_child, 1)
+        self.tree.n_plays[[self.second_child, grandchild]] = [5, 2]
+        subtree = self.tree.subtree(self.second_child)
+        self.assertEqual(subtree.size, 3)
+        self.assertEqual(subtree.n_plays[ROOT], 5)
+        self.assertEqual(subtree.parent[ROOT], -1)
+        self.assertEqual([view.move for view in subtree.view(ROOT).children], ['e'])
+        self.assertEqual(subtree.unexplored_moves(ROOT), ['d'])
+        self.assertEqual(subtree.view(ROOT).children[0].n_plays, 2)
+
+    def test_puct_fields(self):
+        tree = ArrayTree(capacity=2, puct=True)
+        tree.reserve_children(ROOT, ['a', 'b', 'c'])
+        first = tree.first_child[ROOT]
+        tree.prior[first:first + 3] = [0.2, 0.3, 0.5]
+        child = tree.add_child(ROOT, 2)
+        tree.value_sum[child] = 1.5
+        # priors follow their moves when slots are swapped and are kept for unexplored moves in subtrees
+        self.assertEqual(tree.view(child).prior, np.float32(0.5))
+        tree.reserve_children(child, ['d', 'e'])
+        tree.prior[tree.first_child[child]:tree.first_child[child] + 2] = [0.9, 0.1]
+        grandchild = tree.add_child(child, 1)
+        subtree = tree.subtree(child)
+        self.assertEqual(subtree.value_sum[ROOT], 1.5)
+        self.assertAlmostEqual(float(subtree.prior[subtree.first_child[ROOT]]), 0.1, places=6)
+        self.assertAlmostEqual(float(subtree.prior[subtree.first_child[ROOT] + 1]), 0.9, places=6)
+        self.assertEqual(subtree.view(ROOT).children[0].move, tree.view(grandchild).move)
+        self.assertFalse(hasattr(self.tree, 'prior'))
+
+    def test_view_setters(self):
+        view = self.tree.view(self.first_child)
+        view.n_plays = 10
+        view.n_wins = 3
+        self.assertEqual(self.tree.n_plays[self.first_child], 10)
+        self.assertEqual(self.tree.n_wins[self.first_child], 3)
+        self.assertEqual(view, self.tree.view(self.first_child))
+
+
+if __name__ == '__main__':
+    unittest.main()
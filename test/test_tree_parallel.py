@@ -0,0 +1,82 @@
+import time
+import unittest
+
+import numpy as np
+from games.connect4 import Game as Connect4
+from games.tictactoe import Game
+from tree_parallel import TreeParallelSearch
+from utils.stats import SearchStats
+
+
+class TestTreeParallelMethods(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+
+    def check_statistics(self, tree, n_iterations):
+        nodes = tree.nodes
+        self.assertEqual(tree.root.n_plays, n_iterations)
+        for node in range(nodes.size):
+            children_plays = sum(nodes.n_plays[child] for child in nodes.children(node))
+            # no virtual loss is left and every play of a child went through its parent
+            self.assertGreaterEqual(nodes.n_plays[node], children_plays)
+            self.assertGreaterEqual(nodes.n_plays[node], nodes.n_wins[node] + nodes.n_ties[node])
+
+    def test_search(self):
+        tree = TreeParallelSearch(game=Game(), n_workers=2, capacity=10000)
+        stats = tree.search(max_iterations=301, max_runtime=30)
+        # same statistics as a MonteCarloTreeSearch, with the contention counters of the workers
+        self.assertIsInstance(stats, SearchStats)
+        self.assertEqual((stats.iterations, stats.playouts), (301, 301))
+        self.assertEqual(stats.nodes_created, tree.n_nodes() - 1)
+        self.assertGreater(stats.lock_acquisitions, 0)
+        self.assertEqual(stats.as_dict()['workers'], 2)
+        self.check_statistics(tree, 301)
+        self.assertIn(tree.recommended_play(), Game().legal_plays())
+        tree.close()
+
+    def test_connect4_search(self):
+        tree = TreeParallelSearch(game=Connect4(), n_workers=3, capacity=10000)
+        tree.search(max_iterations=150, max_runtime=30, n_simulations=2)
+        self.check_statistics(tree, 300)
+        self.assertIn(tree.recommended_play(), Connect4().legal_plays())
+        tree.close()
+
+    def test_advance(self):
+        tree = TreeParallelSearch(game=Game(), n_workers=2, capacity=10000)
+        tree.search(max_iterations=200, max_runtime=30)
+        move = tree.recommended_play()
+        plays = tree.root.n_plays
+        tree.advance(move)
+        self.assertLess(tree.root.n_plays, plays)
+        tree.search(max_iterations=100, max_runtime=30)
+        self.check_statistics(tree, tree.root.n_plays)
+        self.assertNotIn(move, tree.game.legal_plays())
+        tree.close()
+
+    def test_full_tree(self):
+        tree = TreeParallelSearch(game=Game(), n_workers=2, capacity=50)
+        stats = tree.search(max_iterations=1000, max_runtime=30)
+        self.assertLess(stats.iterations, 1000)
+        self.assertLessEqual(tree.nodes.size, 50)
+        self.check_statistics(tree, stats.iterations)
+        tree.close()
+
+    def test_worker_error(self):
+        tree = FailingSearch(game=Game(), n_workers=2, capacity=1000)
+        starting_time = time.time()
+        with self.assertRaisesRegex(RuntimeError, 'ValueError: worker error'):
+            tree.search(max_iterations=100, max_runtime=30)
+        # the failure is reported at once rather than at the deadline
+        self.assertLess(time.time() - starting_time, 10)
+        tree.close()
+
+
+class FailingSearch(TreeParallelSearch):
+
+    def run_worker(self, max_iterations, ending_time, n_simulations, seed):
+        raise ValueError('worker error')
+
+
+if __name__ == '__main__':
+    unittest.main()
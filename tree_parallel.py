@@ -0,0 +1,305 @@
+"""
+Tree parallel Monte Carlo Tree Search: worker processes grow a single tree stored in shared memory
+"""
+
+import logging
+import multiprocessing
+import time
+import traceback
+from queue import Empty
+
+import numpy as np
+
+from mcts import MonteCarloTreeSearch, SHUTDOWN_GRACE
+from utils.scoring import ucb1_array
+from utils.stats import SearchStats
+from utils.tree import SharedArrayTree, ROOT
+
+
+class StripedLocks:
+    """
+    Fixed pool of locks shared by all nodes, node i being protected by lock i % n_locks
+    Acquisitions that had to wait for another process are counted to measure contention
+    """
+
+    def __init__(self, context, n_locks):
+        self.locks = [context.Lock() for _ in range(n_locks)]
+        self.n_acquisitions = 0
+        self.n_contentions = 0
+
+    def acquire(self, node):
+        """
+        Acquire the lock of a node
+
+        :param node: node id
+        :return: the acquired lock
+        """
+        lock = self.locks[node % len(self.locks)]
+        self.n_acquisitions += 1
+        if not lock.acquire(block=False):
+            self.n_contentions += 1
+            lock.acquire()
+        return lock
+
+
+class TreeParallelStats(SearchStats):
+    """
+    SearchStats of a tree parallel search, with the contention counters of its workers
+    """
+
+    def __init__(self, n_simulations=1, n_workers=1):
+        super().__init__(n_simulations=n_simulations)
+        self.n_workers = n_workers
+        self.lock_acquisitions = 0
+        self.lock_contentions = 0
+        self.expansion_collisions = 0
+
+    @property
+    def lock_contention(self):
+        return self.lock_contentions / self.lock_acquisitions if self.lock_acquisitions else 0.
+
+    def add_worker(self, counters):
+        """
+        Add the counters of a worker
+
+        :param counters: dict returned by TreeParallelSearch.run_worker
+        :return: nothing
+        """
+        self.iterations += counters['iterations']
+        self.lock_acquisitions += counters['lock_acquisitions']
+        self.lock_contentions += counters['lock_contentions']
+        self.expansion_collisions += counters['expansion_collisions']
+
+    def as_dict(self):
+        """
+        All statistics as builtin types, contention counters included
+
+        :return: dict
+        """
+        return dict(super().as_dict(), workers=self.n_workers, lock_acquisitions=self.lock_acquisitions,
+                    lock_contentions=self.lock_contentions, lock_contention=self.lock_contention,
+                    expansion_collisions=self.expansion_collisions)
+
+    def __repr__(self):
+        return 'TreeParallelStats(%s)' % self.as_dict()
+
+
+class TreeParallelSearch(MonteCarloTreeSearch):
+    """
+    Monte Carlo Tree Search where n_workers processes run select/expand/simulate/backpropagate concurrently on the
+    same tree
+
+    Node statistics live in a SharedArrayTree. Workers do not store games in nodes: they replay the moves from the root
+    on a scratch copy of the game. A virtual loss is added to every node on the path of a worker while its simulation
+    runs, so that other workers are steered towards other paths. Statistics updates are protected by striped locks and
+    expansions by a single lock.
+    """
+
+    def __init__(self, game, n_workers=2, capacity=2 ** 20, virtual_loss=1, n_locks=64):
+        # proofs are not backed up by the workers and the capacity of the shared arrays is fixed (no pruning)
+        super().__init__(game, capacity=1, solver=False, virtual_loss=virtual_loss)
+        self.n_workers = n_workers
+        self.context = multiprocessing.get_context('fork')   # workers inherit the shared arrays and the locks
+        self.nodes = SharedArrayTree(capacity=capacity, moves=game.all_plays())
+        self.nodes.root_game = game
+        self.locks = StripedLocks(self.context, n_locks)
+        self.expand_lock = self.context.Lock()
+        self.n_expansion_collisions = 0
+
+    def close(self):
+        """
+        Release the shared memory used by the tree
+
+        :return: nothing
+        """
+        self.nodes.close()
+
+    def advance(self, move):
+        """
+        Same as MonteCarloTreeSearch.advance, the shared memory of the previous tree being released
+
+        :param move: move played from the root position
+        :return: nothing
+        """
+        nodes = self.nodes
+        super().advance(move)
+        nodes.close()
+
+    def select_path(self, scoring_func=ucb1_array):
+        """
+        Select a node like MonteCarloTreeSearch.select while adding a virtual loss to the nodes on the way
+
+        :param scoring_func: function scoring the arrays (n_plays, n_wins, n_ties) of the children of a node
+        :return: (list of node ids from the root to the selected node, game at the selected node)
+        """
+        nodes = self.nodes
+        game = self.game.copy()
+        node = ROOT
+        path = [node]
+        while nodes.n_children[node] and nodes.n_legal[node] == nodes.n_children[node]:
+            first = nodes.first_child[node]
+            children = slice(first, first + nodes.n_children[node])
+            scores = scoring_func(plays=nodes.n_plays[children],
+                                  wins=nodes.n_wins[children],
+                                  ties=nodes.n_ties[children],
+                                  total_plays=nodes.n_plays[node],
+                                  c_=self.c_)
+            node = first + int(np.argmax(scores))
+            self.add_virtual_loss(node)
+            game.play(nodes.moves[nodes.move[node]])
+            path.append(node)
+        return path, game
+
+    def expand_path(self, path, game):
+        """
+        Expand a child of the last node of a path (the child is appended to the path and played on the game)
+
+        :param path: list of node ids from the root
+        :param game: game at the last node of the path
+        :return: nothing
+        """
+        nodes = self.nodes
+        parent = path[-1]
+        with self.expand_lock:
+            if not nodes.is_expanded(parent):
+                nodes.reserve_children(parent, game.legal_plays())
+            n_children, n_legal = nodes.n_children[parent], nodes.n_legal[parent]
+            if n_children < n_legal:
+                child = nodes.add_child(parent, np.random.randint(n_children, n_legal))
+            else:
+                child = None
+        if child is None:
+            # another worker expanded the last child between selection and expansion
+            if n_legal:
+                self.n_expansion_collisions += 1
+            return
+        self.add_virtual_loss(child)
+        game.play(nodes.moves[nodes.move[child]])
+        path.append(child)
+
+    def add_virtual_loss(self, node):
+        """
+        Count virtual lost plays on a node while a simulation goes through it
+
+        :param node: node id
+        :return: nothing
+        """
+        lock = self.locks.acquire(node)
+        self.nodes.n_plays[node] += self.virtual_loss
+        lock.release()
+
+    def backpropagate_path(self, path, n_plays, n_wins, n_ties):
+        """
+        Back-propagate simulation results along a path and remove its virtual losses
+
+        :param path: list of node ids from the root
+        :param n_plays: number of games played to backpropagate
+        :param n_wins: number of games won by the root player to backpropagate
+        :param n_ties: number of ties to backpropagate
+        :return: nothing
+        """
+        nodes = self.nodes
+        n_losses = n_plays - n_wins - n_ties
+        for depth, node in enumerate(path):
+            lock = self.locks.acquire(node)
+            nodes.n_plays[node] += n_plays - (self.virtual_loss if depth else 0)
+            nodes.n_wins[node] += n_wins if depth % 2 else n_losses   # wins of the player who moved into the node
+            nodes.n_ties[node] += n_ties
+            lock.release()
+
+    def run_worker(self, max_iterations, ending_time, n_simulations, seed):
+        """
+        Search loop of one worker process
+
+        :param max_iterations: max number of iterations of this worker
+        :param ending_time: time at which the worker must stop
+        :param n_simulations: number of simulations per expanded node
+        :param seed: random seed of this worker
+        :return: dict of worker counters
+        """
+        np.random.seed(seed)
+        n_iterations = 0
+        while n_iterations < max_iterations and time.time() < ending_time:
+            path, game = self.select_path()
+            try:
+                self.expand_path(path, game)
+            except MemoryError:
+                self.backpropagate_path(path, 0, 0, 0)
+                logging.warning('[MCTS] shared tree is full, worker stops')
+                break
+            n_wins, n_ties = self.rollout(game, n_simulations)
+            self.backpropagate_path(path, n_simulations, n_wins, n_ties)
+            n_iterations += 1
+        return {'iterations': n_iterations,
+                'lock_acquisitions': self.locks.n_acquisitions,
+                'lock_contentions': self.locks.n_contentions,
+                'expansion_collisions': self.n_expansion_collisions}
+
+    def search(self, max_iterations, max_runtime, n_simulations=1, display_tree=False, n_workers=None):
+        """
+        Run the search in worker processes until the iterations budget or the time is exhausted
+
+        :param max_iterations: max number of iterations for the tree search (all workers included)
+        :param max_runtime: max search time in seconds
+        :param n_simulations: number of simulations per expanded node
+        :param display_tree: ignored (nodes do not hold the games needed to display them)
+        :param n_workers: number of worker processes (defaults to the one given at creation)
+        :return: TreeParallelStats of the search
+        """
+        n_workers = n_workers or self.n_workers
+        stats = TreeParallelStats(n_simulations=n_simulations, n_workers=n_workers)
+        n_nodes = self.n_nodes()
+        starting_time = time.time()
+        ending_time = starting_time + max_runtime
+        if np.isinf(max_iterations):
+            budgets = [max_iterations] * n_workers
+        else:
+            budgets = [max_iterations // n_workers + (worker < max_iterations % n_workers)
+                       for worker in range(n_workers)]
+        seeds = np.random.randint(2 ** 31 - 1, size=n_workers)
+        queue = self.context.Queue()
+        workers = [self.context.Process(target=tree_parallel_worker,
+                                        args=(self, budget, ending_time, n_simulations, seed, queue))
+                   for budget, seed in zip(budgets, seeds)]
+        for worker in workers:
+            worker.start()
+        counters = []
+        try:
+            for _ in workers:
+                counters.append(queue.get(timeout=max(ending_time - time.time(), 0.) + SHUTDOWN_GRACE))
+        except Empty:
+            logging.warning('[MCTS] %s tree parallel workers did not finish before the deadline',
+                            n_workers - len(counters))
+        finally:
+            for worker in workers:
+                worker.join(timeout=SHUTDOWN_GRACE)
+                if worker.is_alive():
+                    worker.terminate()
+        errors = [c['error'] for c in counters if 'error' in c]
+        if errors:
+            raise RuntimeError('{} tree parallel workers failed:\n{}'.format(len(errors), '\n'.join(errors)))
+        for worker_counters in counters:
+            stats.add_worker(worker_counters)
+        self.finish_stats(stats, starting_time, n_nodes)
+        logging.info('[MCTS] Tree parallel search stats: %s', stats)
+        return stats
+
+
+def tree_parallel_worker(search, max_iterations, ending_time, n_simulations, seed, queue):
+    """
+    Entry point of tree parallel worker processes
+
+    :param search: TreeParallelSearch (inherited from the parent process)
+    :param max_iterations: max number of iterations of this worker
+    :param ending_time: time at which the worker must stop
+    :param n_simulations: number of simulations per expanded node
+    :param seed: random seed of this worker
+    :param queue: queue where the worker counters (or the traceback of its error) are sent
+    :return: nothing
+    """
+    try:
+        counters = search.run_worker(max_iterations, ending_time, n_simulations, seed)
+    except Exception:
+        # reported to the parent process, which would otherwise wait for the deadline
+        counters = {'error': traceback.format_exc()}
+    queue.put(counters)
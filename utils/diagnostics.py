@@ -0,0 +1,105 @@
+"""
+Snapshots of the search tree taken during or after a search, for offline inspection
+"""
+
+import json
+
+import numpy as np
+
+from utils.tree import ROOT
+
+
+class TreeSnapshotter:
+    """
+    Take bounded snapshots of a search tree: only the top_k most played children of each node are kept, down to
+    max_depth levels below the root, so the cost of a snapshot does not depend on the size of the tree
+
+    Snapshots are taken every interval iterations of a search (if interval is not 0) or on demand with snapshot. They
+    are kept in the snapshots list or, if an output path is given, appended to it as JSON lines.
+    """
+
+    def __init__(self, interval=0, max_depth=2, top_k=5, output=None):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.top_k = top_k
+        self.output = output
+        self.snapshots = []
+
+    def node_snapshot(self, nodes, node, depth):
+        """
+        Statistics of a node and of its most played children
+
+        :param nodes: ArrayTree
+        :param node: node id
+        :param depth: remaining number of levels to include below the node
+        :return: dict
+        """
+        move_id = nodes.move[node]
+        snapshot = {'id': int(node),
+                    'move': nodes.moves[move_id] if move_id != -1 else None,
+                    'n_plays': int(nodes.n_plays[node]),
+                    'n_wins': int(nodes.n_wins[node]),
+                    'n_ties': int(nodes.n_ties[node]),
+                    'score': float(nodes.score[node])}
+        if depth > 0 and nodes.n_children[node]:
+            slots = np.asarray(nodes.children(node))
+            targets = nodes.target[slots]
+            best = np.argsort(-nodes.n_plays[targets], kind='stable')[:self.top_k]
+            snapshot['children'] = []
+            for slot, target in zip(slots[best], targets[best]):
+                child = self.node_snapshot(nodes, target, depth - 1)
+                child['move'] = nodes.moves[nodes.move[slot]]   # move of the slot (targets may be transpositions)
+                snapshot['children'].append(child)
+        return snapshot
+
+    def snapshot(self, search, iteration=None):
+        """
+        Take a snapshot of the tree of a search
+
+        :param search: MonteCarloTreeSearch
+        :param iteration: number of iterations of the running search, if any
+        :return: snapshot (dict)
+        """
+        snapshot = {'iteration': iteration,
+                    'size': int(search.nodes.size),
+                    'root': self.node_snapshot(search.nodes, ROOT, self.max_depth)}
+        if self.output is None:
+            self.snapshots.append(snapshot)
+        else:
+            with open(self.output, 'a') as output:
+                output.write(json.dumps(snapshot, default=to_builtin) + '\n')
+        return snapshot
+
+    def on_iteration(self, search, iteration):
+        """
+        Take a snapshot if iteration is a multiple of the interval
+
+        :param search: MonteCarloTreeSearch
+        :param iteration: number of iterations performed by the search
+        :return: nothing
+        """
+        if self.interval and iteration % self.interval == 0:
+            self.snapshot(search, iteration=iteration)
+
+
+def to_builtin(value):
+    """
+    JSON encoding of the values json does not know, such as NumPy integers found in moves
+
+    :param value: value to encode
+    :return: builtin value
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+
+def read_snapshots(path):
+    """
+    Read snapshots written as JSON lines
+
+    :param path: path of the file
+    :return: list of snapshots
+    """
+    with open(path) as snapshots:
+        return [json.loads(line) for line in snapshots if line.strip()]
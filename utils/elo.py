@@ -0,0 +1,118 @@
+"""
+Elo difference of two players from their game results and sequential probability ratio test (SPRT) of a match
+
+Results are counted for the first player: wins, draws and losses, a draw scoring half a win.
+"""
+
+import math
+
+Z_95 = 1.959964   # quantile of the normal distribution for 95% confidence intervals
+
+
+def score_elo(score):
+    """
+    Elo difference giving an expected score
+
+    :param score: expected score between 0 and 1
+    :return: Elo difference (infinite for a score of 0 or 1)
+    """
+    if score <= 0.:
+        return -math.inf
+    if score >= 1.:
+        return math.inf
+    return 400. * math.log10(score / (1. - score))
+
+
+def elo_score(elo):
+    """
+    Expected score of a player with an Elo difference
+
+    :param elo: Elo difference
+    :return: expected score between 0 and 1
+    """
+    return 1. / (1. + 10. ** (-elo / 400.))
+
+
+def score_variance(wins, draws, losses):
+    """
+    Mean and variance of the score of one game
+
+    :param wins: number of wins
+    :param draws: number of draws
+    :param losses: number of losses
+    :return: (mean score, variance of the score of a game)
+    """
+    n_games = wins + draws + losses
+    if not n_games:
+        return 0.5, 0.
+    score = (wins + 0.5 * draws) / n_games
+    variance = (wins * (1. - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n_games
+    return score, variance
+
+
+def elo_interval(wins, draws, losses, z=Z_95):
+    """
+    Elo difference and its confidence interval (normal approximation of the mean score)
+
+    :param wins: number of wins
+    :param draws: number of draws
+    :param losses: number of losses
+    :param z: quantile of the normal distribution of the interval (95% by default)
+    :return: (Elo difference, lower bound, upper bound)
+    """
+    n_games = wins + draws + losses
+    score, variance = score_variance(wins, draws, losses)
+    margin = z * math.sqrt(variance / n_games) if n_games else 0.5
+    return score_elo(score), score_elo(score - margin), score_elo(score + margin)
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """
+    Log-likelihood ratio of the hypothesis elo1 against elo0 (generalized SPRT, normal approximation of the score)
+
+    :param wins: number of wins
+    :param draws: number of draws
+    :param losses: number of losses
+    :param elo0: Elo difference of the null hypothesis
+    :param elo1: Elo difference of the alternative hypothesis
+    :return: log-likelihood ratio
+    """
+    n_games = wins + draws + losses
+    score, variance = score_variance(wins, draws, losses)
+    if not variance:
+        return 0.   # every game gave the same result: no information on the variance yet
+    score0, score1 = elo_score(elo0), elo_score(elo1)
+    return n_games * (score1 - score0) * (2. * score - score0 - score1) / (2. * variance)
+
+
+def sprt_bounds(alpha=0.05, beta=0.05):
+    """
+    Bounds of the log-likelihood ratio at which a SPRT stops
+
+    :param alpha: probability to accept elo1 when elo0 is true
+    :param beta: probability to accept elo0 when elo1 is true
+    :return: (lower bound accepting elo0, upper bound accepting elo1)
+    """
+    return math.log(beta / (1. - alpha)), math.log((1. - beta) / alpha)
+
+
+def sprt(wins, draws, losses, elo0=0., elo1=50., alpha=0.05, beta=0.05):
+    """
+    Decision of a SPRT given the results of the games played so far
+
+    :param wins: number of wins
+    :param draws: number of draws
+    :param losses: number of losses
+    :param elo0: Elo difference of the null hypothesis
+    :param elo1: Elo difference of the alternative hypothesis
+    :param alpha: probability to accept elo1 when elo0 is true
+    :param beta: probability to accept elo0 when elo1 is true
+    :return: 'H1' (elo1 accepted), 'H0' (elo0 accepted) or None (more games are needed)
+    """
+    llr = sprt_llr(wins, draws, losses, elo0, elo1)
+    lower, upper = sprt_bounds(alpha, beta)
+    if llr >= upper:
+        return 'H1'
+    if llr <= lower:
+        return 'H0'
+    return None
@@ -0,0 +1,109 @@
+"""
+Position evaluators for the PUCT search: prior probabilities of the moves and value of positions
+
+An evaluator has two methods: encode(game) returns the input array of one position, and evaluate(inputs) takes the
+inputs of a batch of positions stacked along the first axis and returns (priors, values) for all of them at once:
+priors of shape (batch, len(game.all_plays())) in the order of all_plays, and values between -1 and 1 for the player
+to move.
+"""
+
+import numpy as np
+
+
+class UniformEvaluator:
+    """
+    Evaluator without knowledge: uniform priors and a value of 0 for every position
+    """
+
+    def __init__(self, game):
+        self.n_moves = len(game.all_plays())
+
+    def encode(self, game):
+        """
+        Input of a position (nothing is needed)
+
+        :param game: game at the position
+        :return: empty array
+        """
+        return np.zeros(0, dtype=np.float32)
+
+    def evaluate(self, inputs):
+        """
+        Priors and values of a batch of positions
+
+        :param inputs: array of shape (batch, 0)
+        :return: (uniform priors of shape (batch, n_moves), zero values of shape (batch,))
+        """
+        n_positions = len(inputs)
+        return np.full((n_positions, self.n_moves), 1. / self.n_moves), np.zeros(n_positions)
+
+
+class MLPEvaluator:
+    """
+    Reference evaluator: a multilayer perceptron in pure NumPy over the board planes of the player to move
+    The input of a position is one plane of the stones of the player to move and one plane of the stones of the
+    opponent (game.state flattened), a ReLU hidden layer is shared by a softmax policy head and a tanh value head.
+    A batch of positions is evaluated with one matrix product per layer.
+    The weights (w_hidden, b_hidden, w_policy, b_policy, w_value, b_value) are drawn randomly from seed unless they are
+    given, the game only gives the shapes.
+    """
+
+    def __init__(self, game, n_hidden=64, weights=None, seed=0):
+        n_inputs, n_moves = 2 * np.asarray(game.state).size, len(game.all_plays())
+        if weights is None:
+            random_state = np.random.RandomState(seed)
+            weights = {'w_hidden': random_state.normal(0., np.sqrt(2. / n_inputs), (n_inputs, n_hidden)),
+                       'b_hidden': np.zeros(n_hidden),
+                       'w_policy': random_state.normal(0., np.sqrt(1. / n_hidden), (n_hidden, n_moves)),
+                       'b_policy': np.zeros(n_moves),
+                       'w_value': random_state.normal(0., np.sqrt(1. / n_hidden), (n_hidden, 1)),
+                       'b_value': np.zeros(1)}
+        self.weights = {name: np.asarray(array, dtype=np.float32) for name, array in weights.items()}
+        self.players_values = [player.value for player in game.players]
+
+    @classmethod
+    def load(cls, path, game):
+        """
+        Evaluator with the weights saved by save
+
+        :param path: path of the .npz file
+        :param game: game whose positions are evaluated
+        :return: MLPEvaluator
+        """
+        with np.load(path) as weights:
+            return cls(game, weights=dict(weights))
+
+    def save(self, path):
+        """
+        Save the weights to a .npz file
+
+        :param path: file path
+        :return: nothing
+        """
+        np.savez(path, **self.weights)
+
+    def encode(self, game):
+        """
+        Board planes of a position from the point of view of the player to move
+
+        :param game: game at the position
+        :return: float32 array of 2 * number of cells
+        """
+        state = np.asarray(game.state).ravel()
+        player, opponent = self.players_values[game.player_index], self.players_values[1 - game.player_index]
+        return np.concatenate((state == player, state == opponent)).astype(np.float32)
+
+    def evaluate(self, inputs):
+        """
+        Priors and values of a batch of positions
+
+        :param inputs: array of shape (batch, 2 * number of cells)
+        :return: (priors of shape (batch, n_moves), values of shape (batch,))
+        """
+        weights = self.weights
+        hidden = np.maximum(inputs @ weights['w_hidden'] + weights['b_hidden'], 0.)
+        logits = hidden @ weights['w_policy'] + weights['b_policy']
+        priors = np.exp(logits - logits.max(axis=1, keepdims=True))
+        priors /= priors.sum(axis=1, keepdims=True)
+        values = np.tanh(hidden @ weights['w_value'] + weights['b_value'])[:, 0]
+        return priors, values
@@ -0,0 +1,94 @@
+"""
+Compact game records: the moves of a game as small integers (cell index for TicTacToe, column for Connect4)
+and a binary file format to save and load many games at once
+
+File layout (little endian): magic bytes, item size of the moves (1 or 2 bytes), number of games (uint32), number of
+moves of each game (uint16), then the moves of all the games one after the other
+"""
+
+import numpy as np
+
+MAGIC = b'MCTSREC1'
+
+
+def move_dtype(n_moves):
+    """
+    Smallest signed integer type holding the move indexes of a game
+
+    :param n_moves: number of distinct moves of the game
+    :return: numpy dtype
+    """
+    return np.dtype(np.int8) if n_moves <= np.iinfo(np.int8).max else np.dtype(np.int16)
+
+
+def save_records(path, records):
+    """
+    Save game records to a binary file
+
+    :param path: file path
+    :param records: sequence of 1d integer arrays of move indexes (see Game.record)
+    :return: nothing
+    """
+    records = [np.asarray(record) for record in records]
+    dtype = np.result_type(np.int8, *[record.dtype for record in records]).newbyteorder('<')
+    if dtype.itemsize > 2:
+        raise ValueError('Move indexes do not fit in 2 bytes')
+    lengths = np.array([len(record) for record in records], dtype='<u2')
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.array([dtype.itemsize], dtype='<u1').tobytes())
+        file.write(np.array([len(records)], dtype='<u4').tobytes())
+        file.write(lengths.tobytes())
+        for record in records:
+            file.write(record.astype(dtype).tobytes())
+
+
+def load_records(path):
+    """
+    Load the game records of a binary file
+
+    :param path: file path
+    :return: list of 1d arrays of move indexes
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a game records file: {}'.format(path))
+    offset = len(MAGIC)
+    itemsize = int(np.frombuffer(data, dtype='<u1', count=1, offset=offset)[0])
+    n_games = int(np.frombuffer(data, dtype='<u4', count=1, offset=offset + 1)[0])
+    offset += 5
+    lengths = np.frombuffer(data, dtype='<u2', count=n_games, offset=offset)
+    offset += 2 * n_games
+    moves = np.frombuffer(data, dtype='<i{}'.format(itemsize), count=int(lengths.sum()), offset=offset)
+    moves = moves.astype(move_dtype(2 ** (8 * itemsize - 1) - 1))
+    return np.split(moves, np.cumsum(lengths)[:-1]) if n_games else []
+
+
+def save_games(path, games):
+    """
+    Save the moves of games played from their starting position
+
+    :param path: file path
+    :param games: sequence of games (moves played before a copy are not part of the copy record)
+    :return: nothing
+    """
+    save_records(path, [game.record() for game in games])
+
+
+def load_games(path, game_class, **kwargs):
+    """
+    Replay the games of a binary file
+
+    :param path: file path
+    :param game_class: class of the games (tictactoe.Game or connect4.Game)
+    :param kwargs: arguments of the game class
+    :return: list of games
+    """
+    games = []
+    for record in load_records(path):
+        game = game_class(**kwargs)
+        for index in record:
+            game.play(game.index_move(int(index)))
+        games.append(game)
+    return games
@@ -0,0 +1,95 @@
+"""
+Random games played in lockstep on a batch of boards
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def line_windows(n_rows, n_cols, n_in_a_row):
+    """
+    Flat indices of all the lines of n_in_a_row cells of a board and the lines each cell belongs to
+
+    An extra empty cell (index n_rows * n_cols) is used to pad cells that belong to less lines than others.
+
+    :param n_rows: number of rows of the board
+    :param n_cols: number of columns of the board
+    :param n_in_a_row: number of aligned stones needed to win
+    :return: (array of shape (n_lines + 1, n_in_a_row), array of shape (n_rows * n_cols, max lines per cell))
+    """
+    padding_cell = n_rows * n_cols
+    windows = []
+    for row in range(n_rows):
+        for col in range(n_cols):
+            # horizontal, vertical and both diagonals starting at (row, col)
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row, end_col = row + d_row * (n_in_a_row - 1), col + d_col * (n_in_a_row - 1)
+                if 0 <= end_row < n_rows and 0 <= end_col < n_cols:
+                    windows.append([(row + d_row * i) * n_cols + col + d_col * i for i in range(n_in_a_row)])
+    windows.append([padding_cell] * n_in_a_row)
+    windows = np.array(windows, dtype=np.intp)
+
+    cell_windows = [[] for _ in range(padding_cell)]
+    for window_id, window in enumerate(windows[:-1]):
+        for cell in window:
+            cell_windows[cell].append(window_id)
+    max_windows = max(len(ids) for ids in cell_windows)
+    cell_windows = np.array([ids + [len(windows) - 1] * (max_windows - len(ids)) for ids in cell_windows],
+                            dtype=np.intp)
+    return windows, cell_windows
+
+
+def random_rollouts(boards, to_move, n_in_a_row, gravity, winners=None, lengths=None):
+    """
+    Play random games until the end on a batch of boards, one move of every unfinished game at each step
+
+    :param boards: array of shape (batch, rows, cols) with 1 for the first player, -1 for the second one and 0 for
+    empty cells (not modified)
+    :param to_move: array of shape (batch,) with the value of the player to move (1 or -1)
+    :param n_in_a_row: number of aligned stones needed to win
+    :param gravity: whether stones fall to the bottom of their column (Connect4) or are placed on any empty cell
+    :param winners: optional array of shape (batch,) with the value of games that are already won (0 if not won)
+    :param lengths: optional array of shape (batch,) incremented by the number of moves played in each game
+    :return: array of shape (batch,) with the value of the winner of each game (0 for a tie)
+    """
+    n_games, n_rows, n_cols = boards.shape
+    windows, cell_windows = line_windows(n_rows, n_cols, n_in_a_row)
+    # flat boards with an extra always empty cell used as padding by windows
+    flat = np.zeros((n_games, n_rows * n_cols + 1), dtype=np.int8)
+    flat[:, :-1] = boards.reshape(n_games, -1)
+    players = np.array(to_move, dtype=np.int8)
+    results = np.zeros(n_games, dtype=np.int8) if winners is None else np.array(winners, dtype=np.int8)
+    if gravity:
+        heights = np.count_nonzero(boards, axis=1)
+    active = np.flatnonzero(results == 0)
+
+    while active.size:
+        # pick a random legal move for every unfinished game
+        if gravity:
+            legal = heights[active] < n_rows
+        else:
+            legal = flat[active, :-1] == 0
+        has_move = legal.any(axis=1)
+        active, legal = active[has_move], legal[has_move]   # games without legal move are ties
+        if not active.size:
+            break
+        moves = np.argmax(np.random.rand(*legal.shape) * legal, axis=1)
+        if gravity:
+            cells = (n_rows - 1 - heights[active, moves]) * n_cols + moves
+            heights[active, moves] += 1
+        else:
+            cells = moves
+        movers = players[active]
+        flat[active, cells] = movers
+
+        # only lines going through the new stone can be completed
+        line_sums = flat[active[:, None, None], windows[cell_windows[cells]]].sum(axis=2)
+        won = (line_sums == n_in_a_row * movers[:, None]).any(axis=1)
+        results[active[won]] = movers[won]
+        players[active] = -movers
+        if lengths is not None:
+            lengths[active] += 1
+        active = active[~won]
+    return results
@@ -1,5 +1,122 @@
+import math
+
 import numpy as np
-from scipy.stats import beta
+
+UNVISITED_SCORE = 99.   # to be sure that arm is played at least once
+
+
+def average_wins_array(plays, wins, ties, total_plays=None, c_=None):
+    """
+    Simple average of all arms at once
+
+    :param plays: array of number of times each arm has been played
+    :param wins: array of number of successes
+    :param ties: array of number of ties
+    :param total_plays: unused (all scoring functions share the same signature)
+    :param c_: unused (all scoring functions share the same signature)
+    :return: array of scores (min:0, max:1)
+    """
+    plays = np.asarray(plays, dtype=np.float64)
+    scores = wins / np.maximum(plays, 1.)
+    scores[plays == 0] = UNVISITED_SCORE
+    return scores
+
+
+def ucb1_array(plays, wins, ties, total_plays, c_=1.0):
+    """
+    Upper Confidence Bound score of all arms at once
+
+    :param plays: array of number of times each arm has been played
+    :param wins: array of number of successes
+    :param ties: array of number of ties
+    :param total_plays: number of plays of all arms
+    :param c_: constant (the more the larger the bound)
+    :return: array of scores (min:0, max:1)
+    """
+    plays = np.asarray(plays, dtype=np.float64)
+    safe_plays = np.maximum(plays, 1.)
+    scores = wins / safe_plays + c_ * np.sqrt(math.log(max(total_plays, 1)) / safe_plays)
+    np.minimum(scores, 1.0, out=scores)
+    scores += np.random.rand(scores.size) * 1e-6  # small random perturbation to avoid ties
+    scores[plays == 0] = UNVISITED_SCORE
+    return scores
+
+
+def rave_ucb1_array(plays, wins, ties, total_plays, c_=1.0, amaf_plays=None, amaf_wins=None, equivalence=1000):
+    """
+    Upper Confidence Bound score of all arms at once, the average wins being blended with their all-moves-as-first
+    (AMAF) average wins (RAVE). The weight of the AMAF average is sqrt(equivalence / (3 * plays + equivalence)): it
+    leads the score of arms with few plays and fades out as they are played
+
+    :param plays: array of number of times each arm has been played
+    :param wins: array of number of successes
+    :param ties: array of number of ties
+    :param total_plays: number of plays of all arms
+    :param c_: constant (the more the larger the bound)
+    :param amaf_plays: array of number of playouts in which each arm was played later by the same player
+    :param amaf_wins: array of number of successes of these playouts
+    :param equivalence: number of plays for which the average wins and the AMAF average have the same weight
+    :return: array of scores (min:0, max:1)
+    """
+    plays = np.asarray(plays, dtype=np.float64)
+    safe_plays = np.maximum(plays, 1.)
+    amaf_plays = np.asarray(amaf_plays, dtype=np.float64)
+    beta = np.sqrt(equivalence / (3. * plays + equivalence))
+    beta[amaf_plays == 0] = 0.   # no AMAF information
+    values = (1. - beta) * wins / safe_plays + beta * amaf_wins / np.maximum(amaf_plays, 1.)
+    scores = values + c_ * np.sqrt(math.log(max(total_plays, 1)) / safe_plays)
+    np.minimum(scores, 1.0, out=scores)
+    scores += np.random.rand(scores.size) * 1e-6  # small random perturbation to avoid ties
+    scores[plays == 0] = UNVISITED_SCORE
+    return scores
+
+
+def puct_array(plays, value_sums, priors, total_plays, c_puct=1.5, unvisited_value=0.):
+    """
+    Predictor + Upper Confidence bound applied to Trees (AlphaZero) score of all arms at once
+
+    :param plays: array of number of times each arm has been played
+    :param value_sums: array of the sums of the values (between -1 and 1) backed up through each arm
+    :param priors: array of the prior probabilities of the arms
+    :param total_plays: number of plays of all arms
+    :param c_puct: constant (the more the more the priors and the less played arms are favoured)
+    :param unvisited_value: value of the arms that have not been played yet
+    :return: array of scores
+    """
+    plays = np.asarray(plays, dtype=np.float64)
+    values = np.where(plays > 0, value_sums / np.maximum(plays, 1.), unvisited_value)
+    return values + c_puct * np.asarray(priors, dtype=np.float64) * math.sqrt(max(total_plays, 1)) / (1. + plays)
+
+
+def visits_array(plays, wins=None, ties=None, total_plays=None, c_=None):
+    """
+    Number of plays of all arms at once (the most played arm is the most robust choice)
+
+    :param plays: array of number of times each arm has been played
+    :param wins: unused (all scoring functions share the same signature)
+    :param ties: unused (all scoring functions share the same signature)
+    :param total_plays: unused (all scoring functions share the same signature)
+    :param c_: unused (all scoring functions share the same signature)
+    :return: array of scores
+    """
+    return np.asarray(plays, dtype=np.float64)
+
+
+def thompson_array(plays, wins, ties, total_plays=None, c_=None):
+    """
+    Thompson sampling of all arms at once
+
+    :param plays: array of number of times each arm has been played
+    :param wins: array of number of successes
+    :param ties: array of number of ties
+    :param total_plays: unused (all scoring functions share the same signature)
+    :param c_: unused (all scoring functions share the same signature)
+    :return: array of scores (min:0, max:1)
+    """
+    plays = np.asarray(plays, dtype=np.float64)
+    scores = np.random.beta(np.add(wins, 1.), plays - wins + 1)
+    scores[plays == 0] = UNVISITED_SCORE
+    return scores
 
 
 def average_wins(plays, wins, ties):
@@ -11,10 +128,7 @@ def average_wins(plays, wins, ties):
     :param ties: number of ties
     :return: score (min:0, max:1)
     """
-    if plays == 0:
-        return 99.   # to be sure that arm is played at least once
-    else:
-        return wins / plays
+    return average_wins_array([plays], [wins], [ties])[0]
 
 
 def ucb1(plays, wins, ties, total_plays, c_=1.0):
@@ -28,13 +142,7 @@ def ucb1(plays, wins, ties, total_plays, c_=1.0):
     :param c_: constant (the more the larger the bound)
     :return: score (min:0, max:1)
     """
-    if plays == 0:
-        return 99.   # to be sure that arm is played at least once
-    else:
-        score = wins / plays + c_ * np.sqrt(np.log(total_plays) / plays)
-        score = min(score, 1.0)
-        score += np.random.rand() * 1e-6  # small random perturbation to avoid ties
-        return score
+    return ucb1_array([plays], [wins], [ties], total_plays, c_=c_)[0]
 
 
 def thompson(plays, wins, ties):
@@ -46,7 +154,4 @@ def thompson(plays, wins, ties):
     :param ties: number of ties
     :return: score (min:0, max:1)
     """
-    if plays == 0:
-        return 99.   # to be sure that arm is played at least once
-    else:
-        return beta.rvs(a=wins+1, b=plays-wins+1, size=1)[0]
+    return thompson_array([plays], [wins], [ties])[0]
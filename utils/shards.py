@@ -0,0 +1,250 @@
+"""
+Sharded, append-only NumPy datasets: rows of several fields (one .npy file per field and shard) are appended as they
+are produced and read back memory-mapped
+
+A directory holds a manifest.json listing the shards and the number of rows committed in each of them. Rows are
+appended at the end of the .npy files of the current shard, the .npy headers (fixed size, so that they can be
+rewritten in place) are then updated and the manifest is replaced atomically: rows written after the last manifest
+update, by a process that was killed, are dropped when the dataset is opened again.
+"""
+
+import json
+import os
+
+import numpy as np
+
+MANIFEST = 'manifest.json'
+HEADER_SIZE = 128   # bytes of the .npy headers, shapes are rewritten in place
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def npy_header(dtype, shape):
+    """
+    Fixed size .npy (version 1.0) header of a C ordered array
+
+    :param dtype: numpy dtype of the array
+    :param shape: shape of the array
+    :return: bytes of length HEADER_SIZE
+    """
+    description = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False,
+                        'shape': tuple(int(size) for size in shape)})
+    header_length = HEADER_SIZE - len(NPY_MAGIC) - 2
+    if len(description) + 1 > header_length:
+        raise ValueError('Shape {} does not fit in a {} bytes .npy header'.format(shape, HEADER_SIZE))
+    return NPY_MAGIC + np.array([header_length], dtype='<u2').tobytes() + \
+        description.ljust(header_length - 1).encode('latin1') + b'\n'
+
+
+def field_path(directory, shard, field):
+    """
+    Path of the .npy file of a field of a shard
+
+    :param directory: dataset directory
+    :param shard: shard name
+    :param field: field name
+    :return: str
+    """
+    return os.path.join(directory, '{}.{}.npy'.format(shard, field))
+
+
+class ShardWriter:
+    """
+    Append rows to a sharded dataset, starting a new shard every shard_size rows
+    The fields are given as a dict of name: (dtype, shape of a row). An existing dataset is resumed: its fields must
+    match and the rows written after its last commit are discarded. Metadata (any JSON-serializable dict) is kept in
+    the manifest, updated on each commit.
+    """
+
+    def __init__(self, directory, fields, shard_size=100000, metadata=None):
+        self.directory = directory
+        self.fields = {name: (np.dtype(dtype), tuple(shape)) for name, (dtype, shape) in fields.items()}
+        self.shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+            if manifest['fields'] != self.manifest_fields():
+                raise ValueError('Fields do not match the dataset in {}'.format(directory))
+            self.shards = [dict(shard, pending=shard['rows']) for shard in manifest['shards']]
+            self.metadata = manifest['metadata']
+            if metadata is not None:
+                self.metadata.update(metadata)
+        else:
+            self.shards = []
+            self.metadata = dict(metadata or {})
+        self.files = {}
+        if self.shards:
+            self.open_shard(self.shards[-1]['name'], self.shards[-1]['rows'])
+
+    def manifest_fields(self):
+        """
+        Fields as they are stored in the manifest
+
+        :return: dict of name: [dtype description, row shape]
+        """
+        return {name: [np.lib.format.dtype_to_descr(dtype), list(shape)]
+                for name, (dtype, shape) in self.fields.items()}
+
+    @property
+    def n_rows(self):
+        """
+        Number of committed rows of all shards
+
+        :return: int
+        """
+        return sum(shard['rows'] for shard in self.shards)
+
+    @property
+    def n_appended(self):
+        """
+        Number of rows of all shards, committed or not
+
+        :return: int
+        """
+        return sum(shard['pending'] for shard in self.shards)
+
+    def open_shard(self, name, n_rows):
+        """
+        Open the files of a shard to append rows after its first n_rows (later rows are truncated)
+
+        :param name: shard name
+        :param n_rows: number of committed rows of the shard
+        :return: nothing
+        """
+        self.close()
+        for field, (dtype, shape) in self.fields.items():
+            path = field_path(self.directory, name, field)
+            file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+            file.write(npy_header(dtype, (n_rows,) + shape))
+            file.truncate(HEADER_SIZE + n_rows * dtype.itemsize * int(np.prod(shape)))
+            file.seek(0, os.SEEK_END)
+            self.files[field] = file
+
+    def append(self, **rows):
+        """
+        Append rows to every field (not visible to readers before commit)
+
+        :param rows: arrays of rows by field name, all with the same number of rows
+        :return: nothing
+        """
+        arrays = {field: np.asarray(rows[field], dtype=dtype).reshape((-1,) + shape)
+                  for field, (dtype, shape) in self.fields.items()}
+        n_rows = len(next(iter(arrays.values())))
+        if any(len(array) != n_rows for array in arrays.values()):
+            raise ValueError('All fields must have the same number of rows')
+        start = 0
+        while start < n_rows:
+            if not self.shards or self.shards[-1]['pending'] >= self.shard_size:
+                self.write_headers()
+                self.shards.append({'name': 'shard-{:05d}'.format(len(self.shards)), 'rows': 0, 'pending': 0})
+                self.open_shard(self.shards[-1]['name'], 0)
+            shard = self.shards[-1]
+            stop = min(n_rows, start + self.shard_size - shard['pending'])
+            for field, array in arrays.items():
+                self.files[field].write(np.ascontiguousarray(array[start:stop]).tobytes())
+            shard['pending'] += stop - start
+            start = stop
+
+    def write_headers(self):
+        """
+        Write the number of rows appended to the current shard in its .npy headers and flush its files to disk
+
+        :return: nothing
+        """
+        if not self.files:
+            return
+        n_rows = self.shards[-1]['pending']
+        for field, (dtype, shape) in self.fields.items():
+            file = self.files[field]
+            file.seek(0)
+            file.write(npy_header(dtype, (n_rows,) + shape))
+            file.seek(0, os.SEEK_END)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def commit(self):
+        """
+        Make the appended rows visible: update the .npy headers and replace the manifest
+
+        :return: nothing
+        """
+        self.write_headers()
+        for shard in self.shards:
+            shard['rows'] = shard['pending']
+        manifest = {'fields': self.manifest_fields(), 'metadata': self.metadata,
+                    'shards': [{'name': shard['name'], 'rows': shard['rows']} for shard in self.shards]}
+        temporary_path = os.path.join(self.directory, MANIFEST + '.tmp')
+        with open(temporary_path, 'w') as file:
+            json.dump(manifest, file, indent=1)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, os.path.join(self.directory, MANIFEST))
+
+    def close(self):
+        """
+        Close the files of the current shard (uncommitted rows are lost)
+
+        :return: nothing
+        """
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+
+class ShardReader:
+    """
+    Memory-mapped view of the committed rows of a sharded dataset, indexed as a single sequence of rows
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, MANIFEST)) as file:
+            manifest = json.load(file)
+        self.metadata = manifest['metadata']
+        self.fields = {name: (np.dtype(np.lib.format.descr_to_dtype(descr)), tuple(shape))
+                       for name, (descr, shape) in manifest['fields'].items()}
+        self.arrays = {field: [] for field in self.fields}
+        lengths = []
+        for shard in manifest['shards']:
+            if not shard['rows']:
+                continue
+            for field in self.fields:
+                array = np.load(field_path(directory, shard['name'], field), mmap_mode='r')
+                self.arrays[field].append(array[:shard['rows']])
+            lengths.append(shard['rows'])
+        self.offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, indexes):
+        """
+        Rows of every field at some positions of the dataset
+
+        :param indexes: int, slice or integer array of row indexes
+        :return: dict of arrays by field name
+        """
+        single = np.ndim(indexes) == 0 and not isinstance(indexes, slice)
+        indexes = np.arange(len(self))[indexes] if isinstance(indexes, slice) else np.atleast_1d(indexes)
+        indexes = np.where(indexes < 0, indexes + len(self), indexes)
+        if np.any((indexes < 0) | (indexes >= len(self))):
+            raise IndexError('Row index out of range')
+        shards = np.searchsorted(self.offsets, indexes, side='right') - 1
+        rows = {}
+        for field, (dtype, shape) in self.fields.items():
+            result = np.empty((len(indexes),) + shape, dtype=dtype)
+            for shard in np.unique(shards):
+                selected = shards == shard
+                result[selected] = self.arrays[field][shard][indexes[selected] - self.offsets[shard]]
+            rows[field] = result[0] if single else result
+        return rows
+
+    def sample(self, batch_size, random_state=np.random):
+        """
+        Random rows, for instance a training batch
+
+        :param batch_size: number of rows
+        :param random_state: numpy random state
+        :return: dict of arrays by field name
+        """
+        return self[np.sort(random_state.randint(len(self), size=batch_size))]
@@ -0,0 +1,112 @@
+"""
+Statistics collected while searching
+"""
+
+import resource
+import sys
+from collections import Counter
+
+import numpy as np
+
+PHASES = ('select', 'expand', 'simulate', 'backpropagate')
+
+
+class SearchStats:
+    """
+    Counters of a search: iterations, playouts, time per phase, depth of the selected nodes, rollouts length...
+    Iterations, playouts, elapsed time, tree size, pruned nodes and peak resident memory are always available, the
+    other counters are only filled when the search is asked to collect them
+    """
+
+    def __init__(self, n_simulations=1):
+        self.n_simulations = n_simulations
+        self.iterations = 0
+        self.elapsed = 0.
+        self.phase_times = dict.fromkeys(PHASES, 0.)
+        self.nodes_created = 0
+        self.peak_nodes = 0
+        self.pruned_nodes = 0
+        self.peak_rss = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.rollout_lengths = Counter()
+
+    @property
+    def playouts(self):
+        return self.iterations * self.n_simulations
+
+    @property
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.
+
+    @property
+    def average_depth(self):
+        return self.depth_sum / self.iterations if self.iterations else 0.
+
+    def add_depth(self, depth):
+        """
+        Count the depth of a node reached by an iteration
+
+        :param depth: depth of the node (0 for the root)
+        :return: nothing
+        """
+        self.depth_sum += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def add_rollout_lengths(self, lengths):
+        """
+        Add rollouts to the rollout length histogram
+
+        :param lengths: array of the number of moves played by each rollout
+        :return: nothing
+        """
+        counts = np.bincount(lengths)
+        self.rollout_lengths.update({length: int(counts[length]) for length in np.flatnonzero(counts)})
+
+    def merge(self, other):
+        """
+        Add the collected counters of another search (a worker of a root parallel search), the iterations, elapsed
+        time and tree size being counted by the caller
+
+        :param other: SearchStats
+        :return: nothing
+        """
+        for phase, phase_time in other.phase_times.items():
+            self.phase_times[phase] += phase_time
+        self.pruned_nodes += other.pruned_nodes
+        self.depth_sum += other.depth_sum
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.rollout_lengths.update(other.rollout_lengths)
+
+    def as_dict(self):
+        """
+        All statistics as builtin types (to be logged or dumped as JSON)
+
+        :return: dict
+        """
+        return {'iterations': self.iterations,
+                'playouts': self.playouts,
+                'elapsed': self.elapsed,
+                'playouts_per_second': self.playouts_per_second,
+                'phase_times': dict(self.phase_times),
+                'nodes_created': self.nodes_created,
+                'peak_nodes': self.peak_nodes,
+                'pruned_nodes': self.pruned_nodes,
+                'peak_rss': self.peak_rss,
+                'max_depth': self.max_depth,
+                'average_depth': self.average_depth,
+                'rollout_lengths': {int(length): count for length, count in sorted(self.rollout_lengths.items())}}
+
+    def __repr__(self):
+        return 'SearchStats(%s)' % self.as_dict()
+
+
+def peak_rss():
+    """
+    Peak resident set size of the current process
+
+    :return: number of bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024   # kilobytes on Linux
@@ -0,0 +1,68 @@
+"""
+Transposition table used to share search nodes between move orders leading to the same position
+"""
+
+import numpy as np
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table from position hashes to node ids
+
+    Each hash falls in a bucket of n_ways entries. When a bucket is full, the entry of its least visited node is
+    replaced, so that the table keeps the positions in which most of the search effort has been invested.
+    """
+
+    def __init__(self, size, n_ways=2):
+        self.n_ways = n_ways
+        self.n_buckets = max(size // n_ways, 1)
+        self.keys = np.zeros((self.n_buckets, n_ways), dtype=np.uint64)
+        self.nodes = np.full((self.n_buckets, n_ways), -1, dtype=np.int32)
+        self.n_lookups = 0
+        self.n_hits = 0
+        self.n_replacements = 0
+
+    def lookup(self, key):
+        """
+        Node stored for a position
+
+        :param key: position hash (int < 2 ** 64)
+        :return: node id or -1 if the position is not in the table
+        """
+        self.n_lookups += 1
+        bucket = int(key) % self.n_buckets
+        key = np.uint64(key)   # comparing uint64 with python ints may go through floats
+        for way in range(self.n_ways):
+            if self.nodes[bucket, way] != -1 and self.keys[bucket, way] == key:
+                self.n_hits += 1
+                return int(self.nodes[bucket, way])
+        return -1
+
+    def store(self, key, node, visits):
+        """
+        Store the node of a position
+
+        :param key: position hash (int < 2 ** 64)
+        :param node: node id
+        :param visits: array of number of plays of every node, used to choose which entry to replace
+        :return: nothing
+        """
+        bucket = int(key) % self.n_buckets
+        key = np.uint64(key)
+        nodes = self.nodes[bucket]
+        ways = np.flatnonzero((nodes == -1) | (self.keys[bucket] == key))
+        if ways.size:
+            way = ways[0]
+        else:
+            way = np.argmin(visits[nodes])
+            self.n_replacements += 1
+        self.keys[bucket, way] = key
+        self.nodes[bucket, way] = node
+
+    def clear(self):
+        """
+        Remove all entries
+
+        :return: nothing
+        """
+        self.nodes[:] = -1
@@ -0,0 +1,514 @@
+"""
+Array based storage of the Monte Carlo search tree
+"""
+
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ROOT = 0   # id of the root node
+# game-theoretic values of proven nodes, from the point of view of the player who moved into the node (MCTS-Solver)
+PROVEN_WIN, PROVEN_DRAW, PROVEN_LOSS = 1, 0, -1
+UNPROVEN = 2   # value of the nodes that are not solved yet
+
+
+class ArrayTree:
+    """
+    Search tree stored as a structure of arrays, each node being identified by its integer index
+
+    The children of a node are stored in a contiguous block reserved the first time the node is expanded, with one slot
+    per legal move. Only the first n_children slots of a block are actual nodes, the remaining ones only hold the moves
+    that are still to be explored. Moves are stored as ids pointing to the moves list, so any hashable move can be used.
+
+    With transpositions the tree is a directed acyclic graph: the target of a child slot is the node holding the
+    statistics of its position, either the slot itself or a node created earlier through another move order.
+
+    Nodes do not hold games: the game at a node is rebuilt by playing the moves leading to it from root_game.
+
+    With RAVE, every slot (explored or not) also holds the all-moves-as-first statistics of its move: the playouts
+    going through its parent in which the move was played later by the player to move at the parent.
+
+    With PUCT, every slot also holds the prior probability of its move given by the evaluator of its parent position,
+    and every node the sum of the values backed up through it (for the player who moved into it).
+    """
+
+    # name, dtype and default value of each node attribute
+    fields = (('parent', np.int32, -1),
+              ('first_child', np.int32, -1),
+              ('n_children', np.int32, 0),
+              ('n_legal', np.int32, 0),
+              ('move', np.int32, -1),
+              ('target', np.int32, -1),
+              ('key', np.uint64, 0),
+              ('n_plays', np.int64, 0),
+              ('n_wins', np.int64, 0),
+              ('n_ties', np.int64, 0),
+              ('score', np.float64, 0.),
+              ('proven', np.int8, UNPROVEN))
+    # attributes only allocated with RAVE
+    rave_fields = (('amaf_plays', np.int64, 0),
+                   ('amaf_wins', np.int64, 0))
+    # attributes only allocated with PUCT
+    puct_fields = (('prior', np.float32, 0.),
+                   ('value_sum', np.float64, 0.))
+    slot_fields = ('amaf_plays', 'amaf_wins', 'prior')   # attributes of the moves rather than of the nodes
+    rave = False
+    puct = False
+    root_game = None   # game at the root node
+
+    def __init__(self, capacity=1024, rave=False, puct=False):
+        if rave:
+            self.rave = True
+            self.fields = self.fields + self.rave_fields
+        if puct:
+            self.puct = True
+            self.fields = self.fields + self.puct_fields
+        self.capacity = 0
+        self.size = 1   # the root node always exists
+        self.moves = []
+        self.move_ids = {}
+        for name, dtype, default in self.fields:
+            setattr(self, name, np.full(0, default, dtype=dtype))
+        self.grow(capacity)
+        self.target[ROOT] = ROOT
+
+    def grow(self, capacity):
+        """
+        Reallocate all arrays so that they can hold at least capacity nodes
+
+        :param capacity: minimal number of nodes
+        :return: nothing
+        """
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, 2 * self.capacity)
+        for name, dtype, default in self.fields:
+            array = np.full(capacity, default, dtype=dtype)
+            array[:self.capacity] = getattr(self, name)
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def move_id(self, move):
+        """
+        Id of a move in the moves list (the move is added to the list if it is not known yet)
+
+        :param move: move as returned by Game.legal_plays
+        :return: int
+        """
+        if move not in self.move_ids:
+            self.move_ids[move] = len(self.moves)
+            self.moves.append(move)
+        return self.move_ids[move]
+
+    def is_expanded(self, node):
+        """
+        Whether children slots have already been reserved for a node
+
+        :param node: node id
+        :return: boolean
+        """
+        return self.first_child[node] != -1
+
+    def reserve_children(self, node, moves):
+        """
+        Reserve one child slot per legal move of a node
+
+        :param node: node id
+        :param moves: list of legal moves
+        :return: nothing
+        """
+        first, n_moves = self.size, len(moves)
+        self.grow(first + n_moves)
+        self.parent[first:first + n_moves] = node
+        self.move[first:first + n_moves] = [self.move_id(move) for move in moves]
+        self.first_child[node] = first
+        self.n_legal[node] = n_moves
+        self.size += n_moves
+
+    def add_child(self, node, slot, target=None):
+        """
+        Turn one of the unexplored slots of a node into its next child
+
+        :param node: node id
+        :param slot: index of the slot in the children block (must be >= n_children)
+        :param target: id of the node already holding this position (transposition) or None for a new node
+        :return: id of the new child slot
+        """
+        first, n_children = self.first_child[node], self.n_children[node]
+        child, selected = first + n_children, first + slot
+        # swap moves so that explored children stay at the beginning of the block
+        self.move[child], self.move[selected] = self.move[selected], self.move[child]
+        for name, _, _ in self.fields:
+            if name in self.slot_fields:
+                array = getattr(self, name)
+                array[child], array[selected] = array[selected], array[child]
+        self.target[child] = child if target is None else target
+        self.n_children[node] += 1
+        return child
+
+    def children(self, node):
+        """
+        Ids of the explored children of a node
+
+        :param node: node id
+        :return: range of ids
+        """
+        first = self.first_child[node]
+        return range(first, first + self.n_children[node]) if first != -1 else range(0)
+
+    def children_targets(self, node):
+        """
+        Ids of the nodes holding the statistics of the explored children of a node
+
+        :param node: node id
+        :return: array of ids
+        """
+        first = self.first_child[node]
+        return self.target[first:first + self.n_children[node]] if first != -1 else self.target[:0]
+
+    def unexplored_moves(self, node):
+        """
+        Moves of a node that do not have a child yet
+
+        :param node: node id (must be expanded)
+        :return: list of moves
+        """
+        first = self.first_child[node]
+        move_ids = self.move[first + self.n_children[node]:first + self.n_legal[node]]
+        return [self.moves[move_id] for move_id in move_ids]
+
+    def ancestors(self, node):
+        """
+        Ids of the ancestors of a node, from its parent up to the root
+
+        :param node: node id
+        :return: list of ids
+        """
+        ancestors = []
+        node = self.parent[node]
+        while node != -1:
+            ancestors.append(node)
+            node = self.parent[node]
+        return ancestors
+
+    def chain(self, node):
+        """
+        Ids of the nodes from the root to a node, following the parents of the node
+
+        :param node: node id
+        :return: list of ids
+        """
+        return self.ancestors(node)[::-1] + [int(node)]
+
+    def position(self, node):
+        """
+        Game at a node, rebuilt by playing the moves leading to it on a copy of the root game
+
+        :param node: node id
+        :return: game
+        """
+        game = self.root_game.copy()
+        for node_ in self.chain(node)[1:]:
+            game.play(self.moves[self.move[node_]])
+        return game
+
+    def empty_like(self, size):
+        """
+        Empty tree using the same move ids
+
+        :param size: number of nodes the tree must be able to hold
+        :return: new tree
+        """
+        tree = ArrayTree(capacity=max(2 * size, 1024), rave=self.rave, puct=self.puct)
+        tree.moves = list(self.moves)
+        tree.move_ids = dict(self.move_ids)
+        return tree
+
+    def subtree(self, node):
+        """
+        Copy of the part of the tree that can be reached from a node, this node being the root of the copy
+        Nodes are renumbered in breadth first order so that the copy is compact, unreachable nodes are dropped
+
+        :param node: node id of the new root
+        :return: new tree of the same type
+        """
+        node = int(node)
+        # for each slot of the copy: node whose attributes are copied (-1 for none), slot holding its move, parent
+        # and target in the copy
+        sources, slots, parents, targets = [node], [-1], [-1], [ROOT]
+        first_children = {}
+        new_ids = {node: ROOT}
+        queue = deque([(node, ROOT)])
+        while queue:
+            old, new = queue.popleft()
+            first = self.first_child[old]
+            if first == -1:
+                continue
+            first_children[new] = len(sources)
+            for slot in range(first, first + self.n_legal[old]):
+                parents.append(new)
+                slots.append(slot)
+                target = int(self.target[slot])
+                if slot >= first + self.n_children[old]:
+                    # unexplored move
+                    sources.append(-1)
+                    targets.append(-1)
+                elif target in new_ids:
+                    # transposition to a node already copied
+                    sources.append(-1)
+                    targets.append(new_ids[target])
+                else:
+                    # the first slot reaching a node holds it in the copy
+                    new_ids[target] = len(targets)
+                    sources.append(target)
+                    targets.append(len(targets))
+                    queue.append((target, new_ids[target]))
+
+        size = len(sources)
+        tree = self.empty_like(size)
+        sources, slots = np.array(sources), np.array(slots)
+        copied = np.flatnonzero(sources != -1)
+        for name, _, _ in self.fields:
+            if name in self.slot_fields:
+                getattr(tree, name)[1:size] = getattr(self, name)[slots[1:]]   # unexplored slots included
+            elif name not in ('parent', 'first_child', 'move', 'target'):
+                getattr(tree, name)[copied] = getattr(self, name)[sources[copied]]
+        tree.parent[:size] = parents
+        tree.target[:size] = targets
+        tree.move[1:size] = self.move[slots[1:]]
+        for new, first in first_children.items():
+            tree.first_child[new] = first
+        tree.size = size
+        return tree
+
+    def nbytes(self):
+        """
+        Memory used by the node arrays
+
+        :return: number of bytes
+        """
+        return sum(getattr(self, name).nbytes for name, dtype, _ in self.fields if dtype is not object)
+
+    def view(self, node):
+        """
+        Node like object giving access to the attributes of a node
+
+        :param node: node id
+        :return: NodeView
+        """
+        return NodeView(self, node)
+
+
+class SharedArrayTree(ArrayTree):
+    """
+    ArrayTree stored in shared memory so that several processes can grow the same tree
+
+    Its capacity is fixed (MemoryError is raised once it is full) and move ids are fixed at creation so that they are
+    the same in every process. Processes forked after creation share the arrays.
+    """
+
+    def __init__(self, capacity, moves):
+        self.capacity = capacity
+        self.moves = list(moves)
+        self.move_ids = {move: move_id for move_id, move in enumerate(self.moves)}
+        self.buffers = []
+        for name, dtype, default in self.fields:
+            setattr(self, name, self.shared_array(capacity, dtype, default))
+        self.counters = self.shared_array(1, np.int64, 1)   # number of used slots
+        self.target[ROOT] = ROOT
+        # shared memory blocks are released when the tree is garbage collected or closed
+        self.finalizer = weakref.finalize(self, unlink_buffers, list(self.buffers))
+
+    def shared_array(self, size, dtype, default):
+        """
+        Create an array in a new shared memory block
+
+        :param size: number of elements
+        :param dtype: type of the elements
+        :param default: initial value of the elements
+        :return: array
+        """
+        buffer = shared_memory.SharedMemory(create=True, size=max(size * np.dtype(dtype).itemsize, 1))
+        self.buffers.append(buffer)
+        array = np.ndarray(size, dtype=dtype, buffer=buffer.buf)
+        array[:] = default
+        return array
+
+    @property
+    def size(self):
+        return int(self.counters[0])
+
+    @size.setter
+    def size(self, value):
+        self.counters[0] = value
+
+    def grow(self, capacity):
+        """
+        Check that the tree can hold capacity nodes (shared arrays cannot be reallocated)
+
+        :param capacity: minimal number of nodes
+        :return: nothing
+        """
+        if capacity > self.capacity:
+            raise MemoryError('Shared tree is full ({} nodes)'.format(self.capacity))
+
+    def empty_like(self, size):
+        """
+        Empty shared tree with the same capacity and moves
+
+        :param size: number of nodes the tree must be able to hold
+        :return: new tree
+        """
+        self.grow(size)
+        return SharedArrayTree(capacity=self.capacity, moves=self.moves)
+
+    def move_id(self, move):
+        """
+        Id of a move in the moves list given at creation
+
+        :param move: move as returned by Game.legal_plays
+        :return: int
+        """
+        return self.move_ids[move]
+
+    def close(self):
+        """
+        Release the shared memory (the tree cannot be used anymore)
+
+        :return: nothing
+        """
+        for name, _, _ in self.fields:
+            setattr(self, name, None)
+        self.counters = None
+        self.finalizer()
+
+
+def unlink_buffers(buffers):
+    """
+    Close and destroy shared memory blocks
+
+    :param buffers: list of SharedMemory
+    :return: nothing
+    """
+    for buffer in buffers:
+        try:
+            buffer.close()
+        except BufferError:
+            pass   # arrays still point to the block, it will be unmapped with them
+        try:
+            buffer.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class NodeView:
+    """
+    Read/write view of a node of an ArrayTree
+    It exposes the same attributes as the anytree nodes formerly used by the search so that it can be rendered and
+    iterated over with anytree helpers
+    """
+
+    def __init__(self, tree, node):
+        self.tree = tree
+        self.id = int(node)
+
+    def __eq__(self, other):
+        """ Two views are equal if they point to the same node of the same tree"""
+        if isinstance(other, NodeView):
+            return self.tree is other.tree and self.id == other.id
+        return False
+
+    def __hash__(self):
+        return hash((id(self.tree), self.id))
+
+    def __repr__(self):
+        return 'NodeView(%s)' % self.name
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def name(self):
+        """ Path of the node from the root, each level being the rank of the child among its siblings"""
+        ranks = []
+        node = self.id
+        while self.tree.parent[node] != -1:
+            ranks.append(str(node - self.tree.first_child[self.tree.parent[node]]))
+            node = self.tree.parent[node]
+        return '_'.join(['0'] + ranks[::-1])
+
+    @property
+    def parent(self):
+        parent = self.tree.parent[self.id]
+        return self.tree.view(parent) if parent != -1 else None
+
+    @property
+    def children(self):
+        return tuple(self.tree.view(child) for child in self.tree.children_targets(self.id))
+
+    @property
+    def ancestors(self):
+        return tuple(self.tree.view(ancestor) for ancestor in self.tree.ancestors(self.id)[::-1])
+
+    @property
+    def move(self):
+        move_id = self.tree.move[self.id]
+        return self.tree.moves[move_id] if move_id != -1 else None
+
+    @property
+    def game(self):
+        return self.tree.position(self.id)
+
+    @property
+    def n_plays(self):
+        return self.tree.n_plays[self.id]
+
+    @n_plays.setter
+    def n_plays(self, value):
+        self.tree.n_plays[self.id] = value
+
+    @property
+    def n_wins(self):
+        return self.tree.n_wins[self.id]
+
+    @n_wins.setter
+    def n_wins(self, value):
+        self.tree.n_wins[self.id] = value
+
+    @property
+    def n_ties(self):
+        return self.tree.n_ties[self.id]
+
+    @n_ties.setter
+    def n_ties(self, value):
+        self.tree.n_ties[self.id] = value
+
+    @property
+    def amaf_plays(self):
+        return self.tree.amaf_plays[self.id]
+
+    @property
+    def amaf_wins(self):
+        return self.tree.amaf_wins[self.id]
+
+    @property
+    def prior(self):
+        return self.tree.prior[self.id]
+
+    @property
+    def value_sum(self):
+        return self.tree.value_sum[self.id]
+
+    @property
+    def proven(self):
+        return self.tree.proven[self.id]
+
+    @property
+    def score(self):
+        return self.tree.score[self.id]
+
+    @score.setter
+    def score(self, value):
+        self.tree.score[self.id] = value
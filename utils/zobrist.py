@@ -0,0 +1,24 @@
+"""
+Zobrist hashing keys
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+ZOBRIST_SEED = 1234   # fixed so that hashes are the same in every process
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(shape):
+    """
+    Random 64 bits keys, one per element of an array of given shape, plus one key for the side to move
+    Keys are python ints (XOR on python ints is faster than on NumPy scalars)
+
+    :param shape: tuple, usually (rows, cols, number of players)
+    :return: (nested lists of keys of the given shape, side to move key)
+    """
+    random_state = np.random.RandomState(ZOBRIST_SEED)
+    n_keys = int(np.prod(shape)) + 1
+    keys = np.frombuffer(random_state.bytes(8 * n_keys), dtype=np.uint64)
+    return keys[:-1].reshape(shape).tolist(), int(keys[-1])